@@ -1,12 +1,37 @@
 from __future__ import annotations
 
-import json
-import tempfile
 from pathlib import Path
 
 import streamlit as st
 
-from pb_ingestor.pipeline import run_conversion, run_enrichment
+from pb_ingestor.preview import CsvPreview, PreviewFilter
+from pb_ingestor.service import Job, JobQueue, QueueFullError
+
+APP_JOBS_DIR = "out/app_jobs"
+DOWNLOADS = {
+    "convert": [
+        ("Converted XLSX", "converted.xlsx"),
+        ("Converted CSV", "converted.csv"),
+        ("Manual Review CSV", "manual_review.csv"),
+        ("QA JSON", "qa.json"),
+    ],
+    "enrich": [
+        ("Enriched CSV", "enriched.csv"),
+        ("Enrichment QA JSON", "enrichment_qa.json"),
+    ],
+}
+
+
+@st.cache_resource
+def job_queue() -> JobQueue:
+    # Shared by every session so identical uploads from different estimators hit the same cached job.
+    return JobQueue(APP_JOBS_DIR, workers=2, max_pending=16, retention_s=24 * 3600)
+
+
+@st.cache_resource(max_entries=8)
+def csv_preview(path: str, mtime_ns: int) -> CsvPreview:
+    return CsvPreview(path)
+
 
 st.set_page_config(page_title="PB Ingestor", layout="wide")
 st.title("Pricebook Ingestor")
@@ -22,85 +47,133 @@ with st.sidebar:
 
 uploaded = st.file_uploader("Upload distributor workbook", type=["xlsx", "xlsm", "xls", "csv", "txt"])
 
-if "last_outputs" not in st.session_state:
-    st.session_state.last_outputs = {}
+if "job_ids" not in st.session_state:
+    st.session_state.job_ids = {}
+    st.session_state.finished_ids = set()
+
+
+def _submit(kind: str, source_name: str, data: bytes, settings: dict) -> None:
+    try:
+        job = job_queue().submit(kind, source_name, data, settings)
+    except QueueFullError as exc:
+        st.warning(f"The app is busy ({exc}); try again shortly.")
+        return
+    st.session_state.job_ids[kind] = job.id
+    if kind == "convert":
+        st.session_state.job_ids.pop("enrich", None)
+
+
+def _current_job(kind: str) -> Job | None:
+    job_id = st.session_state.job_ids.get(kind)
+    return job_queue().get(job_id) if job_id else None
+
 
 if uploaded is not None:
-    with tempfile.TemporaryDirectory() as tmpd:
-        tmp = Path(tmpd)
-        source_path = tmp / uploaded.name
-        source_path.write_bytes(uploaded.getvalue())
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("Run Convert", type="primary", use_container_width=True):
-                out_dir = tmp / "out"
-                out_dir.mkdir(parents=True, exist_ok=True)
-                try:
-                    result = run_conversion(
-                        source=str(source_path),
-                        template_type=template_type,
-                        markup_profile_path=markup_profile,
-                        output_csv=str(out_dir / "converted.csv"),
-                        output_workbook=str(out_dir / "converted.xlsx"),
-                        qa_json=str(out_dir / "qa.json"),
-                        manual_review_csv=str(out_dir / "manual_review.csv"),
-                        labor_cost_default=labor_cost_default if labor_cost_default > 0 else None,
-                        labor_rate_default=labor_rate_default if labor_rate_default > 0 else None,
-                    )
-                except Exception as exc:
-                    st.error(f"Conversion failed: {exc}")
-                else:
-                    st.success("Conversion completed")
-                    st.json(result["summary"])
-                    st.session_state.last_outputs = {
-                        "converted_csv": Path(result["output_csv"]).read_bytes(),
-                        "converted_xlsx": Path(result["output_workbook"]).read_bytes(),
-                        "qa_json": Path(result["qa_json"]).read_bytes(),
-                        "manual_review_csv": Path(result["manual_review_csv"]).read_bytes(),
-                    }
-
-        with col2:
-            if st.button("Run Enrichment", use_container_width=True):
-                if not st.session_state.last_outputs.get("converted_csv"):
-                    st.warning("Run convert first so there is a CSV to enrich.")
-                else:
-                    enrich_in = tmp / "converted_for_enrich.csv"
-                    enrich_in.write_bytes(st.session_state.last_outputs["converted_csv"])
-                    try:
-                        summary = run_enrichment(
-                            input_csv=str(enrich_in),
-                            output_csv=str(tmp / "enriched.csv"),
-                            qa_json=str(tmp / "enrich_qa.json"),
-                            domains_config=domains_config,
-                            sleep_ms=50,
-                        )
-                    except Exception as exc:
-                        st.error(f"Enrichment failed: {exc}")
-                    else:
-                        st.success("Enrichment completed")
-                        st.json(summary)
-                        st.session_state.last_outputs["enriched_csv"] = (tmp / "enriched.csv").read_bytes()
-                        st.session_state.last_outputs["enrichment_qa_json"] = (tmp / "enrich_qa.json").read_bytes()
-
-if st.session_state.last_outputs:
-    st.subheader("Downloads")
-    dl1, dl2, dl3 = st.columns(3)
-    with dl1:
-        if "converted_xlsx" in st.session_state.last_outputs:
-            st.download_button("Download Converted XLSX", st.session_state.last_outputs["converted_xlsx"], file_name="converted.xlsx")
-        if "converted_csv" in st.session_state.last_outputs:
-            st.download_button("Download Converted CSV", st.session_state.last_outputs["converted_csv"], file_name="converted.csv")
-    with dl2:
-        if "manual_review_csv" in st.session_state.last_outputs:
-            st.download_button("Download Manual Review CSV", st.session_state.last_outputs["manual_review_csv"], file_name="manual_review.csv")
-        if "qa_json" in st.session_state.last_outputs:
-            st.download_button("Download QA JSON", st.session_state.last_outputs["qa_json"], file_name="qa.json")
-    with dl3:
-        if "enriched_csv" in st.session_state.last_outputs:
-            st.download_button("Download Enriched CSV", st.session_state.last_outputs["enriched_csv"], file_name="enriched.csv")
-        if "enrichment_qa_json" in st.session_state.last_outputs:
-            st.download_button("Download Enrichment QA JSON", st.session_state.last_outputs["enrichment_qa_json"], file_name="enrichment_qa.json")
+    col1, col2 = st.columns(2)
+    with col1:
+        if st.button("Run Convert", type="primary", use_container_width=True):
+            _submit(
+                "convert",
+                uploaded.name,
+                uploaded.getvalue(),
+                {
+                    "template_type": template_type,
+                    "markup_profile_path": markup_profile,
+                    "labor_cost_default": labor_cost_default if labor_cost_default > 0 else None,
+                    "labor_rate_default": labor_rate_default if labor_rate_default > 0 else None,
+                },
+            )
+
+    with col2:
+        if st.button("Run Enrichment", use_container_width=True):
+            converted = _current_job("convert")
+            if converted is None or converted.status != "succeeded":
+                st.warning("Run convert first so there is a CSV to enrich.")
+            else:
+                _submit(
+                    "enrich",
+                    "converted.csv",
+                    (converted.work_dir / "out" / "converted.csv").read_bytes(),
+                    {"domains_config": domains_config, "sleep_ms": 50},
+                )
+
+
+def _progress_line(job: Job) -> str:
+    counters = job.progress()
+    if job.kind == "enrich" and counters.get("parts_total"):
+        return f"{counters.get('parts_enriched', 0)} / {counters['parts_total']} parts enriched"
+    labels = [("rows_ingested", "ingested"), ("rows_mapped", "mapped"), ("rows_written", "written")]
+    parts = [f"{counters[key]} rows {label}" for key, label in labels if key in counters]
+    return ", ".join(parts) or "waiting for a worker"
+
+
+def _download(label: str, path: Path, key: str) -> None:
+    # Read lazily on click so sessions never hold output bytes.
+    st.download_button(f"Download {label}", data=path.read_bytes, file_name=path.name, key=key, on_click="ignore")
+
+
+@st.fragment(run_every=1.0)
+def job_panel() -> None:
+    for kind, title in (("convert", "Conversion"), ("enrich", "Enrichment")):
+        job = _current_job(kind)
+        if job is None:
+            continue
+        st.subheader(title)
+        if job.status in {"queued", "running"}:
+            st.info(f"{title} {job.status}: {_progress_line(job)}")
+            continue
+        if job.id not in st.session_state.finished_ids:
+            # Rerun the whole page once so sections outside this fragment (the preview) pick up the result.
+            st.session_state.finished_ids.add(job.id)
+            st.rerun(scope="app")
+        if job.status == "failed":
+            st.error(f"{title} failed at {job.error['error_stage']}: {job.error['error_message']}")
+            continue
+        st.success(f"{title} completed")
+        st.json(job.result["summary"] if kind == "convert" else job.result, expanded=False)
+        out = job.work_dir / "out"
+        columns = st.columns(len(DOWNLOADS[kind]))
+        for column, (label, name) in zip(columns, DOWNLOADS[kind]):
+            if (out / name).exists():
+                with column:
+                    _download(label, out / name, key=f"{job.id}-{name}")
+
+
+job_panel()
+
+
+@st.fragment
+def preview_panel(job: Job) -> None:
+    st.subheader("Preview")
+    name = st.radio("Rows", ["converted.csv", "manual_review.csv"], horizontal=True, key="preview_file")
+    path = job.work_dir / "out" / name
+    if not path.exists():
+        return
+    preview = csv_preview(str(path), path.stat().st_mtime_ns)
+    if preview.total == 0:
+        st.write("No rows.")
+        return
+    f1, f2, f3, f4 = st.columns(4)
+    statuses = f1.multiselect("Status", preview.facet_values("Status"))
+    manufacturers = f2.multiselect("Manufacturer", preview.facet_values("Manufacturer"))
+    categories = f3.multiselect("Category", preview.facet_values("Category"))
+    price_range = preview.price_range()
+    min_price = max_price = None
+    if price_range is not None and price_range[0] < price_range[1]:
+        low, high = f4.slider("Part Price", price_range[0], price_range[1], price_range)
+        if (low, high) != price_range:
+            min_price, max_price = low, high
+    rows = preview.select(PreviewFilter(set(statuses), set(manufacturers), set(categories), min_price, max_price))
+    page_size = 100
+    pages = max(1, -(-len(rows) // page_size))
+    page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1, step=1)
+    st.caption(f"{len(rows)} of {preview.total} rows match")
+    st.dataframe(preview.page(rows, int(page) - 1, page_size), use_container_width=True, hide_index=True)
+
+
+converted_job = _current_job("convert")
+if converted_job is not None and converted_job.status == "succeeded":
+    preview_panel(converted_job)
 
 st.subheader("Quick start")
 st.code(
@@ -112,4 +185,5 @@ st.code(
 with st.expander("Debug info"):
     st.write("Markup profile path", markup_profile)
     st.write("Domains config path", domains_config)
-    st.write("Session keys", list(st.session_state.keys()))
+    st.write("Jobs directory", APP_JOBS_DIR)
+    st.write("Session jobs", st.session_state.job_ids)
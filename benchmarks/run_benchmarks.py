@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from decimal import Decimal
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+
+from pb_ingestor import __version__
+from pb_ingestor.crosswalk import infer_base_template_path, infer_crosswalk_path, load_crosswalk
+from pb_ingestor.enrichment import enrich_csv
+from pb_ingestor.ingest import ingest_fallback, ingest_xlsx
+from pb_ingestor.mapper import map_rows
+from pb_ingestor.markup import MarkupProfile
+from pb_ingestor.output import write_manual_review_csv, write_normalized_csv, write_qa_json, write_template_workbook
+from pb_ingestor.synthetic import BookSpec, generate_book, generate_delimited_book
+
+RESULTS_FORMAT = "pb-ingestor-benchmarks/1"
+ROOT = Path(__file__).resolve().parents[1]
+MARKUP_PROFILE = ROOT / "config/markup/default_global_tiered_markup.json"
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        part = self.path.rsplit("=", 1)[-1].rsplit("/", 1)[-1]
+        body = (
+            f"<html><head><title>{part} | Stub Manufacturer</title></head><body>"
+            f"<h1>{part}</h1><p>Replacement part {part}. 5 year limited warranty.</p></body></html>"
+        ).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _time(func: Callable[[], Any], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def _record(name: str, rows: int, samples: list[float]) -> dict[str, Any]:
+    best = min(samples)
+    return {
+        "benchmark": name,
+        "rows": rows,
+        "repeat": len(samples),
+        "best_s": round(best, 6),
+        "median_s": round(statistics.median(samples), 6),
+        "rows_per_s": round(rows / best, 1) if best > 0 else None,
+    }
+
+
+def run_size(rows: int, repeat: int, work: Path, enrich_rows: int, only: set[str] | None) -> list[dict[str, Any]]:
+    results: list[dict[str, Any]] = []
+
+    def bench(name: str, n: int, func: Callable[[], Any], times: int = repeat) -> None:
+        if only is None or name in only:
+            results.append(_record(name, n, _time(func, times)))
+            print(f"{name:24s} rows={n:<8d} best={results[-1]['best_s']:.4f}s", file=sys.stderr)
+
+    book = work / f"book_{rows}.xlsx"
+    generate_book(book, BookSpec(rows=rows))
+    fallback = work / f"fallback_{rows}.xlsx"
+    generate_delimited_book(fallback, BookSpec(rows=rows))
+
+    crosswalk = load_crosswalk(infer_crosswalk_path("bundle"))
+    markup = MarkupProfile.from_file(MARKUP_PROFILE)
+    ingested = ingest_xlsx(book)
+    mapped, counters = map_rows(ingested.rows, crosswalk, markup, labor_rate_default=125.0)
+    costs = [Decimal(i % 5000) + Decimal("0.99") for i in range(rows)]
+
+    bench("ingest_xlsx", rows, lambda: ingest_xlsx(book))
+    bench("ingest_fallback", rows, lambda: ingest_fallback(fallback))
+    bench("map_rows", rows, lambda: map_rows(ingested.rows, crosswalk, markup, labor_rate_default=125.0))
+    bench("price_for_cost", rows, lambda: [markup.price_for_cost(c) for c in costs])
+    bench("write_normalized_csv", rows, lambda: write_normalized_csv(mapped, work / "out.csv"))
+    bench("write_manual_review_csv", rows, lambda: write_manual_review_csv(mapped, work / "review.csv"))
+    bench(
+        "write_template_workbook",
+        rows,
+        lambda: write_template_workbook(mapped, infer_base_template_path("bundle"), work / "out.xlsx", crosswalk),
+    )
+    bench(
+        "write_qa_json",
+        rows,
+        lambda: write_qa_json(work / "qa.json", counters, ingested.mode, ingested.errors, book.name, ingested.asset_refs),
+    )
+
+    if enrich_rows > 0 and (only is None or "enrich_csv" in only):
+        results.append(_bench_enrichment(work, min(rows, enrich_rows), repeat))
+    return results
+
+
+def _bench_enrichment(work: Path, rows: int, repeat: int) -> dict[str, Any]:
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        domains = work / "stub_domains.json"
+        domains.write_text(json.dumps({"stub": [f"http://127.0.0.1:{server.server_address[1]}"]}))
+        source = work / "enrich_in.csv"
+        lines = ["Manufacturer Part Number,Manufacturer,Description"] + [f"STUB-{i:06d},Stub,Widget {i}" for i in range(rows)]
+        source.write_text("\n".join(lines) + "\n")
+        samples = _time(
+            lambda: enrich_csv(source, work / "enriched.csv", work / "enrich_qa.json", domains, sleep_ms=0, page_matching=False),
+            repeat,
+        )
+    finally:
+        server.shutdown()
+    record = _record("enrich_csv", rows, samples)
+    print(f"{'enrich_csv':24s} rows={rows:<8d} best={record['best_s']:.4f}s", file=sys.stderr)
+    return record
+
+
+def compare(results: list[dict[str, Any]], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    previous = {(r["benchmark"], r["rows"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        old = previous.get((result["benchmark"], result["rows"]))
+        if old is None or old["best_s"] <= 0:
+            continue
+        change = result["best_s"] / old["best_s"] - 1
+        result["baseline_best_s"] = old["best_s"]
+        result["change"] = round(change, 4)
+        if change > max_regression:
+            regressions.append(f"{result['benchmark']} rows={result['rows']}: {old['best_s']:.4f}s -> {result['best_s']:.4f}s ({change:+.0%})")
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pb-ingestor stages on synthetic distributor books")
+    parser.add_argument("--rows", type=int, nargs="+", default=[1000, 10000], help="Book sizes to generate (1k to 1M)")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--enrich-rows", type=int, default=200, help="Rows enriched against the local stub server (0 skips)")
+    parser.add_argument("--only", nargs="*", default=None, help="Run only these benchmark names")
+    parser.add_argument("--output", default=f"benchmarks/results/{__version__}.json")
+    parser.add_argument("--baseline", default=None, help="Earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, default=0.25, help="Allowed slowdown vs baseline (0.25 = 25%%)")
+    parser.add_argument("--work-dir", default=None, help="Keep generated books here instead of a temp dir")
+    args = parser.parse_args(argv)
+
+    only = set(args.only) if args.only else None
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(args.work_dir or tmp)
+        work.mkdir(parents=True, exist_ok=True)
+        results = []
+        for rows in args.rows:
+            results += run_size(rows, args.repeat, work, args.enrich_rows, only)
+
+    regressions = compare(results, json.loads(Path(args.baseline).read_text()), args.max_regression) if args.baseline else []
+    report = {
+        "format": RESULTS_FORMAT,
+        "tool_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "baseline": args.baseline,
+        "results": results,
+        "regressions": regressions,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"wrote_benchmarks={output}")
+    for line in regressions:
+        print(f"regression={line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+from pb_ingestor import __version__
+
+RESULTS_FORMAT = "pb-ingestor-startup/1"
+SUBCOMMANDS = ["analyze", "convert", "convert-all", "worker", "queue", "enrich", "catalog-build", "serve", "validate", "validate-all"]
+# Commands that do no real work; these are held to --max-ms.
+TRIVIAL = {"--help", "validate"}
+
+
+def _commands(work: Path) -> dict[str, list[str]]:
+    schema = work / "schema.json"
+    schema.write_text(json.dumps({"type": "object", "required": ["run_id"]}))
+    payload = work / "payload.json"
+    payload.write_text(json.dumps({"run_id": "run-1"}))
+    commands = {"--help": ["--help"], "validate": ["validate", str(payload), "--schema", str(schema)]}
+    for name in SUBCOMMANDS:
+        commands[f"{name} --help"] = [name, "--help"]
+    return commands
+
+
+def _time_command(argv: list[str], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "pb_ingestor.cli", *argv], check=True, capture_output=True)
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure pb-ingestor CLI cold-start time per subcommand")
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-ms", type=float, default=150.0, help="Budget for trivial commands (--help, validate)")
+    parser.add_argument("--output", default=f"benchmarks/results/startup-{__version__}.json")
+    args = parser.parse_args(argv)
+
+    python_only = []
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", "pass"], check=True)
+        python_only.append((time.perf_counter() - started) * 1000)
+
+    baseline = statistics.median(python_only)
+    results = []
+    over_budget = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, command in _commands(Path(tmp)).items():
+            samples = _time_command(command, args.repeat)
+            record = {
+                "command": name,
+                "repeat": args.repeat,
+                "min_ms": round(min(samples), 1),
+                "median_ms": round(statistics.median(samples), 1),
+                "over_interpreter_ms": round(statistics.median(samples) - baseline, 1),
+                "trivial": name in TRIVIAL,
+            }
+            results.append(record)
+            print(f"{name:24s} min={record['min_ms']:7.1f}ms median={record['median_ms']:7.1f}ms", file=sys.stderr)
+            if record["trivial"] and record["median_ms"] > args.max_ms:
+                over_budget.append(name)
+
+    report = {
+        "format": RESULTS_FORMAT,
+        "tool_version": __version__,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp_utc": datetime.now(timezone.utc).isoformat(),
+        "interpreter_startup_median_ms": round(baseline, 1),
+        "max_ms": args.max_ms,
+        "results": results,
+        "over_budget": over_budget,
+    }
+    output = Path(args.output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"wrote_startup={output}")
+    for name in over_budget:
+        print(f"over_budget={name}")
+    return 1 if over_budget else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,296 @@
+from __future__ import annotations
+
+import re
+import time
+import zipfile
+from collections import Counter
+from datetime import datetime, time as dt_time, timedelta
+from itertools import islice
+from pathlib import Path
+from typing import Any, Iterator
+from xml.etree.ElementTree import ParseError, fromstring, iterparse
+
+from .ingest import (
+    HEADER_SEARCH_ROWS,
+    SourceRow,
+    collect_sheet_rows,
+    fill_merged_rows,
+    ingest_fallback,
+    is_header_row,
+    scan_sheet_xml,
+    sheet_headers,
+)
+from .ooxml import WorkbookSheet, workbook_sheets
+from .transforms import FIELD_CANDIDATES, find_field_header
+
+ANALYSIS_FORMAT = "pb-ingestor-analysis/1"
+SAMPLE_ROWS = 200
+MAX_DISTINCT = 1000
+EXAMPLES = 3
+_COLUMN = re.compile(r"[A-Z]+")
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="([A-Z0-9:]+)"')
+_NUMERIC_TEXT = re.compile(r"^\s*\$?\s*-?[0-9,]*\.?[0-9]+\s*$")
+# Built-in number formats that display a date or time.
+_DATE_FORMAT_IDS = set(range(14, 23)) | set(range(27, 37)) | set(range(45, 48)) | set(range(50, 59))
+_EXCEL_EPOCH = datetime(1899, 12, 30)
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _is_date_code(code: str) -> bool:
+    code = re.sub(r'"[^"]*"|\[[^\]]*\]|\\.', "", code)
+    return bool(re.search(r"[dmyhs]", code, re.IGNORECASE))
+
+
+class _SharedStrings:
+    # Parsed only as far as the highest index asked for; Excel writes strings in first-use order,
+    # so the first rows of a sheet rarely need more than the start of a large table.
+    def __init__(self, archive: zipfile.ZipFile) -> None:
+        self.items: list[str] = []
+        self._events = None
+        if "xl/sharedStrings.xml" in archive.namelist():
+            self._events = iterparse(archive.open("xl/sharedStrings.xml"), events=("end",))
+
+    def __getitem__(self, index: int) -> str:
+        while len(self.items) <= index and self._events is not None:
+            try:
+                _, elem = next(self._events)
+            except StopIteration:
+                self._events = None
+                break
+            if _local(elem.tag) != "si":
+                continue
+            # Plain <t> and rich-text runs count; phonetic hints (<rPh>) do not.
+            self.items.append("".join(t.text or "" for child in elem if _local(child.tag) in ("t", "r") for t in child.iter() if _local(t.tag) == "t"))
+            elem.clear()
+        return self.items[index] if index < len(self.items) else ""
+
+
+def _date_styles(archive: zipfile.ZipFile) -> set[int]:
+    if "xl/styles.xml" not in archive.namelist():
+        return set()
+    root = fromstring(archive.read("xl/styles.xml"))
+    custom = {}
+    dates = set()
+    for elem in root.iter():
+        if _local(elem.tag) == "numFmt":
+            custom[int(elem.get("numFmtId", -1))] = elem.get("formatCode", "")
+    for child in root:
+        if _local(child.tag) != "cellXfs":
+            continue
+        for index, xf in enumerate(child):
+            fmt = int(xf.get("numFmtId", 0))
+            if fmt in _DATE_FORMAT_IDS or (fmt in custom and _is_date_code(custom[fmt])):
+                dates.add(index)
+    return dates
+
+
+def _cell_value(cell: Any, strings: _SharedStrings, date_styles: set[int]) -> Any:
+    kind = cell.get("t", "n")
+    if kind == "inlineStr":
+        return "".join(t.text or "" for t in cell.iter() if _local(t.tag) == "t") or None
+    raw = None
+    for child in cell:
+        if _local(child.tag) == "v":
+            raw = child.text
+    if raw is None:
+        return None
+    if kind == "s":
+        return strings[int(raw)]
+    if kind == "b":
+        return raw == "1"
+    if kind in ("str", "e"):
+        return raw
+    number = float(raw) if any(ch in raw for ch in ".eE") else int(raw)
+    if int(cell.get("s", 0)) in date_styles:
+        # Same conversion as openpyxl: millisecond precision, and serials below 1 are times of day.
+        try:
+            value = _EXCEL_EPOCH + timedelta(milliseconds=round(number * 86_400_000))
+        except OverflowError:
+            return number
+        return value.time() if 0 <= number < 1 else value
+    return number
+
+
+def _stream_rows(archive: zipfile.ZipFile, path: str, strings: _SharedStrings, date_styles: set[int]) -> Iterator[tuple[int, tuple]]:
+    # Rows as openpyxl's read-only mode yields them: missing rows come back empty and each row stops at its
+    # last stored cell. Iteration stops reading the sheet as soon as the caller stops asking.
+    expected = 1
+    with archive.open(path) as fh:
+        for _, elem in iterparse(fh, events=("end",)):
+            if _local(elem.tag) != "row":
+                continue
+            row_num = int(elem.get("r", expected))
+            while expected < row_num:
+                yield expected, ()
+                expected += 1
+            cells: dict[int, Any] = {}
+            for position, cell in enumerate(elem, start=1):
+                ref = cell.get("r")
+                column = _column_index(ref) if ref else position
+                cells[column] = _cell_value(cell, strings, date_styles)
+            elem.clear()
+            width = max(cells, default=0)
+            yield row_num, tuple(cells.get(i) for i in range(1, width + 1))
+            expected = row_num + 1
+
+
+def _column_index(ref: str) -> int:
+    index = 0
+    for ch in _COLUMN.match(ref).group():
+        index = index * 26 + ord(ch) - 64
+    return index
+
+
+def _value_type(value: Any) -> str:
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return "blank"
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, (int, float)):
+        return "number"
+    if isinstance(value, (datetime, dt_time)):
+        return "date"
+    # Money and part-number columns often arrive as text ("$1,234.00"); the mapper parses these as costs.
+    return "numeric_text" if _NUMERIC_TEXT.match(str(value)) else "text"
+
+
+def profile_columns(headers: list[str], rows: list[SourceRow]) -> list[dict[str, Any]]:
+    columns = []
+    for header in headers:
+        types: Counter = Counter()
+        distinct: set[str] = set()
+        examples: list[str] = []
+        for row in rows:
+            value = row.values.get(header)
+            kind = _value_type(value)
+            types[kind] += 1
+            if kind == "blank":
+                continue
+            text = str(value).strip()
+            if len(distinct) < MAX_DISTINCT:
+                distinct.add(text)
+            if len(examples) < EXAMPLES and text not in examples:
+                examples.append(text)
+        non_blank = len(rows) - types["blank"]
+        columns.append(
+            {
+                "header": header,
+                "types": dict(types.most_common()),
+                "dominant_type": next((k for k, _ in types.most_common() if k != "blank"), "blank"),
+                "blank_rate": round(types["blank"] / len(rows), 3) if rows else None,
+                "distinct": len(distinct),
+                "unique": bool(non_blank) and len(distinct) == non_blank,
+                "examples": examples,
+            }
+        )
+    return columns
+
+
+def resolve_fields(rows: list[SourceRow]) -> dict[str, Any]:
+    # Which source header each logical field is read from, tallied over the sampled rows as the mapper would.
+    fields = {}
+    for name, candidates in FIELD_CANDIDATES.items():
+        hits = Counter(find_field_header(row.values, candidates) for row in rows)
+        resolved = [(header, count) for header, count in hits.most_common() if header is not None]
+        fields[name] = {
+            "header": resolved[0][0] if resolved else None,
+            "resolved_rows": sum(count for _, count in resolved),
+            "alternates": [header for header, _ in resolved[1:]],
+        }
+    return fields
+
+
+def _analyze_rows(headers: list[str], rows: list[SourceRow]) -> dict[str, Any]:
+    return {"headers": headers, "fields": resolve_fields(rows), "columns": profile_columns(headers, rows)}
+
+
+def _declared_dimension(archive: zipfile.ZipFile, path: str) -> str | None:
+    with archive.open(path) as fh:
+        match = _DIMENSION.search(fh.read(4096))
+    return match.group(1).decode() if match else None
+
+
+def _analyze_sheet(
+    archive: zipfile.ZipFile, sheet: WorkbookSheet, strings: _SharedStrings, date_styles: set[int], source_file: str, sample_rows: int
+) -> dict[str, Any]:
+    dimension = _declared_dimension(archive, sheet.path)
+    report: dict[str, Any] = {"sheet": sheet.title, "state": sheet.state, "dimension": dimension}
+    if sheet.state != "visible":
+        # ingest skips hidden sheets.
+        return {**report, "estimated_rows": 0, "sampled_rows": 0, "headers": [], "fields": {}, "columns": []}
+
+    # Pad rows the way ingest does: to the declared width, or to the widest cell reference without one.
+    scan = scan_sheet_xml(archive, sheet.path, scan_width=dimension is None)
+    width = _column_index(dimension.split(":")[-1]) if dimension else scan.width
+    numbered = fill_merged_rows(_stream_rows(archive, sheet.path, strings, date_styles), scan.merged, width)
+    head = list(islice(numbered, HEADER_SEARCH_ROWS))
+    header_row = next((row_num for row_num, row in head if is_header_row(row)), None)
+    report.update({"columns_used": width, "merged_ranges": len(scan.merged), "row_elements": scan.row_elements, "header_row": header_row})
+    if header_row is None:
+        return {**report, "estimated_rows": 0, "sampled_rows": 0, "headers": [], "fields": {}, "columns": []}
+
+    more = list(islice(numbered, sample_rows))
+    exhausted = next(numbered, None) is None
+    rows: list[SourceRow] = []
+    collect_sheet_rows(sheet.title, [*head, *more], source_file, rows)
+    if exhausted:
+        estimated = len(rows)
+    else:
+        # Scale the share of sampled rows that became data rows (not blank or family labels) to the whole sheet.
+        sampled = len(head) - header_row + len(more)
+        estimated = round(len(rows) / sampled * max(scan.row_elements - header_row, sampled))
+    rows = rows[:sample_rows]
+    # Repeated labels (merged title cells) collapse into one key in each row's values, as in ingest.
+    headers = list(dict.fromkeys(sheet_headers(dict(head)[header_row])))
+    return {**report, "estimated_rows": estimated, "sampled_rows": len(rows), **_analyze_rows(headers, rows)}
+
+
+def analyze_workbook(path: str | Path, sample_rows: int = SAMPLE_ROWS) -> dict[str, Any]:
+    started = time.perf_counter()
+    path = Path(path)
+    report: dict[str, Any] = {
+        "format": ANALYSIS_FORMAT,
+        "source_file": path.name,
+        "bytes": path.stat().st_size,
+        "sample_rows": sample_rows,
+    }
+    errors: list[str] = []
+    sheets: list[dict[str, Any]] | None = None
+    try:
+        with zipfile.ZipFile(path) as archive:
+            strings = _SharedStrings(archive)
+            date_styles = _date_styles(archive)
+            sheets = []
+            for sheet in workbook_sheets(archive):
+                try:
+                    sheets.append(_analyze_sheet(archive, sheet, strings, date_styles, path.name, sample_rows))
+                except Exception as exc:
+                    errors.append(f"sheet {sheet.title}: {type(exc).__name__}: {exc}")
+        report["mode"] = "xlsx"
+    except (zipfile.BadZipFile, KeyError, ParseError) as exc:
+        # ingest would fall back to recovering the bytes as delimited or fixed-width text; sample what that yields.
+        result = ingest_fallback(path, [f"xlsx parsing failed: {exc}"])
+        rows = result.rows[:sample_rows]
+        headers = list(rows[0].values) if rows else []
+        sheets = []
+        if rows:
+            sheets.append(
+                {
+                    "sheet": "Recovered Sheet 1",
+                    "state": "visible",
+                    "parser_stage": result.parser_stage,
+                    "estimated_rows": len(result.rows),
+                    "sampled_rows": len(rows),
+                    **_analyze_rows(headers, rows),
+                }
+            )
+        errors = result.errors
+        report["mode"] = result.mode
+    report["sheets"] = sheets
+    report["estimated_rows"] = sum(s["estimated_rows"] for s in sheets if s["state"] == "visible")
+    report["errors"] = errors
+    report["elapsed_s"] = round(time.perf_counter() - started, 3)
+    return report
@@ -0,0 +1,243 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import posixpath
+import re
+import tempfile
+import zipfile
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+from xml.etree.ElementTree import ParseError, iterparse
+
+from openpyxl.utils.cell import get_column_letter, range_boundaries
+
+from .ooxml import part_rels, workbook_sheets
+
+CHUNK_BYTES = 1 << 20
+_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_ANCHORS = {"twoCellAnchor", "oneCellAnchor", "absoluteAnchor"}
+_HYPERLINK = re.compile(rb"<(?:\w+:)?hyperlink\s([^>]*?)/?>")
+_ATTRIBUTE = re.compile(rb'([\w:]+)="([^"]*)"')
+_DOCUMENT_TYPES = {"pdf": "pdf", "doc": "doc", "docx": "docx", "xls": "xls", "xlsx": "xlsx"}
+
+
+@dataclass
+class AssetRef:
+    asset_type: str
+    asset_name_or_ref: str
+    source_offset_or_context: str
+    sheet: str | None = None
+    associated_row: int | None = None
+    anchor: str | None = None
+    sha256: str | None = None
+    path: str | None = None
+    bytes: int | None = None
+
+
+@dataclass
+class AssetExtraction:
+    refs: list[AssetRef] = field(default_factory=list)
+    files_written: int = 0
+    bytes_written: int = 0
+    duplicates: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "refs": len(self.refs),
+            "files_written": self.files_written,
+            "bytes_written": self.bytes_written,
+            "duplicates": self.duplicates,
+        }
+
+    def as_dicts(self) -> list[dict[str, Any]]:
+        return [asdict(ref) for ref in self.refs]
+
+
+def _asset_type(name: str) -> str:
+    ext = posixpath.splitext(name.split("?", 1)[0])[1].lower().lstrip(".")
+    return "jpg" if ext == "jpeg" else ext or "bin"
+
+
+def _link_type(url: str) -> str:
+    # Links to documents are spec sheets or manuals; anything else is a plain web link.
+    return _DOCUMENT_TYPES.get(_asset_type(url), "link")
+
+
+class _Store:
+    # Content-addressed: each distinct payload is written once as <sha256><ext>, however many books,
+    # sheets or anchors reference it. Payloads are copied in CHUNK_BYTES pieces and never held whole.
+    def __init__(self, archive: zipfile.ZipFile, output_dir: Path, result: AssetExtraction) -> None:
+        self.archive = archive
+        self.output_dir = output_dir
+        self.result = result
+        self.parts: dict[str, tuple[str, str, int]] = {}
+
+    def put(self, member: str) -> tuple[str, str, int]:
+        if member in self.parts:
+            return self.parts[member]
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_name = tempfile.mkstemp(dir=self.output_dir, suffix=".part")
+        try:
+            with os.fdopen(fd, "wb") as tmp, self.archive.open(member) as src:
+                while chunk := src.read(CHUNK_BYTES):
+                    digest.update(chunk)
+                    tmp.write(chunk)
+                    size += len(chunk)
+            sha = digest.hexdigest()
+            final = self.output_dir / f"{sha}{posixpath.splitext(member)[1].lower()}"
+            if final.exists():
+                os.unlink(tmp_name)
+                self.result.duplicates += 1
+            else:
+                os.replace(tmp_name, final)
+                self.result.files_written += 1
+                self.result.bytes_written += size
+        except BaseException:
+            if os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+            raise
+        self.parts[member] = (sha, str(final), size)
+        return self.parts[member]
+
+    def ref(self, member: str, context: str, sheet: str | None, row: int | None, anchor: str | None) -> AssetRef:
+        sha, path, size = self.put(member)
+        return AssetRef(_asset_type(member), member, context, sheet, row, anchor, sha, path, size)
+
+
+def _cell(col: int, row: int) -> str:
+    return f"{get_column_letter(col + 1)}{row + 1}"
+
+
+def _drawing_refs(store: _Store, drawing: str, sheet: str) -> list[AssetRef]:
+    rels = part_rels(store.archive, drawing)
+    refs: list[AssetRef] = []
+    depth = 0
+    corners: dict[str, dict[str, int]] = {}
+    corner: str | None = None
+    embeds: list[tuple[str, str]] = []
+    with store.archive.open(drawing) as fh:
+        for event, elem in iterparse(fh, events=("start", "end")):
+            tag = elem.tag.rsplit("}", 1)[-1]
+            if event == "start":
+                if tag in _ANCHORS:
+                    depth += 1
+                    corners, embeds = {}, []
+                elif depth and tag in ("from", "to"):
+                    corner = tag
+                    corners[tag] = {}
+                continue
+            if not depth:
+                continue
+            if corner is not None and tag in ("col", "row") and elem.text:
+                corners[corner][tag] = int(elem.text)
+            elif tag in ("from", "to"):
+                corner = None
+            elif tag == "blip":
+                for attr in ("embed", "link"):
+                    if elem.get(_R + attr):
+                        embeds.append((attr, elem.get(_R + attr, "")))
+            elif tag == "hlinkClick" and elem.get(_R + "id"):
+                embeds.append(("hyperlink", elem.get(_R + "id", "")))
+            elif tag in _ANCHORS:
+                depth -= 1
+                start, end = corners.get("from"), corners.get("to") or corners.get("from")
+                row = start["row"] + 1 if start and "row" in start else None
+                anchor = None
+                if start and end and len(start) == len(end) == 2:
+                    anchor = _cell(start["col"], start["row"])
+                    if end != start:
+                        anchor += ":" + _cell(end["col"], end["row"])
+                context = f"drawing:{drawing}"
+                for kind, rel_id in embeds:
+                    rel = rels.get(rel_id)
+                    if rel is None:
+                        continue
+                    if rel.external:
+                        asset_type = _link_type(rel.target) if kind == "hyperlink" else _asset_type(rel.target)
+                        refs.append(AssetRef(asset_type, rel.target, context, sheet, row, anchor))
+                    elif rel.target in store.archive.NameToInfo:
+                        refs.append(store.ref(rel.target, context, sheet, row, anchor))
+                elem.clear()
+    return refs
+
+
+def _hyperlink_refs(archive: zipfile.ZipFile, sheet_path: str, sheet: str, rels: dict[str, Any]) -> list[AssetRef]:
+    # Hyperlinks sit at the end of the sheet XML; scan it in chunks instead of parsing every cell.
+    refs: list[AssetRef] = []
+    tail = b""
+    with archive.open(sheet_path) as fh:
+        while chunk := fh.read(CHUNK_BYTES):
+            data = tail + chunk
+            last_end = 0
+            for match in _HYPERLINK.finditer(data):
+                last_end = match.end()
+                attrs = {k.split(b":")[-1].decode(): v.decode() for k, v in _ATTRIBUTE.findall(match.group(1))}
+                rel = rels.get(attrs.get("id", ""))
+                target = rel.target if rel is not None else ""
+                if not target and attrs.get("location"):
+                    target = f"#{attrs['location']}"
+                if not target or not attrs.get("ref"):
+                    continue
+                _, min_row, _, _ = range_boundaries(attrs["ref"])
+                refs.append(AssetRef(_link_type(target), target, f"hyperlink:{sheet_path}", sheet, min_row, attrs["ref"]))
+            tail = data[max(last_end, len(data) - 4096) :]
+    return refs
+
+
+def extract_assets(path: str | Path, output_dir: str | Path) -> AssetExtraction:
+    # Reads only the zip directory, relationship parts, drawings and the media they point at; the workbook
+    # itself is never loaded. Media not placed on any sheet is still stored, with no sheet or row.
+    out = Path(output_dir)
+    out.mkdir(parents=True, exist_ok=True)
+    result = AssetExtraction()
+    try:
+        archive = zipfile.ZipFile(path)
+    except zipfile.BadZipFile:
+        # Not an OOXML package (HTML/CSV exports): there is nothing to extract.
+        return result
+    with archive:
+        store = _Store(archive, out, result)
+        try:
+            sheets = workbook_sheets(archive)
+        except (KeyError, ParseError) as exc:
+            result.errors.append(f"workbook structure unreadable: {exc}")
+            sheets = []
+        for sheet in sheets:
+            if sheet.path not in archive.NameToInfo:
+                continue
+            try:
+                rels = part_rels(archive, sheet.path)
+                for rel in rels.values():
+                    if rel.type == "drawing" and rel.target in archive.NameToInfo:
+                        result.refs.extend(_drawing_refs(store, rel.target, sheet.title))
+                    elif rel.type in ("oleObject", "package") and not rel.external and rel.target in archive.NameToInfo:
+                        result.refs.append(store.ref(rel.target, f"embedding:{sheet.path}", sheet.title, None, None))
+                result.refs.extend(_hyperlink_refs(archive, sheet.path, sheet.title, rels))
+            except (KeyError, ParseError, ValueError) as exc:
+                result.errors.append(f"assets on {sheet.title} unreadable: {exc}")
+        for info in archive.infolist():
+            name = info.filename
+            if name.startswith(("xl/media/", "xl/embeddings/")) and not name.endswith("/") and name not in store.parts:
+                result.refs.append(store.ref(name, "unanchored", None, None, None))
+    return result
+
+
+def row_asset_index(refs: list[AssetRef]) -> dict[tuple[str, int], list[str]]:
+    # (sheet, row) -> stored asset paths and link targets. A picture covers every row its anchor spans.
+    index: dict[tuple[str, int], list[str]] = {}
+    for ref in refs:
+        if ref.sheet is None or ref.associated_row is None:
+            continue
+        last_row = ref.associated_row
+        if ref.anchor and ":" in ref.anchor:
+            last_row = range_boundaries(ref.anchor)[3]
+        for row in range(ref.associated_row, last_row + 1):
+            entries = index.setdefault((ref.sheet, row), [])
+            value = ref.path or ref.asset_name_or_ref
+            if value not in entries:
+                entries.append(value)
+    return index
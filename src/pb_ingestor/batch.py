@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+from collections import deque
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any
+
+from .crosswalk import ManifestRow
+from .perf import aggregate_performance
+from .pipeline import ConversionError, run_conversion
+
+SUPPORTED_OUTPUT_TYPES = {"single_part", "bundle", "supplier_loader"}
+AGGREGATE_KEYS = ["rows_total", "rows_processed", "rows_incomplete", "rows_manual_review", "rows_duplicates_ignored"]
+POLL_INTERVAL_S = 0.5
+
+
+@dataclass
+class ConversionJob:
+    key: str
+    kwargs: dict[str, Any]
+
+    @property
+    def source(self) -> str:
+        return self.kwargs["source"]
+
+
+@dataclass
+class JobOutcome:
+    job: ConversionJob
+    result: dict[str, Any] | None = None
+    failure: dict[str, Any] | None = None
+    wall_s: float = 0.0
+    started_s: float = 0.0
+
+
+@dataclass
+class _Running:
+    index: int
+    process: Any
+    conn: Any
+    started: float
+
+
+def customer_key(customer_name: str) -> str:
+    return customer_name.lower().replace(" ", "_")
+
+
+def jobs_from_manifest(
+    manifest: list[ManifestRow],
+    out_dir: str,
+    markup_profile_path: str,
+    labor_cost_default: float | None = None,
+    labor_rate_default: float | None = None,
+    skip_unchanged: bool = False,
+    trace_memory: bool = False,
+    validate_qa: bool = False,
+    memory_budget_mb: float | None = None,
+    spill_dir: str | None = None,
+    pipelined: bool = False,
+    assets_dir: str | None = None,
+    shard_rows: int | None = None,
+    shard_mb: float | None = None,
+    shard_by: str | None = None,
+) -> tuple[list[ConversionJob], list[ManifestRow]]:
+    jobs: list[ConversionJob] = []
+    skipped: list[ManifestRow] = []
+    for row in manifest:
+        if row.output_type not in SUPPORTED_OUTPUT_TYPES:
+            skipped.append(row)
+            continue
+        key = customer_key(row.customer_name)
+        jobs.append(
+            ConversionJob(
+                key=key,
+                kwargs={
+                    "source": row.source_file,
+                    "template_type": row.output_type,
+                    "markup_profile_path": markup_profile_path,
+                    "output_csv": f"{out_dir}/converted/{key}.csv",
+                    "output_workbook": f"{out_dir}/converted/{key}.xlsx",
+                    "qa_json": f"{out_dir}/qa/{key}.json",
+                    "manual_review_csv": f"{out_dir}/qa/{key}_manual_review.csv",
+                    "template_path": row.base_template or None,
+                    "labor_cost_default": labor_cost_default,
+                    "labor_rate_default": labor_rate_default,
+                    "skip_unchanged": skip_unchanged,
+                    "trace_memory": trace_memory,
+                    "validate_qa": validate_qa,
+                    "memory_budget_mb": memory_budget_mb,
+                    "spill_dir": spill_dir,
+                    "pipelined": pipelined,
+                    "assets_dir": assets_dir,
+                    "shard_rows": shard_rows,
+                    "shard_mb": shard_mb,
+                    "shard_by": shard_by,
+                },
+            )
+        )
+    return jobs, skipped
+
+
+def failure_record(source: str, stage: str, message: str, rows_recovered: int = 0) -> dict[str, Any]:
+    return {
+        "file_name": Path(source).name,
+        "error_stage": stage,
+        "error_message": message,
+        "rows_recovered": rows_recovered,
+    }
+
+
+def _limit_memory(memory_limit_mb: int | None) -> None:
+    if not memory_limit_mb:
+        return
+    try:
+        import resource
+    except ImportError:  # not available on Windows
+        return
+    limit = memory_limit_mb * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _run_job_in_child(job: ConversionJob, conn: Any, memory_limit_mb: int | None) -> None:
+    try:
+        _limit_memory(memory_limit_mb)
+        conn.send(("ok", run_conversion(**job.kwargs)))
+    except MemoryError:
+        conn.send(("error", "memory_limit", f"exceeded memory limit of {memory_limit_mb} MB"))
+    except ConversionError as exc:
+        if isinstance(exc.__cause__, MemoryError):
+            conn.send(("error", "memory_limit", f"{exc.stage}: exceeded memory limit of {memory_limit_mb} MB"))
+        else:
+            conn.send(("error", exc.stage, exc.message))
+    except Exception as exc:
+        conn.send(("error", "worker", f"{type(exc).__name__}: {exc}"))
+    finally:
+        conn.close()
+
+
+def start_job_process(ctx: Any, job: ConversionJob, memory_limit_mb: int | None) -> tuple[Any, Any]:
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(target=_run_job_in_child, args=(job, child_conn, memory_limit_mb), daemon=True)
+    proc.start()
+    child_conn.close()
+    return proc, parent_conn
+
+
+def poll_job_process(
+    process: Any, conn: Any, source: str, started: float, timeout_s: float | None
+) -> tuple[dict[str, Any] | None, dict[str, Any] | None] | None:
+    # (result, failure) once the child has finished, crashed or timed out; None while it is still running.
+    if conn.poll():
+        try:
+            message = conn.recv()
+        except EOFError:
+            message = None
+        if message is not None:
+            if message[0] == "ok":
+                return message[1], None
+            return None, failure_record(source, message[1], message[2])
+    if not process.is_alive():
+        process.join()
+        code = process.exitcode
+        return None, failure_record(source, "worker_crash", f"worker exited with code {code} without a result")
+    if timeout_s is not None and time.monotonic() - started > timeout_s:
+        process.kill()
+        return None, failure_record(source, "timeout", f"conversion exceeded {timeout_s:g}s")
+    return None
+
+
+def _next_job(pending: deque, running: dict[int, _Running], memory_mb: list[float] | None, budget_mb: float | None) -> int | None:
+    if budget_mb is None or memory_mb is None:
+        return pending.popleft()
+    # Take the first job in schedule order that fits beside the running ones; a job larger than the
+    # whole budget still runs, alone.
+    in_use = sum(memory_mb[idx] for idx in running)
+    for idx in pending:
+        if not running or in_use + memory_mb[idx] <= budget_mb:
+            pending.remove(idx)
+            return idx
+    return None
+
+
+def run_batch(
+    jobs: list[ConversionJob],
+    workers: int = 1,
+    timeout_s: float | None = None,
+    memory_limit_mb: int | None = None,
+    order: list[int] | None = None,
+    memory_mb: list[float] | None = None,
+    memory_budget_mb: float | None = None,
+) -> list[JobOutcome]:
+    ctx = multiprocessing.get_context()
+    outcomes: list[JobOutcome | None] = [None] * len(jobs)
+    pending = deque(order if order is not None else range(len(jobs)))
+    running: dict[int, _Running] = {}
+    batch_started = time.monotonic()
+
+    def finish(r: _Running, result: dict | None, failure: dict | None) -> None:
+        outcomes[r.index] = JobOutcome(
+            jobs[r.index], result, failure, round(time.monotonic() - r.started, 3), round(r.started - batch_started, 3)
+        )
+        r.conn.close()
+        r.process.join()
+        del running[r.index]
+
+    while pending or running:
+        while pending and len(running) < max(1, workers):
+            idx = _next_job(pending, running, memory_mb, memory_budget_mb)
+            if idx is None:
+                break
+            proc, conn = start_job_process(ctx, jobs[idx], memory_limit_mb)
+            running[idx] = _Running(idx, proc, conn, time.monotonic())
+
+        wait([r.conn for r in running.values()] + [r.process.sentinel for r in running.values()], timeout=POLL_INTERVAL_S)
+
+        for r in list(running.values()):
+            done = poll_job_process(r.process, r.conn, jobs[r.index].source, r.started, timeout_s)
+            if done is not None:
+                finish(r, *done)
+
+    return [o for o in outcomes if o is not None]
+
+
+def consolidate(
+    manifest_path: str, outcomes: list[JobOutcome], skipped: list[ManifestRow], schedule: dict[str, Any] | None = None
+) -> dict[str, Any]:
+    aggregate = {k: 0 for k in AGGREGATE_KEYS}
+    runs: list[dict[str, Any]] = []
+    failures: list[dict[str, Any]] = []
+    unchanged = 0
+    performance: list[dict[str, Any]] = []
+    for outcome in outcomes:
+        if outcome.failure is not None:
+            failures.append(outcome.failure)
+            continue
+        if outcome.result.get("skipped_unchanged"):
+            unchanged += 1
+        elif outcome.result.get("performance"):
+            performance.append(outcome.result["performance"])
+        runs.append({"source": outcome.job.source, **outcome.result, "wall_s": outcome.wall_s})
+        for k in aggregate:
+            aggregate[k] += outcome.result["summary"].get(k, 0)
+
+    return {
+        "manifest": manifest_path,
+        "runs": runs,
+        "failures": failures,
+        "skipped": [{"customer_name": row.customer_name, "reason": "output_type_not_set"} for row in skipped],
+        "aggregate": {
+            **aggregate,
+            "files_converted": len(runs) - unchanged,
+            "files_skipped_unchanged": unchanged,
+            "files_failed": len(failures),
+        },
+        "performance": aggregate_performance(performance),
+        **({"schedule": schedule} if schedule is not None else {}),
+        "summary_text": f"{aggregate['rows_processed']} processed / {aggregate['rows_incomplete']} incomplete",
+    }
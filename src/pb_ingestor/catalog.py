@@ -0,0 +1,289 @@
+from __future__ import annotations
+
+import bisect
+import csv
+import json
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+CATALOG_FORMAT = "pb-ingestor-catalog/2"
+
+PART_NUMBER_FIELDS = ["manufacturer part number", "mfr part number", "part number", "partnumber", "mpn", "model number", "model", "sku", "item"]
+NAME_FIELDS = ["product name", "name", "title"]
+DESCRIPTION_FIELDS = ["description", "long description", "short description", "desc"]
+WARRANTY_FIELDS = ["warranty"]
+URL_FIELDS = ["product url", "url", "link"]
+MANUFACTURER_FIELDS = ["manufacturer", "brand", "mfr"]
+
+FAMILY_MIN_LENGTH = 4
+DESCRIPTION_MATCH_RATIO = 0.8
+_TOKEN_RE = re.compile(r"[a-z0-9]{2,}")
+
+
+@dataclass(frozen=True)
+class CatalogRecord:
+    part_number: str
+    manufacturer: str
+    name: str | None = None
+    description: str | None = None
+    warranty: str | None = None
+    url: str | None = None
+    source: str = ""
+
+
+@dataclass
+class CatalogHit:
+    record: CatalogRecord
+    confidence: str
+    ambiguous: bool = False
+
+
+def normalize_catalog_part(value: str) -> str:
+    return re.sub(r"[^A-Z0-9]", "", value.upper())
+
+
+def _tokens(text: str | None) -> set[str]:
+    return set(_TOKEN_RE.findall(text.lower())) if text else set()
+
+
+def _pick(values: dict[str, Any], candidates: list[str]) -> str | None:
+    for c in candidates:
+        value = values.get(c)
+        if value not in (None, "") and str(value).strip():
+            return str(value).strip()
+    return None
+
+
+def _record_from_mapping(raw: dict[str, Any], source: str, manufacturer: str | None) -> CatalogRecord | None:
+    values = {str(k).strip().lower().replace("_", " "): v for k, v in raw.items() if not isinstance(v, (dict, list))}
+    part_number = _pick(values, PART_NUMBER_FIELDS)
+    if not part_number:
+        return None
+    return CatalogRecord(
+        part_number=part_number,
+        manufacturer=(_pick(values, MANUFACTURER_FIELDS) or manufacturer or "").strip(),
+        name=_pick(values, NAME_FIELDS),
+        description=_pick(values, DESCRIPTION_FIELDS),
+        warranty=_pick(values, WARRANTY_FIELDS),
+        url=_pick(values, URL_FIELDS),
+        source=source,
+    )
+
+
+def _iter_csv(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open(newline="", encoding="utf-8-sig") as f:
+        yield from csv.DictReader(f)
+
+
+def _iter_json(path: Path) -> Iterator[dict[str, Any]]:
+    if path.suffix.lower() in {".jsonl", ".ndjson"}:
+        with path.open() as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    data = json.loads(path.read_text())
+    if isinstance(data, dict):
+        data = next((v for v in data.values() if isinstance(v, list)), [data])
+    for item in data:
+        if isinstance(item, dict):
+            yield item
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _record_tag(path: Path) -> str | None:
+    # The record element is the first one with leaf children that sits in a parent without leaves of its own
+    # (a catalog's <product>), not a block nested inside a record (<specs>, <accessory>). Confirmed by a
+    # second such sibling or by the parent closing, so this pass stops after the first couple of records.
+    stack: list[list[Any]] = []  # [tag, has_leaf_child, candidate_child_tag]
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if event == "start":
+            stack.append([elem.tag, False, None])
+            continue
+        tag, has_leaf, candidate = stack.pop()
+        leaf = len(elem) == 0
+        if not leaf and not has_leaf and candidate is not None:
+            return candidate
+        if stack:
+            parent = stack[-1]
+            if leaf:
+                parent[1], parent[2] = True, None
+            elif has_leaf and not parent[1]:
+                if parent[2] == tag:
+                    return tag
+                parent[2] = parent[2] or tag
+        elif has_leaf:
+            return tag
+        elem.clear()
+    return None
+
+
+def _iter_xml(path: Path) -> Iterator[dict[str, Any]]:
+    # Fields are the record element's direct leaf children and attributes; nested blocks are not flattened in.
+    record_tag = _record_tag(path)
+    if record_tag is None:
+        return
+    depth = 0
+    for event, elem in ET.iterparse(path, events=("start", "end")):
+        if elem.tag != record_tag:
+            continue
+        if event == "start":
+            depth += 1
+            continue
+        depth -= 1
+        if depth:
+            continue
+        record = {_local_name(child.tag): (child.text or "").strip() for child in elem if len(child) == 0}
+        record.update({k: v for k, v in elem.attrib.items() if k not in record})
+        yield record
+        elem.clear()
+
+
+def iter_catalog_file(path: str | Path, manufacturer: str | None = None) -> Iterator[CatalogRecord]:
+    p = Path(path)
+    suffix = p.suffix.lower()
+    if suffix in {".json", ".jsonl", ".ndjson"}:
+        raw_rows: Iterable[dict[str, Any]] = _iter_json(p)
+    elif suffix == ".xml":
+        raw_rows = _iter_xml(p)
+    elif suffix in {".csv", ".txt"}:
+        raw_rows = _iter_csv(p)
+    else:
+        raise ValueError(f"Unsupported catalog file type: {p.name}")
+    for raw in raw_rows:
+        record = _record_from_mapping(raw, p.name, manufacturer)
+        if record is not None:
+            yield record
+
+
+class CatalogIndex:
+    def __init__(self, records: Iterable[CatalogRecord] = ()) -> None:
+        self.records: list[CatalogRecord] = []
+        self.by_exact: dict[str, list[int]] = {}
+        self.by_normalized: dict[str, list[int]] = {}
+        self.tokens: dict[str, list[int]] = {}
+        self._sorted_keys: list[str] | None = None
+        for record in records:
+            self.add(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def add(self, record: CatalogRecord) -> None:
+        idx = len(self.records)
+        self.records.append(record)
+        self.by_exact.setdefault(record.part_number.strip().upper(), []).append(idx)
+        normalized = normalize_catalog_part(record.part_number)
+        if normalized:
+            self.by_normalized.setdefault(normalized, []).append(idx)
+        for token in _tokens(record.name) | _tokens(record.description):
+            self.tokens.setdefault(token, []).append(idx)
+        self._sorted_keys = None
+
+    def add_file(self, path: str | Path, manufacturer: str | None = None) -> int:
+        before = len(self.records)
+        for record in iter_catalog_file(path, manufacturer):
+            self.add(record)
+        return len(self.records) - before
+
+    @classmethod
+    def load(cls, path: str | Path) -> "CatalogIndex":
+        # The lookup maps are stored with the records, so loading does not re-tokenize the catalog.
+        data = json.loads(Path(path).read_text())
+        if data.get("format") != CATALOG_FORMAT:
+            raise ValueError(f"Unsupported catalog index format in {path}: {data.get('format')}")
+        index = cls()
+        index.records = [CatalogRecord(**r) for r in data["records"]]
+        index.by_exact = data["by_exact"]
+        index.by_normalized = data["by_normalized"]
+        index.tokens = data["tokens"]
+        return index
+
+    def save(self, path: str | Path) -> None:
+        out = Path(path)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            "format": CATALOG_FORMAT,
+            "records": [asdict(r) for r in self.records],
+            "by_exact": self.by_exact,
+            "by_normalized": self.by_normalized,
+            "tokens": self.tokens,
+        }
+        out.write_text(json.dumps(data))
+
+    def _for_manufacturer(self, ids: Iterable[int], manufacturer: str | None) -> list[int]:
+        m_key = (manufacturer or "").strip().lower()
+        if not m_key:
+            return list(ids)
+        return [i for i in ids if not self.records[i].manufacturer or self.records[i].manufacturer.lower() == m_key]
+
+    def _family(self, normalized: str) -> list[int]:
+        if len(normalized) < FAMILY_MIN_LENGTH:
+            return []
+        if self._sorted_keys is None:
+            self._sorted_keys = sorted(self.by_normalized)
+        keys = self._sorted_keys
+        found: list[int] = []
+        # Catalog parts that extend the query (size variants of the same family).
+        pos = bisect.bisect_left(keys, normalized)
+        while pos < len(keys) and keys[pos].startswith(normalized):
+            found.extend(self.by_normalized[keys[pos]])
+            pos += 1
+        # Catalog parts that the query extends.
+        for end in range(len(normalized) - 1, FAMILY_MIN_LENGTH - 1, -1):
+            found.extend(self.by_normalized.get(normalized[:end], []))
+        return found
+
+    def search(self, text: str, limit: int = 5) -> list[tuple[int, float]]:
+        query = _tokens(text)
+        if not query:
+            return []
+        scores: dict[int, int] = {}
+        for token in query:
+            for idx in self.tokens.get(token, ()):
+                scores[idx] = scores.get(idx, 0) + 1
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [(idx, hits / len(query)) for idx, hits in ranked]
+
+    def lookup(self, part_number: str, manufacturer: str | None = None, description: str | None = None) -> CatalogHit | None:
+        if not part_number:
+            return None
+        exact = self._for_manufacturer(self.by_exact.get(part_number.strip().upper(), ()), manufacturer)
+        if exact:
+            return CatalogHit(self.records[exact[0]], "high")
+        normalized = normalize_catalog_part(part_number)
+        same = self._for_manufacturer(self.by_normalized.get(normalized, ()), manufacturer)
+        if same:
+            return CatalogHit(self.records[same[0]], "high")
+
+        family = list(dict.fromkeys(self._for_manufacturer(self._family(normalized), manufacturer)))
+        if not family:
+            return None
+        if len(family) == 1:
+            return CatalogHit(self.records[family[0]], "medium")
+        query = _tokens(description)
+        if query:
+            # Scored over the family only; ranking the whole catalog could crowd the family out.
+            scores = []
+            for idx in family:
+                record = self.records[idx]
+                scores.append((idx, len(query & (_tokens(record.name) | _tokens(record.description))) / len(query)))
+            best = sorted(scores, key=lambda item: -item[1])
+            if best[0][1] >= DESCRIPTION_MATCH_RATIO and best[1][1] < best[0][1]:
+                return CatalogHit(self.records[best[0][0]], "medium")
+        return CatalogHit(self.records[family[0]], "medium", ambiguous=True)
+
+
+def build_catalog(paths: Iterable[str | Path], output: str | Path, manufacturer: str | None = None) -> dict[str, int]:
+    index = CatalogIndex()
+    counts = {}
+    for path in paths:
+        counts[Path(path).name] = index.add_file(path, manufacturer)
+    index.save(output)
+    return counts
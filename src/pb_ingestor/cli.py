@@ -4,20 +4,26 @@ import argparse
 import json
 from pathlib import Path
 
-from jsonschema import Draft202012Validator
-
-from .crosswalk import load_manifest
-from .ingest import ingest_xlsx
-from .pipeline import run_conversion, run_enrichment
-from .crosswalk import infer_base_template_path, infer_crosswalk_path, load_crosswalk, load_manifest
-from .enrichment import enrich_csv
-from .ingest import ingest_xlsx
-from .mapper import map_rows
-from .markup import MarkupProfile
-from .output import write_manual_review_csv, write_normalized_csv, write_qa_json, write_template_workbook
+# Subcommands import their dependencies when they run: scripts call the CLI thousands of times a day and
+# openpyxl, requests, bs4 and jsonschema together cost far more than a trivial command's own work.
 
 
 def _cmd_analyze(args: argparse.Namespace) -> int:
+    if args.sample:
+        from .analyze import analyze_workbook
+
+        report = json.dumps(analyze_workbook(args.source, sample_rows=args.sample_rows), indent=2, default=str)
+        if args.output:
+            output = Path(args.output)
+            output.parent.mkdir(parents=True, exist_ok=True)
+            output.write_text(report)
+            print(f"wrote_analysis={args.output}")
+        else:
+            print(report)
+        return 0
+
+    from .ingest import ingest_xlsx
+
     result = ingest_xlsx(args.source)
     print(f"ingest_mode={result.mode}")
     print(f"parser_stage={result.parser_stage}")
@@ -30,10 +36,6 @@ def _cmd_analyze(args: argparse.Namespace) -> int:
     return 0
 
 
-def _resolve_template(template_type: str, template_path_arg: str | None) -> Path:
-    return Path(template_path_arg) if template_path_arg else infer_base_template_path(template_type)
-
-
 def _run_single_conversion(
     source: str,
     template_type: str,
@@ -46,7 +48,21 @@ def _run_single_conversion(
     template_path_arg: str | None = None,
     labor_cost_default: float | None = None,
     labor_rate_default: float | None = None,
+    skip_unchanged: bool = False,
+    trace_memory: bool = False,
+    profile: bool = False,
+    validate_qa: bool = False,
+    memory_budget_mb: float | None = None,
+    spill_dir: str | None = None,
+    pipelined: bool = False,
+    assets_dir: str | None = None,
+    shard_rows: int | None = None,
+    shard_mb: float | None = None,
+    shard_by: str | None = None,
+    shard_workers: int | None = None,
 ) -> dict:
+    from .pipeline import run_conversion
+
     return run_conversion(
         source=source,
         template_type=template_type,
@@ -57,41 +73,27 @@ def _run_single_conversion(
         manual_review_csv=manual_review_csv,
         crosswalk_path=crosswalk_arg,
         template_path=template_path_arg,
-    crosswalk_path = Path(crosswalk_arg) if crosswalk_arg else infer_crosswalk_path(template_type)
-    crosswalk = load_crosswalk(crosswalk_path)
-    markup = MarkupProfile.from_file(markup_profile_path)
-
-    ingest_result = ingest_xlsx(source)
-    mapped, counters = map_rows(
-        ingest_result.rows,
-        crosswalk,
-        markup,
         labor_cost_default=labor_cost_default,
         labor_rate_default=labor_rate_default,
+        skip_unchanged=skip_unchanged,
+        trace_memory=trace_memory,
+        profile=profile,
+        validate_qa=validate_qa,
+        memory_budget_mb=memory_budget_mb,
+        spill_dir=spill_dir,
+        pipelined=pipelined,
+        assets_dir=assets_dir,
+        shard_rows=shard_rows,
+        shard_mb=shard_mb,
+        shard_by=shard_by,
+        shard_workers=shard_workers,
     )
 
-    write_normalized_csv(mapped, output_csv)
-    write_template_workbook(mapped, _resolve_template(template_type, template_path_arg), output_workbook, crosswalk)
-    write_manual_review_csv(mapped, manual_review_csv)
-    write_qa_json(
-        qa_json,
-        counters,
-        ingest_result.mode,
-        ingest_result.errors,
-        source_file=Path(source).name,
-        asset_refs=ingest_result.asset_refs,
-    )
-
-    return {
-        "source": source,
-        "summary": counters,
-        "ingest_mode": ingest_result.mode,
-        "errors": ingest_result.errors,
-        "qa_json": qa_json,
-    }
-
 
 def _cmd_convert(args: argparse.Namespace) -> int:
+    from .metrics import MetricsRegistry, record_conversion
+    from .perf import profile_dir_for
+
     result = _run_single_conversion(
         source=args.source,
         template_type=args.template_type,
@@ -104,97 +106,335 @@ def _cmd_convert(args: argparse.Namespace) -> int:
         template_path_arg=args.template_path,
         labor_cost_default=args.labor_cost_default,
         labor_rate_default=args.labor_rate_default,
+        skip_unchanged=not args.force,
+        trace_memory=args.trace_memory,
+        profile=args.profile,
+        validate_qa=args.validate_qa,
+        memory_budget_mb=args.memory_budget,
+        spill_dir=args.spill_dir,
+        pipelined=args.pipelined,
+        assets_dir=args.assets_dir,
+        shard_rows=args.shard_rows,
+        shard_mb=args.shard_mb,
+        shard_by=args.shard_by,
+        shard_workers=args.shard_workers,
     )
 
     counters = result["summary"]
+    if result["skipped_unchanged"]:
+        print(f"skipped_unchanged=1 fingerprint={result['fingerprint']}")
     print(f"wrote_output_csv={args.output_csv}")
-    print(f"wrote_output_workbook={args.output_workbook}")
+    if result.get("workbook_shards"):
+        print(f"wrote_workbook_shards={result['workbook_shards']}")
+    else:
+        print(f"wrote_output_workbook={args.output_workbook}")
     print(f"wrote_manual_review={args.manual_review_csv}")
     print(f"wrote_qa={args.qa_json}")
+    if args.profile:
+        print(f"wrote_profile={profile_dir_for(args.qa_json)}")
+    if args.metrics_textfile:
+        registry = MetricsRegistry()
+        record_conversion(registry, result)
+        registry.write_textfile(args.metrics_textfile)
+        print(f"wrote_metrics={args.metrics_textfile}")
     print(f"summary={counters['rows_processed']} processed / {counters['rows_incomplete']} incomplete")
     return 0
 
 
 def _cmd_convert_all(args: argparse.Namespace) -> int:
+    from .batch import consolidate, jobs_from_manifest, run_batch
+    from .crosswalk import load_manifest
+    from .metrics import MetricsRegistry, record_conversion, record_failure
+    from .scheduler import estimate_costs, largest_first, schedule_report
+
     manifest = load_manifest(args.manifest)
-    run_results = []
-    aggregate = {
-        "rows_total": 0,
-        "rows_processed": 0,
-        "rows_incomplete": 0,
-        "rows_manual_review": 0,
-        "rows_duplicates_ignored": 0,
-    }
-
-    for row in manifest:
-        if row.output_type not in {"single_part", "bundle", "supplier_loader"}:
-            print(f"skipping={row.customer_name} reason=output_type_not_set")
-            continue
-        source = row.source_file
-        customer_key = row.customer_name.lower().replace(" ", "_")
-        result = _run_single_conversion(
-            source=source,
-            template_type=row.output_type,
-            markup_profile_path=args.markup_profile,
-            output_csv=f"{args.out_dir}/converted/{customer_key}.csv",
-            output_workbook=f"{args.out_dir}/converted/{customer_key}.xlsx",
-            qa_json=f"{args.out_dir}/qa/{customer_key}.json",
-            manual_review_csv=f"{args.out_dir}/qa/{customer_key}_manual_review.csv",
-            template_path_arg=row.base_template or None,
-            labor_cost_default=args.labor_cost_default,
-            labor_rate_default=args.labor_rate_default,
-        )
-        run_results.append(result)
-        for k in aggregate:
-            aggregate[k] += result["summary"].get(k, 0)
-
-    consolidated = {
-        "manifest": args.manifest,
-        "runs": run_results,
-        "aggregate": aggregate,
-        "summary_text": f"{aggregate['rows_processed']} processed / {aggregate['rows_incomplete']} incomplete",
-    }
+    jobs, skipped = jobs_from_manifest(
+        manifest,
+        args.out_dir,
+        args.markup_profile,
+        labor_cost_default=args.labor_cost_default,
+        labor_rate_default=args.labor_rate_default,
+        skip_unchanged=not args.force,
+        trace_memory=args.trace_memory,
+        validate_qa=args.validate_qa,
+        memory_budget_mb=args.memory_budget,
+        spill_dir=args.spill_dir,
+        pipelined=args.pipelined,
+        assets_dir=args.assets_dir,
+        shard_rows=args.shard_rows,
+        shard_mb=args.shard_mb,
+        shard_by=args.shard_by,
+    )
+    for row in skipped:
+        print(f"skipping={row.customer_name} reason=output_type_not_set")
+    if args.enqueue:
+        return _enqueue_batch(args, jobs, skipped)
+
+    costs = estimate_costs(jobs)
+    order = largest_first(costs) if args.schedule == "cost" else list(range(len(jobs)))
+    outcomes = run_batch(
+        jobs,
+        workers=args.workers,
+        timeout_s=args.timeout_s,
+        memory_limit_mb=args.memory_limit_mb,
+        order=order,
+        memory_mb=[cost.predicted_peak_mb for cost in costs],
+        memory_budget_mb=args.schedule_memory_mb,
+    )
+    for outcome in outcomes:
+        if outcome.failure:
+            failure = outcome.failure
+            print(f"failed={failure['file_name']} stage={failure['error_stage']} error={failure['error_message']}")
+
+    schedule = schedule_report(args.schedule, costs, order, outcomes, args.schedule_memory_mb)
+    consolidated = consolidate(args.manifest, outcomes, skipped, schedule)
     output = Path(args.consolidated_qa)
     output.parent.mkdir(parents=True, exist_ok=True)
     output.write_text(json.dumps(consolidated, indent=2))
+    print(f"skipped_unchanged={consolidated['aggregate']['files_skipped_unchanged']}")
     print(f"wrote_consolidated_qa={args.consolidated_qa}")
+    if args.metrics_textfile:
+        registry = MetricsRegistry()
+        for outcome in outcomes:
+            if outcome.failure:
+                record_failure(registry, outcome.failure)
+            else:
+                record_conversion(registry, outcome.result)
+        registry.write_textfile(args.metrics_textfile)
+        print(f"wrote_metrics={args.metrics_textfile}")
     print(consolidated["summary_text"])
     return 0
 
 
+def _enqueue_batch(args: argparse.Namespace, jobs: list, skipped: list) -> int:
+    import time
+
+    from .scheduler import estimate_costs
+    from .workqueue import WorkQueue, write_consolidated
+
+    # Workers claim the most expensive jobs first, as a local cost-scheduled run would start them.
+    priorities = [cost.predicted_wall_s for cost in estimate_costs(jobs)] if args.schedule == "cost" else None
+    queue = WorkQueue(args.enqueue)
+    batch, added = queue.enqueue(
+        jobs, args.manifest, args.consolidated_qa, skipped, batch=args.batch_id, max_attempts=args.max_attempts, priorities=priorities
+    )
+    print(f"enqueued={added} batch={batch} queue={args.enqueue}")
+    # A batch with nothing to convert is complete as soon as it is enqueued.
+    if queue.claim_consolidation(batch):
+        print(f"wrote_consolidated_qa={write_consolidated(queue, batch)}")
+    if args.wait:
+        # Wait for the written stamp, not the claim; if no worker is left to retry a failed write, write it here.
+        while queue.consolidated_at(batch) is None:
+            if queue.claim_consolidation(batch):
+                write_consolidated(queue, batch)
+                continue
+            time.sleep(2.0)
+        consolidated = json.loads(Path(args.consolidated_qa).read_text())
+        print(f"wrote_consolidated_qa={args.consolidated_qa}")
+        print(consolidated["summary_text"])
+    queue.close()
+    return 0
+
+
+def _cmd_worker(args: argparse.Namespace) -> int:
+    from .workqueue import run_worker
+
+    stats = run_worker(
+        args.queue,
+        owner=args.worker_id,
+        slots=args.workers,
+        timeout_s=args.timeout_s,
+        memory_limit_mb=args.memory_limit_mb,
+        lease_s=args.lease_s,
+        retry_delay_s=args.retry_delay_s,
+        poll_s=args.poll_s,
+        until_empty=args.until_empty,
+        log=lambda line: print(line, flush=True),
+    )
+    print(" ".join(f"{name}={count}" for name, count in stats.items()))
+    return 0
+
+
+def _cmd_queue(args: argparse.Namespace) -> int:
+    from .workqueue import WorkQueue
+
+    queue = WorkQueue(args.queue)
+    if args.requeue_dead:
+        print(f"requeued={queue.requeue_dead(args.batch)}")
+    for batch in [args.batch] if args.batch else queue.batches():
+        counts = queue.counts(batch)
+        print(f"batch={batch} " + " ".join(f"{status}={count}" for status, count in counts.items()))
+    for dead in queue.dead_letters(args.batch):
+        print(f"dead={dead['key']} batch={dead['batch']} attempts={dead['attempts']} stage={dead['error_stage']} error={dead['error_message']}")
+    queue.close()
+    return 0
+
+
 def _cmd_enrich(args: argparse.Namespace) -> int:
+    from .metrics import MetricsRegistry, record_enrichment
+    from .perf import profile_dir_for
+    from .pipeline import run_enrichment
+
     qa = run_enrichment(
-    qa = enrich_csv(
         input_csv=args.input_csv,
         output_csv=args.output_csv,
         qa_json=args.qa_json,
         domains_config=args.domains_config,
         sleep_ms=args.sleep_ms,
+        journal_path=args.journal,
+        resume=args.resume,
+        catalog_path=args.catalog,
+        offline=args.offline,
+        page_matching=not args.no_page_matching,
+        timeout_s=args.timeout_s,
+        max_retries=args.max_retries,
+        breaker_threshold=args.breaker_threshold,
+        breaker_cooldown_s=args.breaker_cooldown_s,
+        trace_memory=args.trace_memory,
+        profile=args.profile,
     )
+    if args.journal:
+        print(f"journal={args.journal} rows_resumed={qa['rows_resumed']}")
     print(f"wrote_enriched_csv={args.output_csv}")
     print(f"wrote_enrichment_qa={args.qa_json}")
+    if args.profile:
+        print(f"wrote_profile={profile_dir_for(args.qa_json)}")
+    if args.metrics_textfile:
+        registry = MetricsRegistry()
+        record_enrichment(registry, qa)
+        registry.write_textfile(args.metrics_textfile)
+        print(f"wrote_metrics={args.metrics_textfile}")
     print(f"summary={qa['summary']}")
+    if qa.get("blocked_domains"):
+        print(f"blocked_domains={','.join(qa['blocked_domains'])}")
+    return 0
+
+
+def _cmd_catalog_build(args: argparse.Namespace) -> int:
+    from .catalog import build_catalog
+
+    counts = build_catalog(args.files, args.output, manufacturer=args.manufacturer)
+    for name, count in counts.items():
+        print(f"indexed={name} records={count}")
+    print(f"wrote_catalog={args.output}")
+    return 0
+
+
+def _cmd_serve(args: argparse.Namespace) -> int:
+    if not args.watch and args.http_port is None:
+        raise SystemExit("serve needs --watch and/or --http-port")
+
+    import threading
+
+    from .metrics import MetricsRegistry, make_metrics_server
+    from .service import JobQueue, make_server
+    from .watch import WatchService, WatchSettings, warm_pool
+
+    metrics = MetricsRegistry()
+    # One pool serves both the watcher and the HTTP jobs, so --workers bounds the processes for the whole service.
+    pool = warm_pool(args.workers, args.markup_profile)
+    if args.metrics_port is not None:
+        metrics_server = make_metrics_server(args.http_host, args.metrics_port, metrics)
+        threading.Thread(target=metrics_server.serve_forever, daemon=True).start()
+        print(f"metrics=http://{args.http_host}:{metrics_server.server_address[1]}/metrics")
+
+    server = None
+    if args.http_port is not None:
+        queue = JobQueue(
+            args.jobs_dir, max_pending=args.max_pending, retention_s=args.retention_s, metrics=metrics, executor=pool
+        )
+        server = make_server(
+            args.http_host,
+            args.http_port,
+            queue,
+            {
+                "template_type": args.template_type,
+                "markup_profile_path": args.markup_profile,
+                "domains_config": args.domains_config,
+                "catalog_path": args.catalog,
+            },
+        )
+        print(f"listening=http://{args.http_host}:{server.server_address[1]}")
+
+    try:
+        if args.watch:
+            if server is not None:
+                threading.Thread(target=server.serve_forever, daemon=True).start()
+            settings = WatchSettings(
+                watch_dir=args.watch,
+                results_dir=args.results_dir,
+                template_type=args.template_type,
+                markup_profile_path=args.markup_profile,
+                labor_cost_default=args.labor_cost_default,
+                labor_rate_default=args.labor_rate_default,
+                workers=args.workers,
+                debounce_s=args.debounce_s,
+                poll_interval_s=args.poll_interval_s,
+            )
+            WatchService(settings, metrics=metrics, executor=pool).run_forever()
+        else:
+            server.serve_forever()
+    except KeyboardInterrupt:
+        print("stopped=1")
+    finally:
+        if server is not None:
+            server.shutdown()
+        pool.shutdown(wait=False, cancel_futures=True)
     return 0
 
 
 def _cmd_validate(args: argparse.Namespace) -> int:
-    schema = json.loads(Path(args.schema).read_text())
+    from .validation import compiled_validator, error_messages
+
     payload = json.loads(Path(args.input).read_text())
-    validator = Draft202012Validator(schema)
-    errors = sorted(validator.iter_errors(payload), key=lambda e: e.path)
+    errors = error_messages(compiled_validator(args.schema), payload)
     if errors:
-        msg = "; ".join(f"{'.'.join(map(str, e.path)) or '<root>'}:{e.message}" for e in errors[:10])
-        raise SystemExit(f"validation_error={msg}")
+        raise SystemExit(f"validation_error={'; '.join(errors)}")
     print("validation=ok")
     return 0
 
 
+def _cmd_validate_all(args: argparse.Namespace) -> int:
+    import sys
+
+    from .validation import validate_many
+
+    try:
+        summary = validate_many(args.inputs, schema_dir=args.schema_dir, schema=args.schema, workers=args.workers)
+    except ValueError as exc:
+        raise SystemExit(f"validation_error={exc}")
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        output.write_text(json.dumps(summary, indent=2))
+        for result in summary["results"]:
+            if result["status"] != "valid":
+                print(f"{result['status']}={result['path']} error={'; '.join(result['errors'][:3])}")
+        print(f"wrote_validation={args.output}")
+    else:
+        print(json.dumps(summary, indent=2))
+    print(
+        f"files={summary['files']} valid={summary['valid']} invalid={summary['invalid']} "
+        f"unmatched={summary['unmatched']} unreadable={summary['unreadable']}",
+        file=sys.stdout if args.output else sys.stderr,
+    )
+    failed = summary["invalid"] + summary["unreadable"] + (summary["unmatched"] if args.strict else 0)
+    return 1 if failed else 0
+
+
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(prog="pb-ingestor", description="Pricebook ingestion CLI")
     sub = parser.add_subparsers(dest="command", required=True)
 
     analyze = sub.add_parser("analyze", help="Inspect source workbook and count extracted rows")
     analyze.add_argument("source")
+    analyze.add_argument(
+        "--sample",
+        action="store_true",
+        help="Read sheet metadata and the first --sample-rows rows per sheet and print a JSON profile instead of a full ingest",
+    )
+    analyze.add_argument("--sample-rows", type=int, default=200, metavar="N", help="Rows per sheet read by --sample")
+    analyze.add_argument("--output", default=None, help="With --sample, write the JSON profile here")
     analyze.set_defaults(func=_cmd_analyze)
 
     convert = sub.add_parser("convert", help="Convert a source file to outputs (normalized CSV, template XLSX, QA JSON)")
@@ -209,6 +449,31 @@ def build_parser() -> argparse.ArgumentParser:
     convert.add_argument("--output-workbook", default="out/converted/output.xlsx")
     convert.add_argument("--qa-json", default="out/qa/run_report.json")
     convert.add_argument("--manual-review-csv", default="out/qa/manual_review.csv")
+    convert.add_argument("--force", action="store_true", help="Reconvert even if inputs match the stored run fingerprint")
+    convert.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower)")
+    convert.add_argument(
+        "--profile",
+        action="store_true",
+        help="Write cProfile .pstats and collapsed stacks per stage next to the QA JSON (with --trace-memory, top allocations too)",
+    )
+    convert.add_argument("--metrics-textfile", default=None, help="Write Prometheus metrics for node_exporter's textfile collector")
+    convert.add_argument("--validate-qa", action="store_true", help="Check the QA report against schemas/qa_run_report.schema.json before writing it")
+    convert.add_argument(
+        "--memory-budget", type=float, default=None, help="MB of rows to hold in memory; beyond it rows spill to a temporary SQLite file"
+    )
+    convert.add_argument("--spill-dir", default=None, help="Directory for spill files (default: system temp dir)")
+    convert.add_argument(
+        "--pipelined", action="store_true", help="Run ingest, mapping and writing as concurrent stages joined by bounded queues"
+    )
+    convert.add_argument(
+        "--assets-dir", default=None, help="Extract embedded images, attachments and hyperlinks into this directory and link them to rows"
+    )
+    convert.add_argument("--shard-rows", type=int, default=None, help="Split the template workbook into files of at most N rows")
+    convert.add_argument("--shard-mb", type=float, default=None, help="Split the template workbook into files of about this many MB")
+    convert.add_argument(
+        "--shard-by", choices=["Category", "Manufacturer"], default=None, help="Write one template workbook per category or manufacturer"
+    )
+    convert.add_argument("--shard-workers", type=int, default=None, help="Processes writing shards in parallel (default: one per CPU)")
     convert.set_defaults(func=_cmd_convert)
 
     convert_all = sub.add_parser("convert-all", help="Batch-convert files listed in a manifest")
@@ -218,21 +483,129 @@ def build_parser() -> argparse.ArgumentParser:
     convert_all.add_argument("--labor-rate-default", type=float, default=None)
     convert_all.add_argument("--out-dir", default="out")
     convert_all.add_argument("--consolidated-qa", default="out/qa/consolidated.json")
+    convert_all.add_argument("--workers", type=int, default=1, help="Manifest entries converted concurrently (one process each)")
+    convert_all.add_argument("--timeout-s", type=float, default=None, help="Kill and record a failure for files taking longer")
+    convert_all.add_argument("--memory-limit-mb", type=int, default=None, help="Address-space limit per conversion process")
+    convert_all.add_argument("--force", action="store_true", help="Reconvert entries whose inputs are unchanged")
+    convert_all.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower)")
+    convert_all.add_argument("--metrics-textfile", default=None, help="Write Prometheus metrics for node_exporter's textfile collector")
+    convert_all.add_argument("--validate-qa", action="store_true", help="Check the QA report against schemas/qa_run_report.schema.json before writing it")
+    convert_all.add_argument(
+        "--memory-budget", type=float, default=None, help="MB of rows to hold in memory; beyond it rows spill to a temporary SQLite file"
+    )
+    convert_all.add_argument("--spill-dir", default=None, help="Directory for spill files (default: system temp dir)")
+    convert_all.add_argument(
+        "--pipelined", action="store_true", help="Run ingest, mapping and writing as concurrent stages joined by bounded queues"
+    )
+    convert_all.add_argument(
+        "--assets-dir",
+        default=None,
+        help="Extract embedded images, attachments and hyperlinks of every book into this shared, content-addressed directory",
+    )
+    convert_all.add_argument("--shard-rows", type=int, default=None, help="Split the template workbook into files of at most N rows")
+    convert_all.add_argument("--shard-mb", type=float, default=None, help="Split the template workbook into files of about this many MB")
+    convert_all.add_argument(
+        "--shard-by", choices=["Category", "Manufacturer"], default=None, help="Write one template workbook per category or manufacturer"
+    )
+    convert_all.add_argument(
+        "--schedule",
+        choices=["cost", "manifest"],
+        default="cost",
+        help="Start the most expensive books first (cost, estimated from a metadata peek and prior QA) or in manifest order",
+    )
+    convert_all.add_argument(
+        "--schedule-memory-mb", type=float, default=None, help="Only start a book if the running books' predicted peaks fit in this total"
+    )
+    convert_all.add_argument("--enqueue", default=None, metavar="QUEUE_DB", help="Add the jobs to a work queue for `worker` processes instead of converting")
+    convert_all.add_argument("--batch-id", default=None, help="Queue batch name (default: timestamp); re-enqueueing a batch adds only new keys")
+    convert_all.add_argument("--max-attempts", type=int, default=3, help="Attempts per queued job before it is dead-lettered")
+    convert_all.add_argument("--wait", action="store_true", help="With --enqueue, block until workers have written the consolidated QA")
     convert_all.set_defaults(func=_cmd_convert_all)
 
+    worker = sub.add_parser("worker", help="Convert jobs from a work queue filled by `convert-all --enqueue`")
+    worker.add_argument("queue", help="Work queue SQLite file, on storage shared by all worker nodes")
+    worker.add_argument("--workers", type=int, default=1, help="Jobs converted concurrently by this worker (one process each)")
+    worker.add_argument("--worker-id", default=None, help="Lease owner name (default: host:pid)")
+    worker.add_argument("--timeout-s", type=float, default=None, help="Kill and retry jobs taking longer")
+    worker.add_argument("--memory-limit-mb", type=int, default=None, help="Address-space limit per conversion process")
+    worker.add_argument("--lease-s", type=float, default=300.0, help="Lease length; heartbeats renew it three times per lease")
+    worker.add_argument("--retry-delay-s", type=float, default=30.0, help="Delay before the first retry, doubled per attempt")
+    worker.add_argument("--poll-s", type=float, default=2.0, help="Wait between claims when the queue is empty")
+    worker.add_argument("--until-empty", action="store_true", help="Exit once no job in the queue is pending or leased")
+    worker.set_defaults(func=_cmd_worker)
+
+    queue_cmd = sub.add_parser("queue", help="Show work queue status and dead-lettered jobs")
+    queue_cmd.add_argument("queue")
+    queue_cmd.add_argument("--batch", default=None)
+    queue_cmd.add_argument("--requeue-dead", action="store_true", help="Give dead-lettered jobs a fresh set of attempts")
+    queue_cmd.set_defaults(func=_cmd_queue)
+
     enrich = sub.add_parser("enrich", help="Enrich converted CSV with manufacturer website data")
     enrich.add_argument("input_csv")
     enrich.add_argument("--domains-config", default="config/enrichment/manufacturer_domains.json")
     enrich.add_argument("--output-csv", default="out/enriched/enriched.csv")
     enrich.add_argument("--qa-json", default="out/qa/enrichment.json")
     enrich.add_argument("--sleep-ms", type=int, default=100)
+    enrich.add_argument("--journal", default=None, help="Append-only JSONL checkpoint journal (enables streaming mode)")
+    enrich.add_argument("--resume", action="store_true", help="Skip rows already recorded in --journal")
+    enrich.add_argument("--catalog", default=None, help="Catalog index built with catalog-build, consulted before HTTP")
+    enrich.add_argument("--offline", action="store_true", help="Use only --catalog; never fetch manufacturer sites")
+    enrich.add_argument(
+        "--no-page-matching",
+        action="store_true",
+        help="Do not attribute fetched pages to other outstanding part numbers of the same manufacturer",
+    )
+    enrich.add_argument("--timeout-s", type=float, default=8.0, help="Per-request read timeout")
+    enrich.add_argument("--max-retries", type=int, default=1, help="Retries per URL for connection errors, 429 and 5xx")
+    enrich.add_argument("--breaker-threshold", type=int, default=3, help="Consecutive failures before a domain is skipped")
+    enrich.add_argument("--breaker-cooldown-s", type=float, default=300.0, help="How long a tripped domain is skipped")
+    enrich.add_argument("--trace-memory", action="store_true", help="Record tracemalloc peaks per stage (slower)")
+    enrich.add_argument("--profile", action="store_true", help="Write cProfile .pstats and collapsed stacks per stage next to the QA JSON")
+    enrich.add_argument("--metrics-textfile", default=None, help="Write Prometheus metrics for node_exporter's textfile collector")
     enrich.set_defaults(func=_cmd_enrich)
 
+    catalog_build = sub.add_parser("catalog-build", help="Index manufacturer catalog dumps (CSV/JSON/XML) for offline enrichment")
+    catalog_build.add_argument("files", nargs="+")
+    catalog_build.add_argument("--output", default="out/catalog/catalog_index.json")
+    catalog_build.add_argument("--manufacturer", default=None, help="Manufacturer for records without one")
+    catalog_build.set_defaults(func=_cmd_catalog_build)
+
+    serve = sub.add_parser("serve", help="Long-running watch-folder and/or HTTP job service")
+    serve.add_argument("--watch", default=None, help="Folder to watch; sub-folders named after a template type override it")
+    serve.add_argument("--results-dir", default="out/results")
+    serve.add_argument("--template-type", choices=["single_part", "bundle", "supplier_loader"], default="bundle")
+    serve.add_argument("--markup-profile", default="config/markup/default_global_tiered_markup.json")
+    serve.add_argument("--labor-cost-default", type=float, default=None)
+    serve.add_argument("--labor-rate-default", type=float, default=None)
+    serve.add_argument("--workers", type=int, default=2)
+    serve.add_argument("--debounce-s", type=float, default=2.0, help="File size/mtime must be stable this long before converting")
+    serve.add_argument("--poll-interval-s", type=float, default=1.0)
+    serve.add_argument("--http-port", type=int, default=None, help="Expose the submit/status/download job API on this port")
+    serve.add_argument("--http-host", default="127.0.0.1")
+    serve.add_argument("--jobs-dir", default="out/jobs", help="Working directory for HTTP jobs")
+    serve.add_argument("--max-pending", type=int, default=32, help="Queued+running HTTP jobs before submissions get 429")
+    serve.add_argument("--retention-s", type=float, default=3600.0, help="How long finished HTTP job results are kept")
+    serve.add_argument("--domains-config", default="config/enrichment/manufacturer_domains.json")
+    serve.add_argument("--catalog", default=None)
+    serve.add_argument("--metrics-port", type=int, default=None, help="Serve /metrics on its own port (the job API also serves it)")
+    serve.set_defaults(func=_cmd_serve)
+
     validate_cmd = sub.add_parser("validate", help="Validate JSON against JSON schema")
     validate_cmd.add_argument("input")
     validate_cmd.add_argument("--schema", required=True)
     validate_cmd.set_defaults(func=_cmd_validate)
 
+    validate_all = sub.add_parser("validate-all", help="Validate many JSON/JSONL files against the schemas in --schema-dir")
+    validate_all.add_argument("inputs", nargs="+", help="Files, directories or glob patterns")
+    validate_all.add_argument("--schema-dir", default="schemas")
+    validate_all.add_argument(
+        "--schema", default=None, help="Schema name (e.g. qa_run_report) or path; by default picked per record by its required keys"
+    )
+    validate_all.add_argument("--workers", type=int, default=1, help="Validation processes; each compiles the schemas once")
+    validate_all.add_argument("--output", default=None, help="Write the JSON summary here instead of stdout")
+    validate_all.add_argument("--strict", action="store_true", help="Also fail on records that match no schema")
+    validate_all.set_defaults(func=_cmd_validate_all)
+
     return parser
 
 
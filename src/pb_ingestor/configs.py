@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import threading
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .crosswalk import CrosswalkRow, parse_crosswalk
+from .markup import MarkupProfile
+
+
+@dataclass
+class _Entry:
+    stamp: tuple[int, int]
+    digest: str
+    value: Any
+
+
+def parse_domain_allowlist(data: Any) -> dict[str, list[str]]:
+    if not isinstance(data, dict) or not all(isinstance(v, list) for v in data.values()):
+        raise ValueError("Domain allowlist must map manufacturer names to lists of domains")
+    return {k.lower(): v for k, v in data.items()}
+
+
+def _parse_crosswalk(raw: bytes) -> list[CrosswalkRow]:
+    return parse_crosswalk(io.StringIO(raw.decode("utf-8-sig"), newline=""))
+
+
+def _parse_markup(raw: bytes) -> MarkupProfile:
+    return MarkupProfile.from_dict(json.loads(raw))
+
+
+def _parse_allowlist(raw: bytes) -> dict[str, list[str]]:
+    return parse_domain_allowlist(json.loads(raw))
+
+
+class ConfigRegistry:
+    # One stat per lookup; a changed size/mtime triggers a re-read and hash, and only a changed hash re-parses.
+    def __init__(self) -> None:
+        self._entries: dict[tuple[str, str], _Entry] = {}
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "loads": 0, "unchanged_touches": 0}
+
+    def _get(self, kind: str, path: str | Path, parse: Callable[[bytes], Any]) -> Any:
+        resolved = Path(path).resolve()
+        st = resolved.stat()
+        stamp = (st.st_mtime_ns, st.st_size)
+        key = (kind, str(resolved))
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.stamp == stamp:
+                self.stats["hits"] += 1
+                return entry.value
+        raw = resolved.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.digest == digest:
+                # Touched but not edited (e.g. re-synced from a share): keep the parsed object.
+                entry.stamp = stamp
+                self.stats["unchanged_touches"] += 1
+                return entry.value
+        value = parse(raw)
+        with self._lock:
+            self._entries[key] = _Entry(stamp, digest, value)
+            self.stats["loads"] += 1
+        return value
+
+    def crosswalk(self, path: str | Path) -> list[CrosswalkRow]:
+        return self._get("crosswalk", path, _parse_crosswalk)
+
+    def markup(self, path: str | Path) -> MarkupProfile:
+        return self._get("markup", path, _parse_markup)
+
+    def template_bytes(self, path: str | Path) -> bytes:
+        return self._get("template", path, bytes)
+
+    def domain_allowlist(self, path: str | Path) -> dict[str, list[str]]:
+        if not Path(path).exists():
+            return {}
+        return self._get("allowlist", path, _parse_allowlist)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+CONFIGS = ConfigRegistry()
@@ -3,6 +3,19 @@ from __future__ import annotations
 import csv
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Iterable
+
+CROSSWALK_COLUMNS = ("output_template", "output_sheet", "output_column", "required", "source_priority", "transform_rule")
+CROSSWALK_PATHS = {
+    "single_part": Path("config/mappings/crosswalk_single_part.csv"),
+    "bundle": Path("config/mappings/crosswalk_bundle_single_part_single_labor.csv"),
+    "supplier_loader": Path("config/mappings/crosswalk_supplier_loader.csv"),
+}
+BASE_TEMPLATE_PATHS = {
+    "single_part": Path("samples/base-templates/Single part template.xlsx"),
+    "bundle": Path("samples/base-templates/Single part single labor template.xlsx"),
+    "supplier_loader": Path("samples/base-templates/Supplier Loader Template JUN2024.xlsx"),
+}
 
 
 @dataclass(frozen=True)
@@ -26,25 +39,32 @@ class ManifestRow:
     notes: str
 
 
-def load_crosswalk(path: str | Path) -> list[CrosswalkRow]:
+def parse_crosswalk(lines: Iterable[str]) -> list[CrosswalkRow]:
+    reader = csv.DictReader(lines)
+    missing = [c for c in CROSSWALK_COLUMNS if c not in (reader.fieldnames or [])]
+    if missing:
+        raise ValueError(f"Crosswalk is missing columns: {', '.join(missing)}")
     rows: list[CrosswalkRow] = []
-    with Path(path).open(newline="") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            rows.append(
-                CrosswalkRow(
-                    output_template=row["output_template"],
-                    output_sheet=row["output_sheet"],
-                    output_column=row["output_column"],
-                    required=row["required"].strip().lower() == "yes",
-                    source_priority=row["source_priority"].strip(),
-                    transform_rule=row["transform_rule"].strip(),
-                    notes=row.get("notes", "").strip(),
-                )
+    for row in reader:
+        rows.append(
+            CrosswalkRow(
+                output_template=row["output_template"],
+                output_sheet=row["output_sheet"],
+                output_column=row["output_column"],
+                required=row["required"].strip().lower() == "yes",
+                source_priority=row["source_priority"].strip(),
+                transform_rule=row["transform_rule"].strip(),
+                notes=(row.get("notes") or "").strip(),
             )
+        )
     return rows
 
 
+def load_crosswalk(path: str | Path) -> list[CrosswalkRow]:
+    with Path(path).open(newline="") as f:
+        return parse_crosswalk(f)
+
+
 def load_manifest(path: str | Path) -> list[ManifestRow]:
     rows: list[ManifestRow] = []
     with Path(path).open(newline="") as f:
@@ -64,22 +84,12 @@ def load_manifest(path: str | Path) -> list[ManifestRow]:
 
 
 def infer_crosswalk_path(template_type: str) -> Path:
-    mapping = {
-        "single_part": Path("config/mappings/crosswalk_single_part.csv"),
-        "bundle": Path("config/mappings/crosswalk_bundle_single_part_single_labor.csv"),
-        "supplier_loader": Path("config/mappings/crosswalk_supplier_loader.csv"),
-    }
-    if template_type not in mapping:
+    if template_type not in CROSSWALK_PATHS:
         raise ValueError(f"Unknown template type: {template_type}")
-    return mapping[template_type]
+    return CROSSWALK_PATHS[template_type]
 
 
 def infer_base_template_path(template_type: str) -> Path:
-    mapping = {
-        "single_part": Path("samples/base-templates/Single part template.xlsx"),
-        "bundle": Path("samples/base-templates/Single part single labor template.xlsx"),
-        "supplier_loader": Path("samples/base-templates/Supplier Loader Template JUN2024.xlsx"),
-    }
-    if template_type not in mapping:
+    if template_type not in BASE_TEMPLATE_PATHS:
         raise ValueError(f"Unknown template type: {template_type}")
-    return mapping[template_type]
+    return BASE_TEMPLATE_PATHS[template_type]
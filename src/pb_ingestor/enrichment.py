@@ -4,14 +4,21 @@ import csv
 import json
 import re
 import time
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+from functools import lru_cache
 from pathlib import Path
-from typing import Any
+from typing import Any, Callable, Iterable
 from urllib.parse import quote_plus
 
-import requests
 from bs4 import BeautifulSoup
 
+from .catalog import CatalogIndex
+from .configs import CONFIGS, ConfigRegistry, parse_domain_allowlist
+from .fetch import DomainCircuitBreaker, Fetcher, RetryPolicy
+from .fingerprint import file_digest
+from .pagematch import PageMatcher
+from .perf import PerfRecorder, profile_dir_for
+
 
 @dataclass
 class EnrichmentResult:
@@ -23,21 +30,34 @@ class EnrichmentResult:
     status: str
 
 
+ENRICHMENT_COLUMNS = {
+    "Enriched Part Name": "part_name",
+    "Enriched Description": "description",
+    "Enriched Warranty": "warranty",
+    "Enrichment Source URL": "source_url",
+    "Enrichment Confidence": "confidence",
+    "Enrichment Status": "status",
+}
+JOURNAL_FORMAT = "pb-ingestor-enrichment-journal/2"
+
+
 def load_domain_allowlist(path: str | Path) -> dict[str, list[str]]:
     p = Path(path)
     if not p.exists():
         return {}
-    data = json.loads(p.read_text())
-    return {k.lower(): v for k, v in data.items()}
+    return parse_domain_allowlist(json.loads(p.read_text()))
 
 
-def _extract_text(html: str) -> str:
-    soup = BeautifulSoup(html, "html.parser")
+def _soup_text(soup: BeautifulSoup) -> str:
     for el in soup(["script", "style", "noscript"]):
         el.decompose()
     return re.sub(r"\s+", " ", soup.get_text(" ")).strip()
 
 
+def _extract_text(html: str) -> str:
+    return _soup_text(BeautifulSoup(html, "html.parser"))
+
+
 def _pick_warranty(text: str) -> str | None:
     matches = re.findall(r"([^.]{0,80}warrant[^.]{0,120}\.)", text, flags=re.IGNORECASE)
     if not matches:
@@ -63,15 +83,41 @@ def _confidence(part_number: str, text: str) -> str:
     return "low"
 
 
+@lru_cache(maxsize=None)
+def _default_fetcher(timeout_s: float) -> Fetcher:
+    # Callers without their own fetcher share one per timeout, so its session keeps connections alive across calls.
+    return Fetcher(timeout_s=timeout_s)
+
+
 def enrich_part(
     part_number: str,
     manufacturer: str | None,
     domains_by_manufacturer: dict[str, list[str]],
     timeout_s: float = 8.0,
+    catalog: CatalogIndex | None = None,
+    offline: bool = False,
+    source_description: str | None = None,
+    on_page: Callable[[str, str, str | None], None] | None = None,
+    fetcher: Fetcher | None = None,
 ) -> EnrichmentResult:
     if not part_number:
         return EnrichmentResult(None, None, None, None, "low", "not_found")
 
+    if catalog is not None:
+        hit = catalog.lookup(part_number, manufacturer, source_description)
+        if hit is not None:
+            record = hit.record
+            return EnrichmentResult(
+                record.name,
+                record.description,
+                record.warranty,
+                record.url or f"catalog:{record.source}",
+                hit.confidence,
+                "ambiguous" if hit.ambiguous else "enriched",
+            )
+    if offline:
+        return EnrichmentResult(None, None, None, None, "low", "not_found")
+
     m_key = (manufacturer or "").strip().lower()
     domains = domains_by_manufacturer.get(m_key, [])
     if not domains and m_key:
@@ -80,31 +126,37 @@ def enrich_part(
 
     candidates = []
     for d in domains[:3]:
+        # Entries may carry their own scheme (e.g. a local stub server); bare domains use https.
+        base = d.rstrip("/") if d.startswith(("http://", "https://")) else f"https://{d}"
         candidates.extend(
             [
-                f"https://{d}/search?q={quote_plus(part_number)}",
-                f"https://{d}/?s={quote_plus(part_number)}",
-                f"https://{d}/{quote_plus(part_number)}",
+                f"{base}/search?q={quote_plus(part_number)}",
+                f"{base}/?s={quote_plus(part_number)}",
+                f"{base}/{quote_plus(part_number)}",
             ]
         )
 
-    headers = {"User-Agent": "Mozilla/5.0 (compatible; pb-ingestor/0.1)"}
+    if fetcher is None:
+        fetcher = _default_fetcher(timeout_s)
 
+    unreachable = 0
     for url in candidates:
-        try:
-            resp = requests.get(url, timeout=timeout_s, headers=headers)
-        except Exception:
-            continue
-        if resp.status_code >= 400 or not resp.text:
+        outcome = fetcher.get(url)
+        if outcome.status in {"skipped", "blocked", "error", "unavailable"}:
+            unreachable += 1
+        if outcome.status != "ok" or not outcome.response.text:
             continue
+        resp = outcome.response
 
-        text = _extract_text(resp.text)
+        soup = BeautifulSoup(resp.text, "html.parser")
+        title = soup.title.get_text(" ", strip=True) if soup.title else None
+        text = _soup_text(soup)
+        if on_page is not None:
+            on_page(url, text, title)
         conf = _confidence(part_number, text)
         if conf == "low":
             continue
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        title = soup.title.get_text(" ", strip=True) if soup.title else None
         description = None
         md = soup.find("meta", attrs={"name": "description"})
         if md and md.get("content"):
@@ -115,51 +167,312 @@ def enrich_part(
         warranty = _pick_warranty(text)
         return EnrichmentResult(title, description, warranty, url, conf, "enriched")
 
+    if candidates and unreachable == len(candidates):
+        return EnrichmentResult(None, None, None, None, "low", "blocked")
     return EnrichmentResult(None, None, None, None, "low", "not_found")
 
 
+def _row_part_number(row: dict[str, Any]) -> str:
+    return (row.get("Manufacturer Part Number") or row.get("manufacturer_part_number_original") or "").strip()
+
+
+def _result_from_page_match(match: dict[str, str | None]) -> EnrichmentResult:
+    snippet = match["snippet"] or ""
+    return EnrichmentResult(
+        match["part_name"],
+        snippet[:350] or None,
+        _pick_warranty(snippet),
+        match["source_url"],
+        match["confidence"] or "medium",
+        "enriched",
+    )
+
+
+def _build_page_matcher(rows: Iterable[dict[str, Any]]) -> PageMatcher:
+    matcher = PageMatcher()
+    for row in rows:
+        matcher.register(_row_part_number(row), (row.get("Manufacturer") or "").strip())
+    return matcher
+
+
+def _build_fetcher(timeout_s: float, max_retries: int, breaker_threshold: int, breaker_cooldown_s: float) -> Fetcher:
+    return Fetcher(
+        timeout_s=timeout_s,
+        retry=RetryPolicy(max_retries=max_retries),
+        breaker=DomainCircuitBreaker(failure_threshold=breaker_threshold, cooldown_s=breaker_cooldown_s),
+    )
+
+
+def _domain_report(fetcher: Fetcher) -> dict[str, Any]:
+    domains = fetcher.breaker.report()
+    blocked = [d for d, st in domains.items() if st["trips"] or st["blocked_responses"]]
+    return {"domains": domains, "blocked_domains": blocked, "http_latency": fetcher.latency.to_dict()}
+
+
+def _page_matching_stats(matcher: PageMatcher | None) -> dict[str, Any]:
+    if matcher is None:
+        return {"enabled": False}
+    return {"enabled": True, "pages_scanned": matcher.pages_scanned, "rows_resolved_from_shared_pages": matcher.rows_resolved}
+
+
+def _enrich_row(
+    row: dict[str, Any],
+    allowlist: dict[str, list[str]],
+    catalog: CatalogIndex | None,
+    offline: bool,
+    matcher: PageMatcher | None = None,
+    fetcher: Fetcher | None = None,
+) -> tuple[EnrichmentResult, bool]:
+    # Returns the result and whether answering it sent any HTTP request; only those rows are throttled.
+    part_number = _row_part_number(row)
+    manufacturer = (row.get("Manufacturer") or "").strip()
+    on_page = None
+    if matcher is not None and part_number:
+        shared = matcher.take(part_number, manufacturer)
+        if shared is not None:
+            return _result_from_page_match(shared), False
+
+        def on_page(url: str, text: str, title: str | None) -> None:
+            matcher.scan(manufacturer, url, text, title)
+
+    sent = fetcher.requests_sent if fetcher is not None else 0
+    result = enrich_part(
+        part_number,
+        manufacturer,
+        allowlist,
+        catalog=catalog,
+        offline=offline,
+        source_description=(row.get("Description") or "").strip() or None,
+        on_page=on_page,
+        fetcher=fetcher,
+    )
+    return result, fetcher is not None and fetcher.requests_sent > sent
+
+
+def _pause(sleep_ms: int, fetched_over_network: bool) -> None:
+    # Catalog and shared-page answers never touch the network, so they are not throttled.
+    if fetched_over_network:
+        time.sleep(max(0, sleep_ms) / 1000)
+
+
+def _apply_result(row: dict[str, Any], result: dict[str, Any]) -> None:
+    for column, field in ENRICHMENT_COLUMNS.items():
+        row[column] = result.get(field)
+
+
+def _tally(counters: dict[str, int], status: str) -> None:
+    if status in counters:
+        counters[status] += 1
+    elif status == "enriched":
+        counters["enriched"] += 1
+    else:
+        counters["not_found"] += 1
+
+
+def _write_enrichment_qa(qa_json: str | Path, qa: dict[str, Any]) -> None:
+    qa_out = Path(qa_json)
+    qa_out.parent.mkdir(parents=True, exist_ok=True)
+    qa_out.write_text(json.dumps(qa, indent=2))
+
+
+def _journal_header(input_csv: Path) -> dict[str, Any]:
+    # The digest, not just the size, so an edited input of the same length is not resumed with stale rows.
+    return {
+        "format": JOURNAL_FORMAT,
+        "input_csv": input_csv.name,
+        "input_bytes": input_csv.stat().st_size,
+        "input_sha256": file_digest(input_csv),
+    }
+
+
+def _scan_journal(journal: Path) -> tuple[dict[str, Any] | None, int, int]:
+    header = None
+    next_row = 0
+    valid_bytes = 0
+    with journal.open("rb") as f:
+        for line in f:
+            # A torn trailing line (crash mid-write) ends the valid prefix.
+            if not line.endswith(b"\n"):
+                break
+            try:
+                record = json.loads(line)
+            except ValueError:
+                break
+            if header is None:
+                header = record
+            else:
+                next_row = record["row"] + 1
+            valid_bytes += len(line)
+    return header, next_row, valid_bytes
+
+
+def _open_journal(journal: Path, input_csv: Path, resume: bool) -> int:
+    header = _journal_header(input_csv)
+    if resume and journal.exists():
+        existing, next_row, valid_bytes = _scan_journal(journal)
+        if existing is not None:
+            if existing != header:
+                raise ValueError(f"Journal {journal} was written for a different input ({existing.get('input_csv')})")
+            with journal.open("r+b") as f:
+                f.truncate(valid_bytes)
+            return next_row
+    journal.parent.mkdir(parents=True, exist_ok=True)
+    journal.write_text(json.dumps(header) + "\n")
+    return 0
+
+
+def _merge_journal(input_csv: Path, journal: Path, output_csv: str | Path, counters: dict[str, int]) -> None:
+    out = Path(output_csv)
+    out.parent.mkdir(parents=True, exist_ok=True)
+    with input_csv.open(newline="") as src, journal.open() as jf, out.open("w", newline="") as dst:
+        reader = csv.DictReader(src)
+        fieldnames = list(reader.fieldnames or [])
+        fieldnames += [c for c in ENRICHMENT_COLUMNS if c not in fieldnames]
+        writer = csv.DictWriter(dst, fieldnames=fieldnames)
+        writer.writeheader()
+        records = (json.loads(line) for line in jf)
+        next(records, None)
+        for idx, row in enumerate(reader):
+            record = next(records, None)
+            if record is None or record["row"] != idx:
+                raise ValueError(f"Journal {journal} is missing a result for input row {idx}")
+            _apply_result(row, record)
+            _tally(counters, record["status"])
+            counters["rows_total"] += 1
+            writer.writerow(row)
+
+
+def _enrich_csv_journaled(
+    input_csv: Path,
+    output_csv: str | Path,
+    qa_json: str | Path,
+    domains_config: str | Path,
+    allowlist: dict[str, list[str]],
+    sleep_ms: int,
+    journal: Path,
+    resume: bool,
+    catalog: CatalogIndex | None,
+    offline: bool,
+    page_matching: bool,
+    fetcher: Fetcher,
+    progress: Callable[[str, int], None] | None,
+    perf: PerfRecorder,
+) -> dict[str, Any]:
+    start_row = _open_journal(journal, input_csv, resume)
+
+    matcher = PageMatcher() if page_matching and not offline else None
+    total = 0
+    with input_csv.open(newline="") as src:
+        for idx, row in enumerate(csv.DictReader(src)):
+            total += 1
+            if matcher is not None and idx >= start_row:
+                matcher.register(_row_part_number(row), (row.get("Manufacturer") or "").strip())
+    if progress is not None:
+        progress("parts_total", total)
+        progress("parts_enriched", start_row)
+
+    with perf.stage("enrich", rows=total - start_row), input_csv.open(newline="") as src, journal.open("a") as jf:
+        for idx, row in enumerate(csv.DictReader(src)):
+            if idx < start_row:
+                continue
+            result, fetched_over_network = _enrich_row(row, allowlist, catalog, offline, matcher, fetcher)
+            jf.write(json.dumps({"row": idx, **asdict(result)}) + "\n")
+            jf.flush()
+            if progress is not None:
+                progress("parts_enriched", idx + 1)
+            _pause(sleep_ms, fetched_over_network)
+
+    counters = {"rows_total": 0, "enriched": 0, "not_found": 0, "ambiguous": 0, "blocked": 0}
+    with perf.stage("write", rows=total):
+        _merge_journal(input_csv, journal, output_csv, counters)
+
+    qa = {
+        "summary": counters,
+        "domains_config": str(domains_config),
+        "journal": str(journal),
+        "rows_resumed": start_row,
+        "page_matching": _page_matching_stats(matcher),
+        **_domain_report(fetcher),
+        "performance": perf.report(),
+    }
+    _write_enrichment_qa(qa_json, qa)
+    return qa
+
+
 def enrich_csv(
     input_csv: str | Path,
     output_csv: str | Path,
     qa_json: str | Path,
     domains_config: str | Path,
     sleep_ms: int = 100,
+    journal_path: str | Path | None = None,
+    resume: bool = False,
+    catalog_path: str | Path | None = None,
+    offline: bool = False,
+    page_matching: bool = True,
+    timeout_s: float = 8.0,
+    max_retries: int = 1,
+    breaker_threshold: int = 3,
+    breaker_cooldown_s: float = 300.0,
+    progress: Callable[[str, int], None] | None = None,
+    trace_memory: bool = False,
+    profile: bool = False,
+    configs: ConfigRegistry | None = None,
 ) -> dict[str, Any]:
-    allowlist = load_domain_allowlist(domains_config)
+    if offline and catalog_path is None:
+        raise ValueError("Offline enrichment requires a catalog index")
+    catalog = CatalogIndex.load(catalog_path) if catalog_path is not None else None
+    fetcher = _build_fetcher(timeout_s, max_retries, breaker_threshold, breaker_cooldown_s)
+    perf = PerfRecorder(trace_memory=trace_memory, profile_dir=profile_dir_for(qa_json) if profile else None)
+    allowlist = (configs or CONFIGS).domain_allowlist(domains_config)
+    if journal_path is not None:
+        return _enrich_csv_journaled(
+            Path(input_csv),
+            output_csv,
+            qa_json,
+            domains_config,
+            allowlist,
+            sleep_ms,
+            Path(journal_path),
+            resume,
+            catalog,
+            offline,
+            page_matching,
+            fetcher,
+            progress,
+            perf,
+        )
+
     rows = list(csv.DictReader(Path(input_csv).open(newline="")))
 
-    counters = {"rows_total": len(rows), "enriched": 0, "not_found": 0, "ambiguous": 0, "blocked": 0}
-    for row in rows:
-        part_number = (row.get("Manufacturer Part Number") or row.get("manufacturer_part_number_original") or "").strip()
-        manufacturer = (row.get("Manufacturer") or "").strip()
-        result = enrich_part(part_number, manufacturer, allowlist)
-
-        row["Enriched Part Name"] = result.part_name
-        row["Enriched Description"] = result.description
-        row["Enriched Warranty"] = result.warranty
-        row["Enrichment Source URL"] = result.source_url
-        row["Enrichment Confidence"] = result.confidence
-        row["Enrichment Status"] = result.status
-
-        if result.status in counters:
-            counters[result.status] += 1
-        elif result.status == "enriched":
-            counters["enriched"] += 1
-        else:
-            counters["not_found"] += 1
+    matcher = _build_page_matcher(rows) if page_matching and not offline else None
 
-        time.sleep(max(0, sleep_ms) / 1000)
+    counters = {"rows_total": len(rows), "enriched": 0, "not_found": 0, "ambiguous": 0, "blocked": 0}
+    if progress is not None:
+        progress("parts_total", len(rows))
+    with perf.stage("enrich", rows=len(rows)):
+        for idx, row in enumerate(rows, start=1):
+            result, fetched_over_network = _enrich_row(row, allowlist, catalog, offline, matcher, fetcher)
+            _apply_result(row, asdict(result))
+            _tally(counters, result.status)
+            if progress is not None:
+                progress("parts_enriched", idx)
+            _pause(sleep_ms, fetched_over_network)
 
     out = Path(output_csv)
     out.parent.mkdir(parents=True, exist_ok=True)
     fieldnames = list(rows[0].keys()) if rows else []
-    with out.open("w", newline="") as f:
+    with perf.stage("write", rows=len(rows)), out.open("w", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=fieldnames)
         writer.writeheader()
         writer.writerows(rows)
 
-    qa = {"summary": counters, "domains_config": str(domains_config)}
-    qa_out = Path(qa_json)
-    qa_out.parent.mkdir(parents=True, exist_ok=True)
-    qa_out.write_text(json.dumps(qa, indent=2))
+    qa = {
+        "summary": counters,
+        "domains_config": str(domains_config),
+        "page_matching": _page_matching_stats(matcher),
+        **_domain_report(fetcher),
+        "performance": perf.report(),
+    }
+    _write_enrichment_qa(qa_json, qa)
     return qa
@@ -0,0 +1,170 @@
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+import requests
+
+from .metrics import HTTP_BUCKETS, Histogram
+
+USER_AGENT = "Mozilla/5.0 (compatible; pb-ingestor/0.1)"
+CONNECT_TIMEOUT_S = 3.05
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+BLOCKING_STATUS = {403, 429}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    max_retries: int = 1
+    backoff_base_s: float = 0.5
+    backoff_max_s: float = 8.0
+
+    def delay(self, attempt: int) -> float:
+        # Full jitter keeps parallel runs from retrying in lockstep.
+        return random.uniform(0, min(self.backoff_max_s, self.backoff_base_s * (2**attempt)))
+
+
+@dataclass
+class DomainState:
+    requests: int = 0
+    errors: int = 0
+    blocked_responses: int = 0
+    skipped: int = 0
+    trips: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+
+
+class DomainCircuitBreaker:
+    def __init__(self, failure_threshold: int = 3, cooldown_s: float = 300.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_s = cooldown_s
+        self.clock = clock
+        self.domains: dict[str, DomainState] = {}
+
+    def state(self, domain: str) -> DomainState:
+        return self.domains.setdefault(domain, DomainState())
+
+    def allow(self, domain: str) -> bool:
+        st = self.state(domain)
+        if st.open_until > self.clock():
+            st.skipped += 1
+            return False
+        return True
+
+    def record_success(self, domain: str) -> None:
+        self.state(domain).consecutive_failures = 0
+
+    def record_failure(self, domain: str, blocked: bool = False, retry_after_s: float | None = None) -> None:
+        st = self.state(domain)
+        st.consecutive_failures += 1
+        if blocked:
+            st.blocked_responses += 1
+        else:
+            st.errors += 1
+        if retry_after_s is not None or st.consecutive_failures >= self.failure_threshold:
+            self.trip(domain, max(self.cooldown_s, retry_after_s or 0.0))
+
+    def trip(self, domain: str, cooldown_s: float) -> None:
+        st = self.state(domain)
+        st.trips += 1
+        st.consecutive_failures = 0
+        st.open_until = self.clock() + cooldown_s
+
+    def report(self) -> dict[str, dict[str, Any]]:
+        now = self.clock()
+        return {
+            domain: {
+                "state": "open" if st.open_until > now else "closed",
+                "requests": st.requests,
+                "errors": st.errors,
+                "blocked_responses": st.blocked_responses,
+                "skipped": st.skipped,
+                "trips": st.trips,
+            }
+            for domain, st in sorted(self.domains.items())
+        }
+
+
+@dataclass
+class FetchOutcome:
+    status: str
+    response: Any = None
+    http_status: int | None = None
+    attempts: int = 0
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class Fetcher:
+    timeout_s: float = 8.0
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    breaker: DomainCircuitBreaker = field(default_factory=DomainCircuitBreaker)
+    session: Any = None
+    sleep: Callable[[float], None] = time.sleep
+    latency: Histogram = field(default_factory=lambda: Histogram(HTTP_BUCKETS))
+    requests_sent: int = 0
+
+    def __post_init__(self) -> None:
+        if self.session is None:
+            self.session = requests.Session()
+            self.session.headers["User-Agent"] = USER_AGENT
+
+    def get(self, url: str) -> FetchOutcome:
+        domain = urlparse(url).netloc.lower()
+        attempt = 0
+        while True:
+            if not self.breaker.allow(domain):
+                return FetchOutcome("skipped", attempts=attempt)
+            attempt += 1
+            self.requests_sent += 1
+            self.breaker.state(domain).requests += 1
+            started = time.perf_counter()
+            try:
+                resp = self.session.get(url, timeout=(min(CONNECT_TIMEOUT_S, self.timeout_s), self.timeout_s))
+            except requests.RequestException:
+                self.latency.observe(time.perf_counter() - started)
+                self.breaker.record_failure(domain)
+                if attempt > self.retry.max_retries:
+                    return FetchOutcome("error", attempts=attempt)
+                self.sleep(self.retry.delay(attempt - 1))
+                continue
+
+            self.latency.observe(time.perf_counter() - started)
+            code = resp.status_code
+            if code < 400:
+                self.breaker.record_success(domain)
+                return FetchOutcome("ok", resp, code, attempt)
+            if code not in RETRYABLE_STATUS and code not in BLOCKING_STATUS:
+                # The domain answered (e.g. 404 for a guessed URL); that is not a domain failure.
+                self.breaker.record_success(domain)
+                return FetchOutcome("http_error", resp, code, attempt)
+
+            blocked = code in BLOCKING_STATUS
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            can_wait = retry_after is None or retry_after <= self.retry.backoff_max_s
+            if attempt > self.retry.max_retries or code == 403 or not can_wait:
+                self.breaker.record_failure(domain, blocked=blocked, retry_after_s=None if can_wait else retry_after)
+                # A 5xx that outlasted the retries says nothing about whether the page exists.
+                return FetchOutcome("blocked" if blocked else "unavailable", resp, code, attempt)
+            self.breaker.record_failure(domain, blocked=blocked)
+            self.sleep(retry_after if retry_after is not None else self.retry.delay(attempt - 1))
@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import hashlib
+import json
+from pathlib import Path
+from typing import Any
+
+from . import __version__
+
+FINGERPRINT_FORMAT = "pb-ingestor-run-fingerprint/1"
+_CHUNK = 1024 * 1024
+
+
+def file_digest(path: str | Path) -> str:
+    h = hashlib.sha256()
+    with Path(path).open("rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def fingerprint_path(qa_json: str | Path) -> Path:
+    return Path(qa_json).with_suffix(".fingerprint.json")
+
+
+def run_fingerprint(
+    inputs: dict[str, str | Path],
+    settings: dict[str, Any],
+    outputs: dict[str, str],
+) -> dict[str, Any]:
+    material = {
+        "tool_version": __version__,
+        "inputs": {name: file_digest(path) for name, path in sorted(inputs.items())},
+        "settings": settings,
+        "outputs": outputs,
+    }
+    digest = hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+    return {"format": FINGERPRINT_FORMAT, "digest": digest, **material}
+
+
+def load_unchanged_result(qa_json: str | Path, fingerprint: dict[str, Any]) -> dict[str, Any] | None:
+    path = fingerprint_path(qa_json)
+    if not path.exists():
+        return None
+    try:
+        stored = json.loads(path.read_text())
+    except ValueError:
+        return None
+    if stored.get("format") != FINGERPRINT_FORMAT or stored.get("digest") != fingerprint["digest"]:
+        return None
+    # A sharded run records the files it actually wrote in place of the single requested workbook.
+    if not all(Path(p).exists() for p in stored.get("written") or fingerprint["outputs"].values()):
+        return None
+    return stored.get("result")
+
+
+def store_fingerprint(
+    qa_json: str | Path, fingerprint: dict[str, Any], result: dict[str, Any], written: list[str] | None = None
+) -> None:
+    path = fingerprint_path(qa_json)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    stored = {**fingerprint, "result": result}
+    if written is not None:
+        stored["written"] = written
+    path.write_text(json.dumps(stored, indent=2, default=str))
@@ -2,11 +2,16 @@ from __future__ import annotations
 
 import csv
 import re
-from dataclasses import dataclass
+import time
+import zipfile
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Iterable
 
 from openpyxl import load_workbook
+from openpyxl.utils.cell import column_index_from_string, coordinate_to_tuple
+
+from .ooxml import workbook_sheets
 
 
 @dataclass
@@ -25,6 +30,7 @@ class IngestResult:
     errors: list[str]
     asset_refs: list[dict[str, str]]
     parser_stage: str = "xlsx"
+    sheet_timings: list[dict[str, Any]] = field(default_factory=list)
 
 
 def _normalize_header(value: Any, idx: int) -> str:
@@ -104,58 +110,168 @@ def _rows_from_fixed_width(lines: Iterable[str], source_file: str) -> list[Sourc
     return rows
 
 
-def ingest_xlsx(path: str | Path) -> IngestResult:
-    rows: list[SourceRow] = []
-    errors: list[str] = []
-    raw = Path(path).read_bytes()
-    asset_refs = _extract_asset_refs(raw)
-    try:
-        wb = load_workbook(path, data_only=True)
-    except Exception as exc:
-        return ingest_fallback(path, [f"xlsx parsing failed: {exc}"], asset_refs)
+HEADER_SEARCH_ROWS = 40
+_MERGE_CELL = re.compile(rb'<(?:\w+:)?mergeCell\s+ref="([A-Z]+[0-9]+):([A-Z]+[0-9]+)"')
+# Cell references only; <row r="5"> has no column letters and mergeCell uses ref=.
+_CELL_COLUMN = re.compile(rb'\sr="([A-Z]+)[0-9]+"')
+
+
+def is_header_row(row: tuple) -> bool:
+    return sum(1 for c in row if c not in (None, "")) >= 3
 
-    for ws in wb.worksheets:
-        if ws.sheet_state != "visible":
-            continue
-        try:
-            _fill_merged_cells(ws)
-        except Exception as exc:
-            errors.append(f"merge fill failed on {ws.title}: {exc}")
-
-        header_row = None
-        headers: list[str] = []
-        for i, row in enumerate(ws.iter_rows(min_row=1, max_row=40, values_only=True), start=1):
-            non_empty = [c for c in row if c not in (None, "")]
-            if len(non_empty) >= 3:
-                header_row = i
-                headers = [_normalize_header(v, idx + 1) for idx, v in enumerate(row)]
-                break
 
-        if header_row is None:
+def sheet_headers(row: tuple) -> list[str]:
+    return [_normalize_header(v, idx + 1) for idx, v in enumerate(row)]
+
+
+def collect_sheet_rows(
+    title: str, numbered_rows: Iterable[tuple[int, tuple]], source_file: str, rows: Any
+) -> int:
+    added = 0
+    headers: list[str] | None = None
+    family_context = None
+    for row_num, row in numbered_rows:
+        if headers is None:
+            if row_num > HEADER_SEARCH_ROWS:
+                break
+            if is_header_row(row):
+                headers = sheet_headers(row)
             continue
 
-        family_context = None
-        for row_num, row in enumerate(ws.iter_rows(min_row=header_row + 1, values_only=True), start=header_row + 1):
-            vals = {headers[idx]: row[idx] for idx in range(min(len(headers), len(row)))}
-            stripped = [str(v).strip() for v in vals.values() if v not in (None, "")]
-            if not stripped:
-                continue
+        vals = {headers[idx]: row[idx] for idx in range(min(len(headers), len(row)))}
+        stripped = [str(v).strip() for v in vals.values() if v not in (None, "")]
+        if not stripped:
+            continue
 
-            if len(stripped) == 1 and len(stripped[0].split()) <= 8:
-                family_context = stripped[0]
-                continue
+        if len(stripped) == 1 and len(stripped[0].split()) <= 8:
+            family_context = stripped[0]
+            continue
 
-            rows.append(
-                SourceRow(
-                    source_file=Path(path).name,
-                    source_sheet=ws.title,
-                    source_row_number=row_num,
-                    values=vals,
-                    family_context=family_context,
-                )
+        rows.append(
+            SourceRow(
+                source_file=source_file,
+                source_sheet=title,
+                source_row_number=row_num,
+                values=vals,
+                family_context=family_context,
             )
+        )
+        added += 1
+    return added
+
 
-    return IngestResult(rows=rows, mode="xlsx", errors=errors, asset_refs=asset_refs, parser_stage="openxml")
+@dataclass
+class SheetScan:
+    merged: list[tuple[int, int, int, int]]
+    width: int
+    row_elements: int
+
+
+def scan_sheet_xml(archive: Any, worksheet_path: str, scan_width: bool) -> SheetScan:
+    # Read-only worksheets do not expose merged ranges; scan the sheet XML for <mergeCell> without loading it whole.
+    # Sheets without a <dimension> also get their width from the cell references in the same pass.
+    bounds = []
+    columns: set[bytes] = set()
+    row_elements = 0
+    tail = b""
+    with archive.open(worksheet_path) as fh:
+        while chunk := fh.read(1 << 20):
+            data = tail + chunk
+            last_end = 0
+            for match in _MERGE_CELL.finditer(data):
+                min_col, min_row = coordinate_to_tuple(match.group(1).decode())[::-1]
+                max_col, max_row = coordinate_to_tuple(match.group(2).decode())[::-1]
+                bounds.append((min_col, min_row, max_col, max_row))
+                last_end = match.end()
+            if scan_width:
+                columns.update(_CELL_COLUMN.findall(data))
+            # Approximate: a <row tag split across chunks is missed.
+            row_elements += chunk.count(b"<row ") + chunk.count(b"<row>")
+            tail = data[max(last_end, len(data) - 256) :]
+    width = max((column_index_from_string(c.decode()) for c in columns), default=0)
+    return SheetScan(bounds, width, row_elements)
+
+
+def fill_merged_rows(
+    numbered_rows: Iterable[tuple[int, tuple]], bounds: list[tuple[int, int, int, int]], width: int
+) -> Iterable[tuple[int, tuple]]:
+    # Streaming equivalent of _fill_merged_cells: every cell of a merged range takes the top-left value.
+    # Streamed rows stop at their last stored cell, so pad them to the sheet width like a loaded sheet.
+    width = max([width] + [b[2] for b in bounds])
+    starting: dict[int, list[tuple[int, int, int, int]]] = {}
+    for b in bounds:
+        starting.setdefault(b[1], []).append(b)
+    active: list[tuple[tuple[int, int, int, int], Any]] = []
+    for row_num, row in numbered_rows:
+        if len(row) < width:
+            row = row + (None,) * (width - len(row))
+        new = starting.pop(row_num, [])
+        if not active and not new:
+            yield row_num, row
+            continue
+        cells = list(row)
+        for b in new:
+            active.append((b, cells[b[0] - 1] if b[0] - 1 < len(cells) else None))
+        active = [(b, v) for b, v in active if b[3] >= row_num]
+        for (min_col, _, max_col, _), value in active:
+            cells[min_col - 1 : max_col] = [value] * (max_col - min_col + 1)
+        yield row_num, tuple(cells)
+
+
+def ingest_xlsx(path: str | Path, rows: Any = None) -> IngestResult:
+    # `rows` may be a SpillList; the workbook is then read in read-only mode so rows can leave memory.
+    streaming = rows is not None
+    if rows is None:
+        rows = []
+    errors: list[str] = []
+    asset_refs = _extract_asset_refs(Path(path).read_bytes())
+    try:
+        wb = load_workbook(path, data_only=True, read_only=streaming)
+    except Exception as exc:
+        result = ingest_fallback(path, [f"xlsx parsing failed: {exc}"], asset_refs)
+        if streaming:
+            rows.extend(result.rows)
+            result.rows = rows
+        return result
+
+    sheet_timings: list[dict[str, Any]] = []
+    source_file = Path(path).name
+    archive = None
+    try:
+        if streaming:
+            # Merged ranges are scanned from the package directly, with sheet parts resolved through its relationships.
+            archive = zipfile.ZipFile(path)
+            sheet_paths = {sheet.title: sheet.path for sheet in workbook_sheets(archive)}
+        for ws in wb.worksheets:
+            if ws.sheet_state != "visible":
+                continue
+            sheet_started = time.perf_counter()
+            if streaming:
+                try:
+                    scan = scan_sheet_xml(archive, sheet_paths[ws.title], scan_width=ws.max_column is None)
+                except Exception as exc:
+                    errors.append(f"merge fill failed on {ws.title}: {exc}")
+                    scan = SheetScan([], 0, 0)
+                numbered = fill_merged_rows(
+                    enumerate(ws.iter_rows(min_row=1, values_only=True), start=1), scan.merged, ws.max_column or scan.width
+                )
+            else:
+                try:
+                    _fill_merged_cells(ws)
+                except Exception as exc:
+                    errors.append(f"merge fill failed on {ws.title}: {exc}")
+                numbered = enumerate(ws.iter_rows(min_row=1, values_only=True), start=1)
+            added = collect_sheet_rows(ws.title, numbered, source_file, rows)
+            sheet_timings.append({"sheet": ws.title, "rows": added, "wall_s": round(time.perf_counter() - sheet_started, 6)})
+    finally:
+        if streaming:
+            wb.close()
+        if archive is not None:
+            archive.close()
+
+    return IngestResult(
+        rows=rows, mode="xlsx", errors=errors, asset_refs=asset_refs, parser_stage="openxml", sheet_timings=sheet_timings
+    )
 
 
 def ingest_fallback(path: str | Path, pre_errors: list[str] | None = None, asset_refs: list[dict[str, str]] | None = None) -> IngestResult:
@@ -1,13 +1,13 @@
 from __future__ import annotations
 
-import re
 from dataclasses import dataclass
-from decimal import Decimal, InvalidOperation
-from typing import Any
+from itertools import islice
+from typing import Any, Callable
 
 from .crosswalk import CrosswalkRow
 from .ingest import SourceRow
 from .markup import MarkupProfile
+from .transforms import PART_NUMBER_FIELDS, FieldLookup, compile_plan
 
 
 @dataclass
@@ -17,34 +17,20 @@ class MappedRow:
     status_reason: str
 
 
+PROGRESS_EVERY_ROWS = 500
 NON_BLOCKING_REQUIRED_COLUMNS = {"part cost", "part price"}
-CATEGORY_SHEET_TOKENS = {
-    "gas furnaces",
-    "fan coils & heat strips",
-    "fan coils",
-    "evap coils",
-    "air conditioners",
-    "heat pumps",
-    "accessories",
-    "mobile home approved",
-    "crossover systems",
-    "ductless single-zone",
-    "ductless multi-zone",
-    "unitary & crossover",
-    "single zone dls",
-    "ducted solutions",
-    "multi-zone dls",
-}
-BRAND_HINTS = {
-    "bryant": "Bryant",
-    "carrier": "Carrier",
-    "day & night": "Day & Night",
-    "day and night": "Day & Night",
-    "temp control": "Temp Control",
-    "kinzer": "Kinzer",
-    "gallatin": "Gallatin",
-    "hollowtop": "Hollowtop",
-}
+# Columns the mapper itself writes around the plan's output columns.
+ROW_LAYOUT = (
+    "manufacturer_part_number_original",
+    "manufacturer_part_number_normalized",
+    "Status",
+    "Status Reason",
+    "Enrichment URL Hint",
+    "source_file",
+    "source_sheet",
+    "source_row_number",
+    "Asset Refs",
+)
 
 
 def _normalize_part_number(value: Any) -> str:
@@ -53,54 +39,6 @@ def _normalize_part_number(value: Any) -> str:
     return str(value).strip().upper().replace(" ", "")
 
 
-def _find_field(source: SourceRow, candidates: list[str]) -> Any:
-    lower_map = {k.lower(): v for k, v in source.values.items()}
-    for c in candidates:
-        cl = c.lower()
-        if cl in lower_map and str(lower_map[cl]).strip():
-            return lower_map[cl]
-    for header, value in lower_map.items():
-        if value in (None, ""):
-            continue
-        for c in candidates:
-            if c.lower() in header:
-                return value
-    return None
-
-
-def _parse_cost(value: Any) -> Decimal | None:
-    if value in (None, ""):
-        return None
-    text = str(value).strip().replace("$", "").replace(",", "")
-    try:
-        return Decimal(text)
-    except InvalidOperation:
-        return None
-
-
-def _infer_brand_from_filename(source_file: str) -> str | None:
-    sf = source_file.lower()
-    for token, brand in BRAND_HINTS.items():
-        if token in sf:
-            return brand
-    return None
-
-
-def _infer_manufacturer(source: SourceRow) -> str:
-    explicit = _find_field(source, ["manufacturer", "mfr", "brand"])
-    if explicit:
-        return str(explicit).strip()
-
-    brand_from_file = _infer_brand_from_filename(source.source_file)
-    if brand_from_file:
-        return brand_from_file
-
-    sheet = (source.source_sheet or "").strip()
-    if sheet.lower() in CATEGORY_SHEET_TOKENS:
-        return ""
-    return sheet
-
-
 def _manufacturer_site_hint(manufacturer: str | None, part_number: str | None) -> str | None:
     if not manufacturer or not part_number:
         return None
@@ -112,94 +50,144 @@ def _join_reason(prior: str, msg: str) -> str:
     return f"{prior};{msg}" if prior else msg
 
 
+class RowMapper:
+    # Maps batches of source rows, keeping dedup state and counters across calls. Column values come from the
+    # crosswalk compiled once into a TransformPlan; status checks stay per row.
+    def __init__(
+        self,
+        crosswalk: list[CrosswalkRow],
+        markup_profile: MarkupProfile,
+        labor_cost_default: float | None = None,
+        labor_rate_default: float | None = None,
+        asset_index: dict[tuple[str, int], list[str]] | None = None,
+    ) -> None:
+        self.crosswalk = crosswalk
+        self.markup_profile = markup_profile
+        self.labor_cost_default = labor_cost_default
+        self.labor_rate_default = labor_rate_default
+        # With extracted assets, each row lists the pictures and links anchored on it.
+        self.asset_index = asset_index
+        self.plan = compile_plan(crosswalk, markup_profile, labor_cost_default, labor_rate_default)
+        self.part_numbers = FieldLookup(PART_NUMBER_FIELDS)
+        self.seen_part_numbers: set[str] = set()
+        self.required_columns = [c.output_column for c in crosswalk if c.required]
+        # Crosswalk columns no plan step produces (e.g. system columns under other names) are emitted blank.
+        produced = {*ROW_LAYOUT, *self.plan.columns, *self.plan.extra_columns}
+        self.blank_columns = list(dict.fromkeys(c.output_column for c in crosswalk if c.output_column not in produced))
+        self.blocking_required = [
+            col for col in self.required_columns if col.strip().lower() not in NON_BLOCKING_REQUIRED_COLUMNS
+        ]
+        self.counters = {
+            "rows_total": 0,
+            "rows_processed": 0,
+            "rows_incomplete": 0,
+            "rows_manual_review": 0,
+            "rows_duplicates_ignored": 0,
+        }
+
+    def map(self, source: SourceRow) -> MappedRow | None:
+        mapped = self.map_batch([source])
+        return mapped[0] if mapped else None
+
+    def map_batch(self, sources: list[SourceRow]) -> list[MappedRow]:
+        self.counters["rows_total"] += len(sources)
+        shapes = [tuple(source.values) for source in sources]
+        kept: list[SourceRow] = []
+        kept_shapes: list[tuple[str, ...]] = []
+        part_numbers: list[Any] = []
+        normalized_keys: list[str] = []
+        for source, shape, part_number in zip(sources, shapes, self.part_numbers.column(sources, shapes)):
+            normalized = _normalize_part_number(part_number)
+            if normalized and normalized in self.seen_part_numbers:
+                self.counters["rows_duplicates_ignored"] += 1
+                continue
+            if normalized:
+                self.seen_part_numbers.add(normalized)
+            kept.append(source)
+            kept_shapes.append(shape)
+            part_numbers.append(part_number)
+            normalized_keys.append(normalized)
+
+        batch = self.plan.run(kept, part_numbers, kept_shapes)
+        columns = [(name, batch.columns[name]) for name in self.plan.columns[1:]]
+        extras = [(name, batch.columns[name]) for name in self.plan.extra_columns]
+        mpn = batch.columns["Manufacturer Part Number"]
+        out: list[MappedRow] = []
+        for i, source in enumerate(kept):
+            part_number = part_numbers[i]
+            out_row: dict[str, Any] = {
+                "Manufacturer Part Number": mpn[i],
+                "manufacturer_part_number_original": part_number,
+                "manufacturer_part_number_normalized": normalized_keys[i],
+            }
+            for name, values in columns:
+                out_row[name] = values[i]
+            out_row["Status"] = "processed"
+            out_row["Status Reason"] = ""
+            out_row["Enrichment URL Hint"] = _manufacturer_site_hint(
+                str(out_row["Manufacturer"]), str(part_number) if part_number else None
+            )
+            out_row["source_file"] = source.source_file
+            out_row["source_sheet"] = source.source_sheet
+            out_row["source_row_number"] = source.source_row_number
+            if self.asset_index is not None:
+                out_row["Asset Refs"] = "; ".join(self.asset_index.get((source.source_sheet, source.source_row_number), [])) or None
+            for name, values in extras:
+                out_row[name] = values[i]
+            for name in self.blank_columns:
+                out_row[name] = None
+
+            status, reason = "processed", ""
+            error = batch.errors.get(i)
+            if error is not None:
+                status, reason = "manual_review", error
+            elif out_row["Part Cost"] is None:
+                # Missing cost/price should not block row completion.
+                reason = "warning_missing_cost"
+            if not part_number:
+                status = "manual_review"
+                reason = _join_reason(reason, "missing_part_number")
+            blocking_missing_required = [col for col in self.blocking_required if out_row[col] in (None, "")]
+            if blocking_missing_required:
+                status = "manual_review"
+                reason = _join_reason(reason, "missing_required:" + ",".join(blocking_missing_required))
+            out_row["Status"] = status
+            out_row["Status Reason"] = reason
+
+            if status == "processed":
+                self.counters["rows_processed"] += 1
+            else:
+                self.counters["rows_manual_review"] += 1
+                self.counters["rows_incomplete"] += 1
+            out.append(MappedRow(row=out_row, status=status, status_reason=reason))
+        return out
+
+
 def map_rows(
     source_rows: list[SourceRow],
     crosswalk: list[CrosswalkRow],
     markup_profile: MarkupProfile,
     labor_cost_default: float | None = None,
     labor_rate_default: float | None = None,
+    progress: Callable[[str, int], None] | None = None,
+    output: list[MappedRow] | None = None,
+    asset_index: dict[tuple[str, int], list[str]] | None = None,
 ) -> tuple[list[MappedRow], dict[str, int]]:
-    output: list[MappedRow] = []
-    seen_part_numbers: set[str] = set()
-    required_columns = [c.output_column for c in crosswalk if c.required]
-
-    counters = {
-        "rows_total": len(source_rows),
-        "rows_processed": 0,
-        "rows_incomplete": 0,
-        "rows_manual_review": 0,
-        "rows_duplicates_ignored": 0,
-    }
-
-    for source in source_rows:
-        part_number = _find_field(source, ["manufacturer part number", "part number", "mfr part", "model", "item id", "item", "sku"])
-        normalized = _normalize_part_number(part_number)
-        if normalized and normalized in seen_part_numbers:
-            counters["rows_duplicates_ignored"] += 1
-            continue
-        if normalized:
-            seen_part_numbers.add(normalized)
-
-        source_description = _find_field(source, ["description", "item description", "item desc", "name"])
-        source_manufacturer = _infer_manufacturer(source)
-        cost_val = _find_field(source, ["cost", "net cost", "price", "customer cost", "net", "nsp", "your cost", "dealer"])
-        part_cost = _parse_cost(cost_val)
-
-        out_row: dict[str, Any] = {
-            "Manufacturer Part Number": part_number,
-            "manufacturer_part_number_original": part_number,
-            "manufacturer_part_number_normalized": normalized,
-            "Part Name": source.family_context or source_description,
-            "Description": source_description,
-            "Manufacturer": source_manufacturer,
-            "Category": source.source_sheet,
-            "Part Cost": float(part_cost) if part_cost is not None else None,
-            "Part Price": None,
-            "Labor Cost": labor_cost_default,
-            "Labor Rate": labor_rate_default,
-            "Labor Hours": None,
-            "Warranty": None,
-            "Status": "processed",
-            "Status Reason": "",
-            "Enrichment URL Hint": _manufacturer_site_hint(str(source_manufacturer), str(part_number) if part_number else None),
-            "source_file": source.source_file,
-            "source_sheet": source.source_sheet,
-            "source_row_number": source.source_row_number,
-        }
-
-        if part_cost is not None:
-            try:
-                out_row["Part Price"] = float(markup_profile.price_for_cost(part_cost))
-            except Exception as exc:
-                out_row["Status"] = "manual_review"
-                out_row["Status Reason"] = f"markup_error:{exc}"
-        else:
-            # Missing cost/price should not block row completion.
-            out_row["Status Reason"] = _join_reason(out_row["Status Reason"], "warning_missing_cost")
-
-        if not part_number:
-            out_row["Status"] = "manual_review"
-            out_row["Status Reason"] = _join_reason(out_row["Status Reason"], "missing_part_number")
-
-        blocking_missing_required = [
-            col for col in required_columns
-            if col.strip().lower() not in NON_BLOCKING_REQUIRED_COLUMNS and out_row.get(col) in (None, "")
-        ]
-        if blocking_missing_required:
-            out_row["Status"] = "manual_review"
-            req_msg = "missing_required:" + ",".join(blocking_missing_required)
-            out_row["Status Reason"] = _join_reason(out_row["Status Reason"], req_msg)
-
-        for cw in crosswalk:
-            out_row.setdefault(cw.output_column, out_row.get(cw.output_column))
-
-        status = out_row["Status"]
-        if status == "processed":
-            counters["rows_processed"] += 1
-        else:
-            counters["rows_manual_review"] += 1
-            counters["rows_incomplete"] += 1
-
-        output.append(MappedRow(row=out_row, status=out_row["Status"], status_reason=out_row["Status Reason"]))
-
-    return output, counters
+    # `output` may be a SpillList so mapped rows can leave memory; dedup keys always stay in memory.
+    if output is None:
+        output = []
+    mapper = RowMapper(crosswalk, markup_profile, labor_cost_default, labor_rate_default, asset_index)
+    rows = iter(source_rows)
+    mapped_total = 0
+    while True:
+        batch = list(islice(rows, PROGRESS_EVERY_ROWS))
+        if not batch:
+            break
+        output.extend(mapper.map_batch(batch))
+        mapped_total += len(batch)
+        if progress is not None and len(batch) == PROGRESS_EVERY_ROWS:
+            progress("rows_mapped", mapped_total)
+
+    if progress is not None:
+        progress("rows_mapped", mapped_total)
+    return output, mapper.counters
@@ -32,7 +32,10 @@ class MarkupProfile:
 
     @classmethod
     def from_file(cls, path: str | Path) -> "MarkupProfile":
-        data = json.loads(Path(path).read_text())
+        return cls.from_dict(json.loads(Path(path).read_text()))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "MarkupProfile":
         tiers = [
             MarkupTier(
                 min_cost=Decimal(str(t["min_cost"])),
@@ -0,0 +1,223 @@
+from __future__ import annotations
+
+import bisect
+import math
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+DURATION_BUCKETS = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+@dataclass
+class Histogram:
+    buckets: tuple[float, ...]
+    counts: list[int] = field(default_factory=list)
+    sum: float = 0.0
+    count: int = 0
+
+    def __post_init__(self) -> None:
+        if not self.counts:
+            self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float) -> None:
+        idx = bisect.bisect_left(self.buckets, value)
+        if idx < len(self.counts):
+            self.counts[idx] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, data: dict[str, Any]) -> None:
+        if tuple(data["buckets"]) != self.buckets:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [a + b for a, b in zip(self.counts, data["counts"])]
+        self.sum += data["sum"]
+        self.count += data["count"]
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"buckets": list(self.buckets), "counts": self.counts, "sum": round(self.sum, 6), "count": self.count}
+
+
+@dataclass
+class _Metric:
+    name: str
+    kind: str
+    help: str
+    labelnames: tuple[str, ...]
+    buckets: tuple[float, ...] = ()
+    series: dict[tuple[str, ...], Any] = field(default_factory=dict)
+
+
+def _format_labels(names: tuple[str, ...], values: tuple[str, ...], extra: str = "") -> str:
+    escaped = (v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"') for v in values)
+    parts = [f'{n}="{v}"' for n, v in zip(names, escaped)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class MetricsRegistry:
+    def __init__(self) -> None:
+        self._metrics: dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+        self.counter("pb_ingestor_files_total", "Source files converted, by ingest mode.", ("ingest_mode",))
+        self.counter("pb_ingestor_file_failures_total", "Source files that failed to convert, by stage.", ("stage",))
+        self.counter("pb_ingestor_files_skipped_unchanged_total", "Conversions skipped because the run fingerprint matched.")
+        self.counter("pb_ingestor_rows_total", "Mapped rows, by outcome.", ("status",))
+        self.counter("pb_ingestor_enrichment_parts_total", "Enriched parts, by outcome.", ("outcome",))
+        self.histogram(
+            "pb_ingestor_stage_duration_seconds", "Wall time per pipeline stage.", ("pipeline", "stage"), DURATION_BUCKETS
+        )
+        self.histogram(
+            "pb_ingestor_enrichment_http_request_duration_seconds", "Manufacturer site request latency.", (), HTTP_BUCKETS
+        )
+        self.histogram(
+            "pb_ingestor_http_request_duration_seconds", "Job API request latency.", ("method", "route", "code"), HTTP_BUCKETS
+        )
+        self.gauge("pb_ingestor_last_run_timestamp_seconds", "Unix time the metrics were last updated.")
+
+    def counter(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self._metrics.setdefault(name, _Metric(name, "counter", help, labelnames))
+
+    def gauge(self, name: str, help: str, labelnames: tuple[str, ...] = ()) -> None:
+        self._metrics.setdefault(name, _Metric(name, "gauge", help, labelnames))
+
+    def histogram(self, name: str, help: str, labelnames: tuple[str, ...], buckets: tuple[float, ...]) -> None:
+        self._metrics.setdefault(name, _Metric(name, "histogram", help, labelnames, buckets))
+
+    def _key(self, metric: _Metric, labels: dict[str, Any]) -> tuple[str, ...]:
+        if set(labels) != set(metric.labelnames):
+            raise ValueError(f"{metric.name} expects labels {metric.labelnames}, got {sorted(labels)}")
+        return tuple(str(labels[n]) for n in metric.labelnames)
+
+    def inc(self, name: str, amount: float = 1.0, **labels: Any) -> None:
+        metric = self._metrics[name]
+        with self._lock:
+            key = self._key(metric, labels)
+            metric.series[key] = metric.series.get(key, 0.0) + amount
+
+    def set(self, name: str, value: float, **labels: Any) -> None:
+        metric = self._metrics[name]
+        with self._lock:
+            metric.series[self._key(metric, labels)] = value
+
+    def _histogram(self, metric: _Metric, labels: dict[str, Any]) -> Histogram:
+        key = self._key(metric, labels)
+        if key not in metric.series:
+            metric.series[key] = Histogram(metric.buckets)
+        return metric.series[key]
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        metric = self._metrics[name]
+        with self._lock:
+            self._histogram(metric, labels).observe(value)
+
+    def merge_histogram(self, name: str, data: dict[str, Any], **labels: Any) -> None:
+        metric = self._metrics[name]
+        with self._lock:
+            self._histogram(metric, labels).merge(data)
+
+    def render(self) -> str:
+        lines: list[str] = []
+        with self._lock:
+            for metric in self._metrics.values():
+                lines.append(f"# HELP {metric.name} {metric.help}")
+                lines.append(f"# TYPE {metric.name} {metric.kind}")
+                for key, value in sorted(metric.series.items()):
+                    if metric.kind != "histogram":
+                        lines.append(f"{metric.name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+                        continue
+                    cumulative = 0
+                    for bound, count in zip(value.buckets, value.counts):
+                        cumulative += count
+                        le = _format_labels(metric.labelnames, key, f'le="{_format_value(bound)}"')
+                        lines.append(f"{metric.name}_bucket{le} {cumulative}")
+                    le = _format_labels(metric.labelnames, key, 'le="+Inf"')
+                    lines.append(f"{metric.name}_bucket{le} {value.count}")
+                    lines.append(f"{metric.name}_sum{_format_labels(metric.labelnames, key)} {_format_value(value.sum)}")
+                    lines.append(f"{metric.name}_count{_format_labels(metric.labelnames, key)} {value.count}")
+        return "\n".join(lines) + "\n"
+
+    def write_textfile(self, path: str | Path) -> None:
+        # node_exporter's textfile collector may read at any time, so replace the file atomically.
+        self.set("pb_ingestor_last_run_timestamp_seconds", time.time())
+        target = Path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{target.name}.{os.getpid()}.tmp")
+        tmp.write_text(self.render())
+        os.replace(tmp, target)
+
+
+ROW_STATUS_KEYS = {
+    "rows_processed": "processed",
+    "rows_incomplete": "incomplete",
+    "rows_manual_review": "manual_review",
+    "rows_duplicates_ignored": "duplicates_ignored",
+}
+ENRICHMENT_OUTCOMES = ("enriched", "not_found", "ambiguous", "blocked")
+
+
+def _record_stages(registry: MetricsRegistry, pipeline: str, performance: dict[str, Any] | None) -> None:
+    for stage in (performance or {}).get("stages", []):
+        registry.observe("pb_ingestor_stage_duration_seconds", stage["wall_s"], pipeline=pipeline, stage=stage["stage"])
+
+
+def record_conversion(registry: MetricsRegistry, result: dict[str, Any]) -> None:
+    if result.get("skipped_unchanged"):
+        registry.inc("pb_ingestor_files_skipped_unchanged_total")
+        return
+    registry.inc("pb_ingestor_files_total", ingest_mode=result["ingest_mode"])
+    for key, status in ROW_STATUS_KEYS.items():
+        registry.inc("pb_ingestor_rows_total", result["summary"].get(key, 0), status=status)
+    _record_stages(registry, "convert", result.get("performance"))
+
+
+def record_failure(registry: MetricsRegistry, failure: dict[str, Any]) -> None:
+    registry.inc("pb_ingestor_file_failures_total", stage=failure["error_stage"])
+
+
+def record_enrichment(registry: MetricsRegistry, qa: dict[str, Any]) -> None:
+    for outcome in ENRICHMENT_OUTCOMES:
+        registry.inc("pb_ingestor_enrichment_parts_total", qa["summary"].get(outcome, 0), outcome=outcome)
+    _record_stages(registry, "enrich", qa.get("performance"))
+    if qa.get("http_latency"):
+        registry.merge_histogram("pb_ingestor_enrichment_http_request_duration_seconds", qa["http_latency"])
+
+
+def send_metrics(handler: BaseHTTPRequestHandler, registry: MetricsRegistry) -> None:
+    body = registry.render().encode()
+    handler.send_response(200)
+    handler.send_header("Content-Type", CONTENT_TYPE)
+    handler.send_header("Content-Length", str(len(body)))
+    handler.end_headers()
+    handler.wfile.write(body)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_GET(self) -> None:
+        if self.path.split("?", 1)[0] == "/metrics":
+            send_metrics(self, self.registry)
+            return
+        self.send_error(404)
+
+
+def make_metrics_server(host: str, port: int, registry: MetricsRegistry) -> ThreadingHTTPServer:
+    handler = type("MetricsHandler", (_MetricsHandler,), {"registry": registry})
+    return ThreadingHTTPServer((host, port), handler)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import posixpath
+import zipfile
+from dataclasses import dataclass
+from xml.etree.ElementTree import fromstring
+
+# Package-level reading of an xlsx archive shared by the sampler and the asset extractor.
+_REL_NS = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+@dataclass
+class WorkbookSheet:
+    title: str
+    state: str
+    path: str
+
+
+@dataclass
+class PartRel:
+    type: str
+    target: str
+    external: bool
+
+
+def part_rels(archive: zipfile.ZipFile, part: str) -> dict[str, PartRel]:
+    # Relationships of one package part, with internal targets resolved to archive member names.
+    folder, name = posixpath.split(part)
+    rels_path = posixpath.join(folder, "_rels", f"{name}.rels")
+    if rels_path not in archive.NameToInfo:
+        return {}
+    rels = {}
+    for rel in fromstring(archive.read(rels_path)):
+        target = rel.get("Target", "")
+        external = rel.get("TargetMode") == "External"
+        if not external:
+            target = target.lstrip("/") if target.startswith("/") else posixpath.normpath(posixpath.join(folder, target))
+        rels[rel.get("Id", "")] = PartRel(rel.get("Type", "").rsplit("/", 1)[-1], target, external)
+    return rels
+
+
+def workbook_sheets(archive: zipfile.ZipFile) -> list[WorkbookSheet]:
+    rels = part_rels(archive, "xl/workbook.xml")
+    sheets = []
+    for elem in fromstring(archive.read("xl/workbook.xml")).iter():
+        if _local(elem.tag) == "sheet":
+            rel = rels.get(elem.get(_REL_NS, ""))
+            sheets.append(WorkbookSheet(elem.get("name", ""), elem.get("state", "visible"), rel.target if rel else ""))
+    return sheets
@@ -2,15 +2,22 @@ from __future__ import annotations
 
 import csv
 import json
+from copy import copy
+from dataclasses import dataclass
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any
+from typing import Any, BinaryIO, Iterable, Iterator
 
-from openpyxl import load_workbook
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell import WriteOnlyCell
 
 from .crosswalk import CrosswalkRow
 from .mapper import MappedRow
 
+EXCEL_MAX_ROWS = 1_048_576
+# _find_header_row looks this far down a template sheet; books shorter than the limit by this much always fit.
+HEADER_SCAN_ROWS = 60
+
 
 def write_normalized_csv(mapped: list[MappedRow], output_path: str | Path) -> None:
     output_file = Path(output_path)
@@ -32,31 +39,34 @@ def write_normalized_csv(mapped: list[MappedRow], output_path: str | Path) -> No
 
 
 def write_manual_review_csv(mapped: list[MappedRow], output_path: str | Path) -> None:
-    manual = [m.row for m in mapped if m.status != "processed"]
+    # Two passes over `mapped` rather than a filtered copy, so spilled rows are streamed, not collected.
     output_file = Path(output_path)
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    if not manual:
-        output_file.write_text("Status,Status Reason\n")
-        return
 
     cols: list[str] = []
     seen = set()
-    for r in manual:
-        for k in r:
+    for m in mapped:
+        if m.status == "processed":
+            continue
+        for k in m.row:
             if k not in seen:
                 seen.add(k)
                 cols.append(k)
+    if not cols:
+        output_file.write_text("Status,Status Reason\n")
+        return
 
     with output_file.open("w", newline="") as f:
         writer = csv.DictWriter(f, fieldnames=cols)
         writer.writeheader()
-        for row in manual:
-            writer.writerow(row)
+        for m in mapped:
+            if m.status != "processed":
+                writer.writerow(m.row)
 
 
 def _find_header_row(ws, target_columns: list[str]):
     wanted = {c.strip().lower() for c in target_columns}
-    for row_idx in range(1, min(60, ws.max_row) + 1):
+    for row_idx in range(1, min(HEADER_SCAN_ROWS, ws.max_row) + 1):
         headers = [str(ws.cell(row=row_idx, column=col).value or "").strip().lower() for col in range(1, ws.max_column + 1)]
         overlap = sum(1 for h in headers if h and h in wanted)
         if overlap >= max(1, min(3, len(wanted))):
@@ -66,7 +76,7 @@ def _find_header_row(ws, target_columns: list[str]):
 
 def write_template_workbook(
     mapped: list[MappedRow],
-    template_path: str | Path,
+    template_path: str | Path | BinaryIO,
     output_workbook_path: str | Path,
     crosswalk: list[CrosswalkRow],
 ) -> None:
@@ -97,6 +107,144 @@ def write_template_workbook(
     wb.save(out)
 
 
+def _styled(ws, src, value: Any, styles: dict[tuple, Any]) -> Any:
+    if not src.has_style:
+        return value
+    cell = WriteOnlyCell(ws, value)
+    key = tuple(src._style)
+    if key not in styles:
+        # Register the template style in the new workbook once; later cells reuse the resulting indices.
+        cell.font = copy(src.font)
+        cell.fill = copy(src.fill)
+        cell.border = copy(src.border)
+        cell.alignment = copy(src.alignment)
+        cell.protection = copy(src.protection)
+        cell.number_format = src.number_format
+        styles[key] = copy(cell._style)
+    else:
+        cell._style = copy(styles[key])
+    return cell
+
+
+@dataclass
+class _SheetLayout:
+    ws: Any
+    rows: list[tuple]
+    width: int
+    header_row: int
+    writes: dict[int, str]
+
+
+@dataclass
+class CompiledTemplate:
+    sheets: list[_SheetLayout]
+
+    @property
+    def columns(self) -> list[str]:
+        # Every mapped column some data sheet writes, in first-written order.
+        return list(dict.fromkeys(name for sheet in self.sheets for name in sheet.writes.values()))
+
+    @property
+    def row_capacity(self) -> int:
+        # Mapped rows that fit below the deepest header row before Excel's sheet limit.
+        header_rows = [sheet.header_row for sheet in self.sheets if sheet.writes]
+        return EXCEL_MAX_ROWS - max(header_rows, default=0)
+
+
+def compile_template(template_path: str | Path | BinaryIO, crosswalk: list[CrosswalkRow]) -> CompiledTemplate:
+    # Loads the template and resolves header rows and target columns once; write_compiled_template can then
+    # write any number of workbooks (or shards) from it.
+    template = load_workbook(template_path)
+    by_sheet: dict[str, list[CrosswalkRow]] = {}
+    for row in crosswalk:
+        by_sheet.setdefault(row.output_sheet, []).append(row)
+
+    sheets: list[_SheetLayout] = []
+    for ws in template.worksheets:
+        writes: dict[int, str] = {}
+        header_row = ws.max_row
+        if ws.title in by_sheet:
+            cw_rows = by_sheet[ws.title]
+            header_row, header_cells = _find_header_row(ws, [c.output_column for c in cw_rows])
+            col_idx = {header_cells[i]: i + 1 for i in range(len(header_cells)) if header_cells[i]}
+            for cw in cw_rows:
+                lc = cw.output_column.strip().lower()
+                if lc in col_idx:
+                    writes[col_idx[lc]] = cw.output_column
+        template_rows = list(ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=1, max_col=ws.max_column))
+        sheets.append(_SheetLayout(ws, template_rows, max([ws.max_column] + list(writes)), header_row, writes))
+    return CompiledTemplate(sheets)
+
+
+def write_compiled_template(
+    compiled: CompiledTemplate,
+    rows: Iterable[dict[str, Any]],
+    output_workbook_path: str | Path | BinaryIO,
+) -> None:
+    # `rows` must be re-iterable: each data sheet reads them from the start, as the in-memory writer does.
+    wb = Workbook(write_only=True)
+    styles: dict[tuple, Any] = {}
+    for sheet in compiled.sheets:
+        ws = sheet.ws
+        out_ws = wb.create_sheet(ws.title)
+        out_ws.sheet_state = ws.sheet_state
+        out_ws.freeze_panes = ws.freeze_panes
+        for key, dim in ws.column_dimensions.items():
+            out_ws.column_dimensions[key].width = dim.width
+            out_ws.column_dimensions[key].hidden = dim.hidden
+        for merged in ws.merged_cells.ranges:
+            out_ws.merged_cells.add(str(merged))
+        for dv in ws.data_validations.dataValidation:
+            out_ws.data_validations.append(copy(dv))
+
+        writes = sheet.writes
+        rows_iter: Iterator[dict[str, Any]] | None = iter(rows) if writes else None
+        row_num = 0
+        while True:
+            row_num += 1
+            values_row = next(rows_iter, None) if rows_iter is not None and row_num > sheet.header_row else None
+            if values_row is None and row_num > len(sheet.rows):
+                break
+            if row_num > EXCEL_MAX_ROWS:
+                raise ValueError(
+                    f"{ws.title} needs more than Excel's {EXCEL_MAX_ROWS} rows; shard the workbook (--shard-rows, --shard-mb or --shard-by)"
+                )
+            template_cells = sheet.rows[row_num - 1] if row_num <= len(sheet.rows) else ()
+            values = []
+            for col in range(1, sheet.width + 1):
+                src = template_cells[col - 1] if col <= len(template_cells) else None
+                value = src.value if src is not None else None
+                if values_row is not None and col in writes:
+                    value = values_row.get(writes[col])
+                values.append(_styled(out_ws, src, value, styles) if src is not None else value)
+            out_ws.append(values)
+
+    if isinstance(output_workbook_path, (str, Path)):
+        Path(output_workbook_path).parent.mkdir(parents=True, exist_ok=True)
+    wb.save(output_workbook_path)
+
+
+class _RowDicts:
+    def __init__(self, mapped: Iterable[MappedRow]) -> None:
+        self.mapped = mapped
+
+    def __iter__(self) -> Iterator[dict[str, Any]]:
+        for m in self.mapped:
+            yield m.row
+
+
+def write_template_workbook_streaming(
+    mapped: list[MappedRow],
+    template_path: str | Path | BinaryIO,
+    output_workbook_path: str | Path,
+    crosswalk: list[CrosswalkRow],
+) -> None:
+    # Same cells as write_template_workbook, but rows are streamed into a write-only workbook instead of
+    # filling the loaded template in memory. Sheet layout (widths, freeze panes, merges, data validation)
+    # is copied; template extras such as images and comments are not.
+    write_compiled_template(compile_template(template_path, crosswalk), _RowDicts(mapped), output_workbook_path)
+
+
 def write_qa_json(
     qa_path: str | Path,
     counters: dict[str, int],
@@ -104,6 +252,8 @@ def write_qa_json(
     ingest_errors: list[str],
     source_file: str,
     asset_refs: list[dict[str, str]],
+    performance: dict[str, Any] | None = None,
+    validate: bool = False,
 ) -> None:
     qa_file = Path(qa_path)
     qa_file.parent.mkdir(parents=True, exist_ok=True)
@@ -129,5 +279,11 @@ def write_qa_json(
         ],
         "asset_refs": asset_refs,
     }
+    if performance is not None:
+        report["performance"] = performance
+    if validate:
+        from .validation import validate_qa_report
+
+        validate_qa_report(report)
 
     qa_file.write_text(json.dumps(report, indent=2))
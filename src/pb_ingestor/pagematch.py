@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+from collections import deque
+from typing import Iterable, Iterator
+
+SNIPPET_BEFORE = 120
+SNIPPET_AFTER = 230
+
+
+class AhoCorasick:
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[str]] = [[]]
+        for pattern in patterns:
+            if pattern:
+                self._insert(pattern)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        if pattern not in self._out[node]:
+            self._out[node].append(pattern)
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(ch, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child].extend(self._out[self._fail[child]])
+
+    def finditer(self, text: str) -> Iterator[tuple[int, str]]:
+        node = 0
+        goto, fail, out = self._goto, self._fail, self._out
+        for idx, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pattern in out[node]:
+                yield idx - len(pattern) + 1, pattern
+
+
+def _is_bounded(text: str, start: int, end: int) -> bool:
+    before = text[start - 1] if start > 0 else " "
+    after = text[end] if end < len(text) else " "
+    return not before.isalnum() and not after.isalnum()
+
+
+class PageMatcher:
+    def __init__(self) -> None:
+        self._parts: dict[str, dict[str, str]] = {}
+        self._automata: dict[str, AhoCorasick] = {}
+        self._done: set[tuple[str, str]] = set()
+        self._resolved: dict[tuple[str, str], dict[str, str | None]] = {}
+        self.pages_scanned = 0
+        self.rows_resolved = 0
+
+    @staticmethod
+    def _key(part_number: str, manufacturer: str | None) -> tuple[str, str]:
+        return (manufacturer or "").strip().lower(), part_number.strip().lower()
+
+    def register(self, part_number: str, manufacturer: str | None) -> None:
+        m_key, p_key = self._key(part_number, manufacturer)
+        if not p_key:
+            return
+        self._parts.setdefault(m_key, {})[p_key] = part_number.strip()
+        self._automata.pop(m_key, None)
+
+    def take(self, part_number: str, manufacturer: str | None) -> dict[str, str | None] | None:
+        key = self._key(part_number, manufacturer)
+        self._done.add(key)
+        return self._resolved.pop(key, None)
+
+    def scan(self, manufacturer: str | None, url: str, text: str, title: str | None) -> int:
+        m_key = (manufacturer or "").strip().lower()
+        parts = self._parts.get(m_key)
+        if not parts or not text:
+            return 0
+        automaton = self._automata.get(m_key)
+        if automaton is None:
+            automaton = self._automata[m_key] = AhoCorasick(parts)
+        self.pages_scanned += 1
+
+        lowered = text.lower()
+        title_lower = (title or "").lower()
+        found = 0
+        for start, pattern in automaton.finditer(lowered):
+            key = (m_key, pattern)
+            if key in self._done or key in self._resolved:
+                continue
+            end = start + len(pattern)
+            if not _is_bounded(lowered, start, end):
+                continue
+            in_title = pattern in title_lower
+            self._resolved[key] = {
+                "part_name": title if in_title else None,
+                "snippet": text[max(0, start - SNIPPET_BEFORE) : end + SNIPPET_AFTER].strip(),
+                "source_url": url,
+                "confidence": "high" if in_title else "medium",
+            }
+            found += 1
+        self.rows_resolved += found
+        return found
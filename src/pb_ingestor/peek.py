@@ -0,0 +1,38 @@
+from __future__ import annotations
+
+import re
+import zipfile
+from pathlib import Path
+
+# Sheets without a <dimension> (and non-zip sources) are sized from their bytes.
+XML_BYTES_PER_ROW = 400
+TEXT_BYTES_PER_ROW = 60
+_PEEK_BYTES = 4096
+_DIMENSION = re.compile(rb'<(?:\w+:)?dimension\s+ref="[A-Z]+([0-9]+)(?::[A-Z]+([0-9]+))?"')
+
+
+def peek_workbook(path: str | Path) -> tuple[int, int, int]:
+    # (bytes, sheets, estimated rows) from the zip directory and the first few KB of each sheet, never a full parse.
+    path = Path(path)
+    try:
+        size = path.stat().st_size
+    except OSError:
+        return 0, 0, 0
+    try:
+        with zipfile.ZipFile(path) as archive:
+            sheets = rows = 0
+            for info in archive.infolist():
+                if not (info.filename.startswith("xl/worksheets/") and info.filename.endswith(".xml")):
+                    continue
+                sheets += 1
+                by_size = info.file_size // XML_BYTES_PER_ROW
+                with archive.open(info) as fh:
+                    match = _DIMENSION.search(fh.read(_PEEK_BYTES))
+                if match and match.group(2):
+                    # Some writers declare the whole grid; a row cannot take less than a few dozen bytes of XML.
+                    rows += min(int(match.group(2)) - int(match.group(1)) + 1, info.file_size // 20 + 1)
+                else:
+                    rows += by_size
+            return size, sheets, rows
+    except (zipfile.BadZipFile, OSError):
+        return size, 0, size // TEXT_BYTES_PER_ROW
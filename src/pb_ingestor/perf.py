@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from contextlib import ExitStack, contextmanager
+from pathlib import Path
+from typing import Any, Iterator
+
+from .profiling import StageProfiler
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None  # type: ignore[assignment]
+
+PERFORMANCE_FORMAT = "pb-ingestor-performance/1"
+_MB = 1024 * 1024
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes elsewhere.
+    return round(peak / _MB if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def profile_dir_for(qa_json: str | Path) -> Path:
+    return Path(qa_json).with_suffix(".profile")
+
+
+class PerfRecorder:
+    def __init__(self, trace_memory: bool = False, profile_dir: str | Path | None = None) -> None:
+        self.trace_memory = trace_memory
+        self.profiler = StageProfiler(profile_dir) if profile_dir is not None else None
+        self.stages: list[dict[str, Any]] = []
+        self.sheets: list[dict[str, Any]] = []
+        self._started_tracing = False
+
+    @contextmanager
+    def stage(self, name: str, rows: int | None = None) -> Iterator[dict[str, Any]]:
+        record: dict[str, Any] = {"stage": name, "rows": rows}
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        with ExitStack() as stack:
+            if self.profiler is not None:
+                stack.enter_context(self.profiler.profile(name))
+            # Registered last so it runs before the profiler dumps its files.
+            stack.callback(self._finish, record, time.perf_counter(), time.process_time())
+            yield record
+
+    def _finish(self, record: dict[str, Any], wall: float, cpu: float) -> None:
+        self.record(record, time.perf_counter() - wall, time.process_time() - cpu)
+
+    def record(self, record: dict[str, Any], wall_s: float, cpu_s: float) -> None:
+        record["wall_s"] = round(wall_s, 6)
+        record["cpu_s"] = round(cpu_s, 6)
+        rows = record["rows"]
+        record["rows_per_s"] = round(rows / record["wall_s"], 1) if rows and record["wall_s"] > 0 else None
+        record["peak_rss_mb"] = peak_rss_mb()
+        if self.trace_memory:
+            record["tracemalloc_peak_mb"] = round(tracemalloc.get_traced_memory()[1] / _MB, 3)
+        self.stages.append(record)
+
+    def stop(self) -> None:
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def report(self) -> dict[str, Any]:
+        self.stop()
+        return {
+            "format": PERFORMANCE_FORMAT,
+            "total_wall_s": round(sum(s["wall_s"] for s in self.stages), 6),
+            "total_cpu_s": round(sum(s["cpu_s"] for s in self.stages), 6),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": self.stages,
+            "sheets": self.sheets,
+            **({"profile_files": self.profiler.files} if self.profiler is not None else {}),
+        }
+
+
+def aggregate_performance(reports: list[dict[str, Any]]) -> dict[str, Any]:
+    stages: dict[str, dict[str, Any]] = {}
+    for report in reports:
+        for stage in report.get("stages", []):
+            agg = stages.setdefault(stage["stage"], {"stage": stage["stage"], "runs": 0, "rows": 0, "wall_s": 0.0, "cpu_s": 0.0, "max_wall_s": 0.0})
+            agg["runs"] += 1
+            agg["rows"] += stage.get("rows") or 0
+            agg["wall_s"] += stage["wall_s"]
+            agg["cpu_s"] += stage["cpu_s"]
+            agg["max_wall_s"] = max(agg["max_wall_s"], stage["wall_s"])
+    for agg in stages.values():
+        agg["wall_s"] = round(agg["wall_s"], 6)
+        agg["cpu_s"] = round(agg["cpu_s"], 6)
+        agg["rows_per_s"] = round(agg["rows"] / agg["wall_s"], 1) if agg["rows"] and agg["wall_s"] > 0 else None
+    peaks = [r["peak_rss_mb"] for r in reports if r.get("peak_rss_mb") is not None]
+    return {
+        "format": PERFORMANCE_FORMAT,
+        "files": len(reports),
+        "total_wall_s": round(sum(r.get("total_wall_s", 0.0) for r in reports), 6),
+        "total_cpu_s": round(sum(r.get("total_cpu_s", 0.0) for r in reports), 6),
+        "max_peak_rss_mb": max(peaks) if peaks else None,
+        "stages": list(stages.values()),
+    }
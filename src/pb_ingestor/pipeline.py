@@ -1,13 +1,50 @@
 from __future__ import annotations
 
+import time
+import zipfile
+from contextlib import contextmanager, nullcontext
+from io import BytesIO
 from pathlib import Path
+from typing import Callable, Iterator
 
-from .crosswalk import infer_base_template_path, infer_crosswalk_path, load_crosswalk
-from .enrichment import enrich_csv
+from .assets import extract_assets, row_asset_index
+from .configs import CONFIGS, ConfigRegistry
+from .crosswalk import infer_base_template_path, infer_crosswalk_path
+from .fingerprint import load_unchanged_result, run_fingerprint, store_fingerprint
 from .ingest import ingest_xlsx
-from .mapper import map_rows
-from .markup import MarkupProfile
-from .output import write_manual_review_csv, write_normalized_csv, write_qa_json, write_template_workbook
+from .mapper import RowMapper, map_rows
+from .output import (
+    write_manual_review_csv,
+    write_normalized_csv,
+    write_qa_json,
+    write_template_workbook,
+    write_template_workbook_streaming,
+)
+from .peek import peek_workbook
+from .perf import PerfRecorder, profile_dir_for
+from .pipelined import StageFailed, run_pipelined
+from .sharding import ShardSpec, needs_sharding, remove_workbook_shards, write_workbook_shards
+from .spill import SpillStore
+
+
+class ConversionError(RuntimeError):
+    def __init__(self, stage: str, message: str) -> None:
+        super().__init__(f"{stage} failed: {message}")
+        self.stage = stage
+        self.message = message
+
+    def __reduce__(self):
+        return (ConversionError, (self.stage, self.message))
+
+
+@contextmanager
+def _stage(name: str) -> Iterator[None]:
+    try:
+        yield
+    except ConversionError:
+        raise
+    except Exception as exc:
+        raise ConversionError(name, str(exc) or type(exc).__name__) from exc
 
 
 def run_conversion(
@@ -22,45 +59,206 @@ def run_conversion(
     template_path: str | None = None,
     labor_cost_default: float | None = None,
     labor_rate_default: float | None = None,
+    skip_unchanged: bool = False,
+    configs: ConfigRegistry | None = None,
+    progress: Callable[[str, int], None] | None = None,
+    trace_memory: bool = False,
+    profile: bool = False,
+    validate_qa: bool = False,
+    memory_budget_mb: float | None = None,
+    spill_dir: str | None = None,
+    pipelined: bool = False,
+    assets_dir: str | None = None,
+    shard_rows: int | None = None,
+    shard_mb: float | None = None,
+    shard_by: str | None = None,
+    shard_workers: int | None = None,
 ) -> dict:
-    crosswalk_file = Path(crosswalk_path) if crosswalk_path else infer_crosswalk_path(template_type)
-    template_file = Path(template_path) if template_path else infer_base_template_path(template_type)
-
-    crosswalk = load_crosswalk(crosswalk_file)
-    markup = MarkupProfile.from_file(markup_profile_path)
-    ingest_result = ingest_xlsx(source)
-
-    mapped, counters = map_rows(
-        ingest_result.rows,
-        crosswalk,
-        markup,
-        labor_cost_default=labor_cost_default,
-        labor_rate_default=labor_rate_default,
-    )
+    if pipelined and (profile or trace_memory):
+        raise ValueError("--pipelined cannot be combined with --profile or --trace-memory")
+    shard_spec = ShardSpec(shard_rows, shard_mb, shard_by)
+    perf = PerfRecorder(trace_memory=trace_memory, profile_dir=profile_dir_for(qa_json) if profile else None)
+    with _stage("config"):
+        crosswalk_file = Path(crosswalk_path) if crosswalk_path else infer_crosswalk_path(template_type)
+        template_file = Path(template_path) if template_path else infer_base_template_path(template_type)
+        outputs = {
+            "output_csv": output_csv,
+            "output_workbook": output_workbook,
+            "qa_json": qa_json,
+            "manual_review_csv": manual_review_csv,
+        }
 
-    write_normalized_csv(mapped, output_csv)
-    write_template_workbook(mapped, template_file, output_workbook, crosswalk)
-    write_manual_review_csv(mapped, manual_review_csv)
-    write_qa_json(
-        qa_json,
-        counters,
-        ingest_result.mode,
-        ingest_result.errors,
-        source_file=Path(source).name,
-        asset_refs=ingest_result.asset_refs,
-    )
+    with _stage("ingest"):
+        if not Path(source).is_file():
+            raise FileNotFoundError(f"Source file not found: {source}")
 
-    return {
+    with _stage("fingerprint"):
+        fingerprint = run_fingerprint(
+            inputs={
+                "source": source,
+                "crosswalk": crosswalk_file,
+                "template": template_file,
+                "markup_profile": markup_profile_path,
+            },
+            settings={
+                "template_type": template_type,
+                "labor_cost_default": labor_cost_default,
+                "labor_rate_default": labor_rate_default,
+                "memory_budget_mb": memory_budget_mb,
+                "assets_dir": assets_dir,
+                "shard_rows": shard_rows,
+                "shard_mb": shard_mb,
+                "shard_by": shard_by,
+            },
+            outputs=outputs,
+        )
+        if skip_unchanged and not profile:
+            previous = load_unchanged_result(qa_json, fingerprint)
+            if previous is not None:
+                return {**previous, "skipped_unchanged": True}
+
+    with _stage("config"), perf.stage("config"):
+        # Parsed once per process and reused until the file changes on disk.
+        configs = configs or CONFIGS
+        crosswalk = configs.crosswalk(crosswalk_file)
+        markup = configs.markup(markup_profile_path)
+        template_bytes = configs.template_bytes(template_file)
+        template_source = BytesIO(template_bytes)
+
+    assets = None
+    asset_index = None
+    shards = None
+    if assets_dir:
+        with _stage("assets"), perf.stage("assets") as timing:
+            assets = extract_assets(source, assets_dir)
+            asset_index = row_asset_index(assets.refs)
+            timing["rows"] = len(assets.refs)
+
+    # With a memory budget, rows past the budget live in a temporary SQLite file and outputs stream from it.
+    with SpillStore(memory_budget_mb, spill_dir) if memory_budget_mb else nullcontext() as spill:
+        if pipelined:
+            pipeline_started = time.perf_counter()
+            mapper = RowMapper(crosswalk, markup, labor_cost_default, labor_rate_default, asset_index)
+            try:
+                ingest_result, mapped, queues = run_pipelined(
+                    source,
+                    mapper,
+                    template_source,
+                    crosswalk,
+                    output_csv,
+                    output_workbook,
+                    manual_review_csv,
+                    perf,
+                    kept=spill.list("mapped_rows") if spill is not None else None,
+                    progress=progress,
+                    write_workbook=not shard_spec.requested,
+                )
+            except StageFailed as exc:
+                raise ConversionError(exc.stage, str(exc.error) or type(exc.error).__name__) from exc.error
+            counters = mapper.counters
+            perf.sheets = ingest_result.sheet_timings
+            if shard_spec.requested:
+                with _stage("write"), perf.stage("write_workbook", rows=len(mapped)):
+                    shards = write_workbook_shards(mapped, template_bytes, crosswalk, output_workbook, shard_spec, shard_workers)
+            pipeline_wall_s = time.perf_counter() - pipeline_started
+        else:
+            with _stage("ingest"), perf.stage("ingest") as timing:
+                if spill is not None:
+                    ingest_result = ingest_xlsx(source, rows=spill.list("source_rows"))
+                else:
+                    ingest_result = ingest_xlsx(source)
+                timing["rows"] = len(ingest_result.rows)
+            perf.sheets = ingest_result.sheet_timings
+            if progress is not None:
+                progress("rows_ingested", len(ingest_result.rows))
+
+            with _stage("map"), perf.stage("map", rows=len(ingest_result.rows)):
+                mapped, counters = map_rows(
+                    ingest_result.rows,
+                    crosswalk,
+                    markup,
+                    labor_cost_default=labor_cost_default,
+                    labor_rate_default=labor_rate_default,
+                    progress=progress,
+                    output=spill.list("mapped_rows") if spill is not None else None,
+                    asset_index=asset_index,
+                )
+            if spill is not None:
+                ingest_result.rows.clear()
+
+            with _stage("write"):
+                with perf.stage("write_csv", rows=len(mapped)):
+                    write_normalized_csv(mapped, output_csv)
+                with perf.stage("write_workbook", rows=len(mapped)):
+                    if needs_sharding(len(mapped), shard_spec):
+                        # None when the book turns out to fit the template's sheet after all.
+                        shards = write_workbook_shards(mapped, template_bytes, crosswalk, output_workbook, shard_spec, shard_workers)
+                    if shards is None and spill is not None:
+                        write_template_workbook_streaming(mapped, template_source, output_workbook, crosswalk)
+                    elif shards is None:
+                        write_template_workbook(mapped, template_source, output_workbook, crosswalk)
+                with perf.stage("write_manual_review", rows=counters["rows_manual_review"]):
+                    write_manual_review_csv(mapped, manual_review_csv)
+        with _stage("write"):
+            if shards is None:
+                remove_workbook_shards(output_workbook)
+            performance = perf.report()
+            # The scheduler's cheap peek of this source, recorded so later runs can scale this one's costs.
+            size, _, estimated_rows = peek_workbook(source)
+            performance["source"] = {"bytes": size, "estimated_rows": estimated_rows}
+            if spill is not None:
+                performance["spill"] = spill.stats()
+            if assets is not None:
+                performance["assets"] = assets.stats()
+                # Package parts replace the filename matches; non-zip sources keep them.
+                if assets.refs or zipfile.is_zipfile(source):
+                    ingest_result.asset_refs = assets.as_dicts()
+                ingest_result.errors.extend(assets.errors)
+            if shards is not None:
+                performance["shards"] = {
+                    "shards": len(shards["shards"]),
+                    "max_rows_per_shard": shards["max_rows_per_shard"],
+                    "bytes": sum(s["bytes"] for s in shards["shards"]),
+                    "workers": shards["workers"],
+                }
+            if pipelined:
+                # Stage times overlap, so the run's wall time is the pipeline's, not the sum of stages.
+                config_wall_s = sum(s["wall_s"] for s in performance["stages"] if s["stage"] == "config")
+                performance["total_wall_s"] = round(config_wall_s + pipeline_wall_s, 6)
+                performance["pipeline"] = {"wall_s": round(pipeline_wall_s, 6), "queues": queues}
+            write_qa_json(
+                qa_json,
+                counters,
+                ingest_result.mode,
+                ingest_result.errors,
+                source_file=Path(source).name,
+                asset_refs=ingest_result.asset_refs,
+                performance=performance,
+                validate=validate_qa,
+            )
+    if progress is not None:
+        progress("rows_written", len(mapped))
+
+    result = {
         "summary": counters,
         "ingest_mode": ingest_result.mode,
         "parser_stage": ingest_result.parser_stage,
         "errors": ingest_result.errors,
         "asset_refs": ingest_result.asset_refs,
-        "output_csv": output_csv,
-        "output_workbook": output_workbook,
-        "qa_json": qa_json,
-        "manual_review_csv": manual_review_csv,
+        "performance": performance,
+        **outputs,
+        "workbook_shards": shards["index_path"] if shards is not None else None,
+        "fingerprint": fingerprint["digest"],
     }
+    written = None
+    if shards is not None:
+        # The index and its shards stand in for the single workbook when checking for unchanged runs.
+        shard_dir = Path(shards["index_path"]).parent
+        written = [output_csv, qa_json, manual_review_csv, shards["index_path"]]
+        written += [str(shard_dir / s["path"]) for s in shards["shards"]]
+    with _stage("write"):
+        store_fingerprint(qa_json, fingerprint, result, written)
+    return {**result, "skipped_unchanged": False}
 
 
 def run_enrichment(
@@ -69,11 +267,38 @@ def run_enrichment(
     qa_json: str,
     domains_config: str,
     sleep_ms: int = 100,
+    journal_path: str | None = None,
+    resume: bool = False,
+    catalog_path: str | None = None,
+    offline: bool = False,
+    page_matching: bool = True,
+    timeout_s: float = 8.0,
+    max_retries: int = 1,
+    breaker_threshold: int = 3,
+    breaker_cooldown_s: float = 300.0,
+    progress: Callable[[str, int], None] | None = None,
+    trace_memory: bool = False,
+    profile: bool = False,
 ) -> dict:
+    # Imported here so conversions never pay for requests/bs4.
+    from .enrichment import enrich_csv
+
     return enrich_csv(
         input_csv=input_csv,
         output_csv=output_csv,
         qa_json=qa_json,
         domains_config=domains_config,
         sleep_ms=sleep_ms,
+        journal_path=journal_path,
+        resume=resume,
+        catalog_path=catalog_path,
+        offline=offline,
+        page_matching=page_matching,
+        timeout_s=timeout_s,
+        max_retries=max_retries,
+        breaker_threshold=breaker_threshold,
+        breaker_cooldown_s=breaker_cooldown_s,
+        progress=progress,
+        trace_memory=trace_memory,
+        profile=profile,
     )
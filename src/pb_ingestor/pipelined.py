@@ -0,0 +1,242 @@
+from __future__ import annotations
+
+import csv
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator
+
+from .crosswalk import CrosswalkRow
+from .ingest import IngestResult, SourceRow, ingest_xlsx
+from .mapper import MappedRow, RowMapper
+from .output import write_template_workbook_streaming
+from .perf import PerfRecorder
+
+BATCH_ROWS = 500
+QUEUE_BATCHES = 8
+_POLL_S = 0.1
+_DONE = object()
+
+
+class StageFailed(Exception):
+    def __init__(self, stage: str, error: BaseException) -> None:
+        super().__init__(f"{stage}: {error}")
+        self.stage = stage
+        self.error = error
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class _Channel:
+    # Bounded queue between two stages; time spent blocked on either end is the backpressure signal.
+    def __init__(self, name: str, cancel: threading.Event, maxsize: int = QUEUE_BATCHES) -> None:
+        self.name = name
+        self.cancel = cancel
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.put_wait_s = 0.0
+        self.get_wait_s = 0.0
+        self.batches = 0
+
+    def put(self, item: Any) -> None:
+        started = time.perf_counter()
+        while True:
+            if self.cancel.is_set():
+                raise _Cancelled()
+            try:
+                self.queue.put(item, timeout=_POLL_S)
+                break
+            except queue.Full:
+                continue
+        self.put_wait_s += time.perf_counter() - started
+        if item is not _DONE:
+            self.batches += 1
+
+    def get(self) -> Any:
+        started = time.perf_counter()
+        while True:
+            if self.cancel.is_set():
+                raise _Cancelled()
+            try:
+                item = self.queue.get(timeout=_POLL_S)
+                break
+            except queue.Empty:
+                continue
+        self.get_wait_s += time.perf_counter() - started
+        return item
+
+    def __iter__(self) -> Iterator[list[Any]]:
+        while (batch := self.get()) is not _DONE:
+            yield batch
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "queue": self.name,
+            "batches": self.batches,
+            "producer_wait_s": round(self.put_wait_s, 6),
+            "consumer_wait_s": round(self.get_wait_s, 6),
+        }
+
+
+class _BatchSink:
+    # Looks like a list to ingest_xlsx; rows go downstream in batches instead of accumulating.
+    def __init__(self, channel: _Channel) -> None:
+        self.channel = channel
+        self.batch: list[SourceRow] = []
+        self.count = 0
+
+    def append(self, row: SourceRow) -> None:
+        self.batch.append(row)
+        self.count += 1
+        if len(self.batch) >= BATCH_ROWS:
+            self.flush()
+
+    def extend(self, rows: Iterable[SourceRow]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def flush(self) -> None:
+        if self.batch:
+            self.channel.put(self.batch)
+            self.batch = []
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class _RowStream:
+    # The first iteration pulls mapped rows from the write queue, writing both CSVs as a side effect;
+    # later iterations (a template with several data sheets) replay the kept rows.
+    def __init__(self, batches: Iterable[list[MappedRow]], on_row: Callable[[MappedRow], None], kept: Any) -> None:
+        self._batches = batches
+        self._on_row = on_row
+        self.kept = kept
+        self.drained = False
+
+    def __iter__(self) -> Iterator[MappedRow]:
+        if self.drained:
+            yield from self.kept
+            return
+        for batch in self._batches:
+            for row in batch:
+                self._on_row(row)
+                self.kept.append(row)
+                yield row
+        self.drained = True
+
+    def drain(self) -> None:
+        for _ in self:
+            pass
+
+    def __len__(self) -> int:
+        return len(self.kept)
+
+
+class _CsvOutputs:
+    def __init__(self, output_csv: str | Path, manual_review_csv: str | Path) -> None:
+        self.paths = (Path(output_csv), Path(manual_review_csv))
+        for path in self.paths:
+            path.parent.mkdir(parents=True, exist_ok=True)
+        self._normalized = self.paths[0].open("w", newline="")
+        self._manual = None
+        self._writers: list[Any] = [None, None]
+
+    def write(self, mapped: MappedRow) -> None:
+        # Every mapped row carries the same keys, so the first row's keys are the full header.
+        if self._writers[0] is None:
+            self._writers[0] = csv.DictWriter(self._normalized, fieldnames=list(mapped.row))
+            self._writers[0].writeheader()
+        self._writers[0].writerow(mapped.row)
+        if mapped.status != "processed":
+            if self._writers[1] is None:
+                self._manual = self.paths[1].open("w", newline="")
+                self._writers[1] = csv.DictWriter(self._manual, fieldnames=list(mapped.row))
+                self._writers[1].writeheader()
+            self._writers[1].writerow(mapped.row)
+
+    def close(self) -> None:
+        if self._writers[0] is None:
+            csv.DictWriter(self._normalized, fieldnames=[]).writeheader()
+        self._normalized.close()
+        if self._manual is not None:
+            self._manual.close()
+        else:
+            self.paths[1].write_text("Status,Status Reason\n")
+
+
+def run_pipelined(
+    source: str,
+    mapper: RowMapper,
+    template_source: Any,
+    crosswalk: list[CrosswalkRow],
+    output_csv: str,
+    output_workbook: str,
+    manual_review_csv: str,
+    perf: PerfRecorder,
+    kept: Any = None,
+    progress: Callable[[str, int], None] | None = None,
+    write_workbook: bool = True,
+) -> tuple[IngestResult, _RowStream, list[dict[str, Any]]]:
+    cancel = threading.Event()
+    to_map = _Channel("ingest->map", cancel)
+    to_write = _Channel("map->write", cancel)
+    errors: list[StageFailed] = []
+    results: dict[str, Any] = {}
+
+    def worker(stage: str, func: Callable[[], Any], rows: Callable[[], int]) -> None:
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            results[stage] = func()
+        except _Cancelled:
+            return
+        except BaseException as exc:
+            errors.append(StageFailed(stage, exc))
+            cancel.set()
+            return
+        perf.record({"stage": stage, "rows": rows()}, time.perf_counter() - wall, time.thread_time() - cpu)
+
+    def ingest() -> IngestResult:
+        sink = _BatchSink(to_map)
+        result = ingest_xlsx(source, rows=sink)
+        sink.flush()
+        to_map.put(_DONE)
+        return result
+
+    def map_stage() -> None:
+        for batch in to_map:
+            mapped = mapper.map_batch(batch)
+            if mapped:
+                to_write.put(mapped)
+            if progress is not None:
+                progress("rows_mapped", mapper.counters["rows_total"])
+        to_write.put(_DONE)
+
+    def write() -> _RowStream:
+        outputs = _CsvOutputs(output_csv, manual_review_csv)
+        stream = _RowStream(to_write, outputs.write, kept if kept is not None else [])
+        try:
+            # Sharded workbooks need the row count up front, so they are written once the pipeline has finished.
+            if write_workbook:
+                write_template_workbook_streaming(stream, template_source, output_workbook, crosswalk)
+            # Templates without a matching data sheet never read the rows; drain so the CSVs are complete.
+            stream.drain()
+        finally:
+            outputs.close()
+        return stream
+
+    threads = [
+        threading.Thread(target=worker, args=("ingest", ingest, lambda: results["ingest"].rows.count), daemon=True),
+        threading.Thread(target=worker, args=("map", map_stage, lambda: mapper.counters["rows_total"]), daemon=True),
+        threading.Thread(target=worker, args=("write", write, lambda: len(results["write"])), daemon=True),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    if errors:
+        raise errors[0]
+    if progress is not None:
+        progress("rows_mapped", mapper.counters["rows_total"])
+    return results["ingest"], results["write"], [to_map.report(), to_write.report()]
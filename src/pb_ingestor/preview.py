@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import csv
+import io
+import math
+from array import array
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, BinaryIO, Iterable, Iterator
+
+FACET_COLUMNS = ("Status", "Manufacturer", "Category")
+PRICE_COLUMN = "Part Price"
+
+
+@dataclass
+class PreviewFilter:
+    statuses: set[str] = field(default_factory=set)
+    manufacturers: set[str] = field(default_factory=set)
+    categories: set[str] = field(default_factory=set)
+    min_price: float | None = None
+    max_price: float | None = None
+
+
+def _iter_records(f: BinaryIO) -> Iterator[tuple[int, bytes]]:
+    # A record ends on the first line where the running quote count is even,
+    # so quoted fields with embedded newlines stay in one record.
+    offset = f.tell()
+    start = offset
+    parts: list[bytes] = []
+    quotes = 0
+    for line in f:
+        parts.append(line)
+        quotes += line.count(b'"')
+        offset += len(line)
+        if quotes % 2 == 0:
+            yield start, b"".join(parts)
+            parts, quotes, start = [], 0, offset
+    if parts:
+        yield start, b"".join(parts)
+
+
+def _parse(record: bytes) -> list[str]:
+    return next(csv.reader(io.StringIO(record.decode("utf-8", errors="replace"))), [])
+
+
+def _price(value: str) -> float:
+    try:
+        return float(value) if value.strip() else math.nan
+    except ValueError:
+        return math.nan
+
+
+class CsvPreview:
+    def __init__(self, path: str | Path) -> None:
+        self.path = Path(path)
+        self.offsets = array("Q")
+        self.prices = array("d")
+        self.codes: dict[str, array] = {name: array("I") for name in FACET_COLUMNS}
+        self.dictionaries: dict[str, list[str]] = {name: [] for name in FACET_COLUMNS}
+        self._build()
+
+    def _build(self) -> None:
+        lookups: dict[str, dict[str, int]] = {name: {} for name in FACET_COLUMNS}
+        starts: list[int] = []
+
+        def lines(f: BinaryIO) -> Iterator[str]:
+            offset = 0
+            for raw in f:
+                starts.append(offset)
+                offset += len(raw)
+                yield raw.decode("utf-8", errors="replace")
+
+        with self.path.open("rb") as f:
+            reader = csv.reader(lines(f))
+            self.columns = next(reader, [])
+            positions = [(name, self.columns.index(name)) for name in FACET_COLUMNS if name in self.columns]
+            missing = [name for name in FACET_COLUMNS if name not in self.columns]
+            price_pos = self.columns.index(PRICE_COLUMN) if PRICE_COLUMN in self.columns else None
+            width = len(self.columns)
+            offsets, prices, codes = self.offsets, self.prices, self.codes
+            starts.clear()
+            for values in reader:
+                offset = starts[0]
+                starts.clear()
+                if not values:
+                    continue
+                if len(values) < width:
+                    values += [""] * (width - len(values))
+                offsets.append(offset)
+                for name, pos in positions:
+                    value = values[pos]
+                    code = lookups[name].get(value)
+                    if code is None:
+                        code = lookups[name][value] = len(self.dictionaries[name])
+                        self.dictionaries[name].append(value)
+                    codes[name].append(code)
+                prices.append(_price(values[price_pos]) if price_pos is not None else math.nan)
+            for name in missing:
+                self.dictionaries[name].append("")
+                codes[name].extend([0] * len(offsets))
+
+    @property
+    def total(self) -> int:
+        return len(self.offsets)
+
+    def facet_values(self, column: str) -> list[str]:
+        return sorted(self.dictionaries[column])
+
+    def price_range(self) -> tuple[float, float] | None:
+        known = [p for p in self.prices if not math.isnan(p)]
+        return (min(known), max(known)) if known else None
+
+    def select(self, flt: PreviewFilter) -> array:
+        masks: list[tuple[array, bytes]] = []
+        for name, values in (("Status", flt.statuses), ("Manufacturer", flt.manufacturers), ("Category", flt.categories)):
+            if values:
+                allowed = bytes(v in values for v in self.dictionaries[name])
+                masks.append((self.codes[name], allowed))
+        low = flt.min_price if flt.min_price is not None else -math.inf
+        high = flt.max_price if flt.max_price is not None else math.inf
+        keep: Iterable[int] = range(self.total)
+        for column, allowed in masks:
+            keep = [idx for idx in keep if allowed[column[idx]]]
+        if flt.min_price is not None or flt.max_price is not None:
+            prices = self.prices
+            keep = [idx for idx in keep if low <= prices[idx] <= high]
+        return array("I", keep)
+
+    def read_rows(self, rows: array | list[int]) -> list[dict[str, Any]]:
+        out: list[dict[str, Any]] = []
+        with self.path.open("rb") as f:
+            for idx in rows:
+                f.seek(self.offsets[idx])
+                _, record = next(_iter_records(f))
+                out.append(dict(zip(self.columns, _parse(record))))
+        return out
+
+    def page(self, rows: array | list[int], page: int, page_size: int = 100) -> list[dict[str, Any]]:
+        start = max(0, page) * page_size
+        return self.read_rows(rows[start : start + page_size])
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import cProfile
+import sys
+import threading
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Iterator
+
+TOP_ALLOCATIONS = 50
+
+
+def _frame_label(frame: FrameType) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    def __init__(self, thread_id: int, interval_s: float = 0.005) -> None:
+        self.thread_id = thread_id
+        self.interval_s = interval_s
+        self.stacks: Counter[str] = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="pb-ingestor-sampler", daemon=True)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval_s):
+            frame = sys._current_frames().get(self.thread_id)
+            labels: list[str] = []
+            while frame is not None:
+                labels.append(_frame_label(frame))
+                frame = frame.f_back
+            if labels:
+                self.stacks[";".join(reversed(labels))] += 1
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> Counter[str]:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+
+def write_collapsed(path: str | Path, stacks: Counter[str]) -> None:
+    # Brendan Gregg's folded format: "root;child;leaf count", readable by flamegraph.pl and speedscope.
+    with Path(path).open("w") as f:
+        for stack, count in sorted(stacks.items()):
+            f.write(f"{stack} {count}\n")
+
+
+def write_top_allocations(path: str | Path, snapshot: tracemalloc.Snapshot, limit: int = TOP_ALLOCATIONS) -> None:
+    stats = snapshot.filter_traces([tracemalloc.Filter(False, tracemalloc.__file__)]).statistics("lineno")
+    with Path(path).open("w") as f:
+        for stat in stats[:limit]:
+            f.write(f"{stat}\n")
+
+
+class StageProfiler:
+    def __init__(self, out_dir: str | Path, sample_interval_s: float = 0.005) -> None:
+        self.out_dir = Path(out_dir)
+        self.sample_interval_s = sample_interval_s
+        self.files: list[str] = []
+
+    @contextmanager
+    def profile(self, stage: str) -> Iterator[None]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        sampler = StackSampler(threading.get_ident(), self.sample_interval_s)
+        profiler = cProfile.Profile()
+        sampler.start()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            stacks = sampler.stop()
+            base = self.out_dir / stage
+            profiler.dump_stats(f"{base}.pstats")
+            write_collapsed(f"{base}.collapsed", stacks)
+            self.files += [f"{base}.pstats", f"{base}.collapsed"]
+            if tracemalloc.is_tracing():
+                write_top_allocations(f"{base}.allocations.txt", tracemalloc.take_snapshot())
+                self.files.append(f"{base}.allocations.txt")
@@ -0,0 +1,114 @@
+from __future__ import annotations
+
+import json
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+
+from .batch import ConversionJob, JobOutcome
+from .peek import peek_workbook
+
+# Defaults for books with no prior QA report, fitted on the sample books and synthetic 50k-200k row books.
+DEFAULT_S_PER_ROW = 0.0005
+FILE_OVERHEAD_S = 0.2
+BASE_MB = 60.0
+MB_PER_ROW = 0.004
+
+
+@dataclass
+class JobCost:
+    key: str
+    source_bytes: int
+    sheets: int
+    estimated_rows: int
+    predicted_wall_s: float
+    predicted_peak_mb: float
+    basis: str
+
+
+def _history(qa_json: str | Path) -> tuple[dict[str, Any], float, float | None] | None:
+    # The peek of the source taken by that run, so a new peek can be compared like for like.
+    try:
+        performance = json.loads(Path(qa_json).read_text())["performance"]
+        return performance.get("source") or {}, performance["total_wall_s"], performance.get("peak_rss_mb")
+    except (OSError, ValueError, KeyError, TypeError, AttributeError):
+        return None
+
+
+def _growth(size: int, rows: int, past_source: dict[str, Any]) -> float:
+    past_rows, past_bytes = past_source.get("estimated_rows"), past_source.get("bytes")
+    if rows and past_rows:
+        return rows / past_rows
+    if size and past_bytes:
+        return size / past_bytes
+    # Reports written before the source peek was recorded cannot be scaled.
+    return 1.0
+
+
+def estimate_costs(jobs: list[ConversionJob]) -> list[JobCost]:
+    costs = []
+    calibration: list[tuple[float, float]] = []
+    for job in jobs:
+        size, sheets, rows = peek_workbook(job.source)
+        model_wall = FILE_OVERHEAD_S + rows * DEFAULT_S_PER_ROW
+        model_mb = BASE_MB + rows * MB_PER_ROW
+        cost = JobCost(job.key, size, sheets, rows, model_wall, model_mb, "peek" if sheets else "size")
+        past = _history(job.kwargs.get("qa_json", ""))
+        if past is not None:
+            past_source, past_wall, past_peak = past
+            # The book may have grown or shrunk since that run; scale by its peeked rows (or bytes) then and now.
+            ratio = _growth(size, rows, past_source)
+            cost.predicted_wall_s = past_wall * ratio
+            if past_peak is not None:
+                cost.predicted_peak_mb = max(BASE_MB, past_peak * ratio)
+            cost.basis = "history"
+            calibration.append((cost.predicted_wall_s, model_wall))
+        costs.append(cost)
+
+    # Books this machine has converted before tell how far off the default per-row cost is here.
+    if calibration and sum(m for _, m in calibration) > 0:
+        scale = sum(w for w, _ in calibration) / sum(m for _, m in calibration)
+        for cost in costs:
+            if cost.basis != "history":
+                cost.predicted_wall_s *= scale
+    for cost in costs:
+        cost.predicted_wall_s = round(cost.predicted_wall_s, 3)
+        cost.predicted_peak_mb = round(cost.predicted_peak_mb, 1)
+    return costs
+
+
+def largest_first(costs: list[JobCost]) -> list[int]:
+    # Longest-processing-time-first: the big books start early instead of leaving one core busy at the tail.
+    return sorted(range(len(costs)), key=lambda i: (-costs[i].predicted_wall_s, i))
+
+
+def schedule_report(
+    policy: str, costs: list[JobCost], order: list[int], outcomes: list[JobOutcome], memory_budget_mb: float | None
+) -> dict[str, Any]:
+    by_key = {outcome.job.key: outcome for outcome in outcomes}
+    position = {index: n for n, index in enumerate(order)}
+    jobs = []
+    for index, cost in enumerate(costs):
+        outcome = by_key.get(cost.key)
+        result = outcome.result if outcome is not None and outcome.result else {}
+        jobs.append(
+            {
+                **asdict(cost),
+                "planned_order": position[index],
+                "started_s": outcome.started_s if outcome is not None else None,
+                "actual_wall_s": outcome.wall_s if outcome is not None else None,
+                "actual_peak_rss_mb": (result.get("performance") or {}).get("peak_rss_mb"),
+                "actual_rows": result["summary"]["rows_total"] if result.get("summary") else None,
+                "skipped_unchanged": bool(result.get("skipped_unchanged")),
+            }
+        )
+    finished = [j["started_s"] + j["actual_wall_s"] for j in jobs if j["started_s"] is not None]
+    measured = [j for j in jobs if j["actual_wall_s"] is not None and not j["skipped_unchanged"]]
+    return {
+        "policy": policy,
+        "memory_budget_mb": memory_budget_mb,
+        "makespan_s": round(max(finished), 3) if finished else 0.0,
+        "predicted_wall_s": round(sum(j["predicted_wall_s"] for j in measured), 3),
+        "actual_wall_s": round(sum(j["actual_wall_s"] for j in measured), 3),
+        "jobs": jobs,
+    }
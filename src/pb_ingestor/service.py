@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import parse_qs, urlparse
+
+from .batch import SUPPORTED_OUTPUT_TYPES, failure_record
+from .crosswalk import infer_base_template_path, infer_crosswalk_path
+from .fingerprint import file_digest
+from .metrics import MetricsRegistry, record_conversion, record_enrichment, record_failure, send_metrics
+from .pipeline import ConversionError, run_conversion, run_enrichment
+
+MAX_UPLOAD_BYTES = 256 * 1024 * 1024
+_SAFE_NAME = re.compile(r"[^A-Za-z0-9._ -]+")
+
+
+class QueueFullError(RuntimeError):
+    pass
+
+
+def _safe_filename(name: str, default: str) -> str:
+    cleaned = _SAFE_NAME.sub("_", Path(name or "").name).strip(" .")
+    return cleaned or default
+
+
+class ProgressFile:
+    def __init__(self, path: str | Path, min_interval_s: float = 0.25, clock: Callable[[], float] = time.monotonic) -> None:
+        self.path = Path(path)
+        self.min_interval_s = min_interval_s
+        self.clock = clock
+        self.counters: dict[str, int] = {}
+        self._last_write = float("-inf")
+
+    def __call__(self, name: str, value: int) -> None:
+        self.counters[name] = value
+        now = self.clock()
+        if now - self._last_write >= self.min_interval_s:
+            self.flush()
+            self._last_write = now
+
+    def flush(self) -> None:
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.counters))
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def read(path: str | Path) -> dict[str, int]:
+        try:
+            return json.loads(Path(path).read_text())
+        except (OSError, ValueError):
+            return {}
+
+
+def _convert_job(work_dir: str, source_name: str, settings: dict[str, Any], progress: ProgressFile) -> dict[str, Any]:
+    out = Path(work_dir) / "out"
+    return run_conversion(
+        source=str(Path(work_dir) / source_name),
+        template_type=settings["template_type"],
+        markup_profile_path=settings["markup_profile_path"],
+        output_csv=str(out / "converted.csv"),
+        output_workbook=str(out / "converted.xlsx"),
+        qa_json=str(out / "qa.json"),
+        manual_review_csv=str(out / "manual_review.csv"),
+        labor_cost_default=settings.get("labor_cost_default"),
+        labor_rate_default=settings.get("labor_rate_default"),
+        progress=progress,
+    )
+
+
+def _enrich_job(work_dir: str, source_name: str, settings: dict[str, Any], progress: ProgressFile) -> dict[str, Any]:
+    out = Path(work_dir) / "out"
+    return run_enrichment(
+        input_csv=str(Path(work_dir) / source_name),
+        output_csv=str(out / "enriched.csv"),
+        qa_json=str(out / "enrichment_qa.json"),
+        domains_config=settings["domains_config"],
+        sleep_ms=settings.get("sleep_ms", 100),
+        journal_path=str(out / "enrichment.journal.jsonl"),
+        catalog_path=settings.get("catalog_path"),
+        offline=settings.get("offline", False),
+        progress=progress,
+    )
+
+
+_JOB_FUNCS = {"convert": _convert_job, "enrich": _enrich_job}
+
+
+def _run_job(kind: str, work_dir: str, source_name: str, settings: dict[str, Any]) -> dict[str, Any]:
+    progress = ProgressFile(Path(work_dir) / "progress.json")
+    try:
+        return _JOB_FUNCS[kind](work_dir, source_name, settings, progress)
+    finally:
+        progress.flush()
+
+
+_CONFIG_SETTINGS = ("markup_profile_path", "domains_config", "catalog_path")
+
+
+def job_cache_key(kind: str, source_name: str, data: bytes, settings: dict[str, Any]) -> str:
+    # The file name is part of the input: it can decide Manufacturer and is reported as source_file.
+    configs = {name: settings.get(name) for name in _CONFIG_SETTINGS if settings.get(name)}
+    if kind == "convert":
+        configs["crosswalk"] = infer_crosswalk_path(settings["template_type"])
+        configs["template"] = infer_base_template_path(settings["template_type"])
+    material = {
+        "kind": kind,
+        "source_name": source_name,
+        "data": hashlib.sha256(data).hexdigest(),
+        "settings": settings,
+        "configs": {name: file_digest(path) if Path(path).is_file() else None for name, path in sorted(configs.items())},
+    }
+    return hashlib.sha256(json.dumps(material, sort_keys=True, default=str).encode()).hexdigest()
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    source_name: str
+    work_dir: Path
+    settings: dict[str, Any]
+    cache_key: str = ""
+    created: float = field(default_factory=time.time)
+    finished: float | None = None
+    future: Future | None = None
+    result: dict[str, Any] | None = None
+    error: dict[str, Any] | None = None
+
+    @property
+    def status(self) -> str:
+        if self.error is not None:
+            return "failed"
+        if self.result is not None:
+            return "succeeded"
+        if self.future is not None and self.future.running():
+            return "running"
+        return "queued"
+
+    def files(self) -> list[str]:
+        out = self.work_dir / "out"
+        return sorted(p.name for p in out.iterdir() if p.is_file()) if out.exists() else []
+
+    def progress(self) -> dict[str, int]:
+        return ProgressFile.read(self.work_dir / "progress.json")
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "source_name": self.source_name,
+            "settings": self.settings,
+            "created": self.created,
+            "finished": self.finished,
+            "result": self.result,
+            "error": self.error,
+            "progress": self.progress(),
+            "files": self.files() if self.status == "succeeded" else [],
+        }
+
+
+class JobQueue:
+    def __init__(
+        self,
+        work_root: str | Path,
+        workers: int = 2,
+        max_pending: int = 32,
+        retention_s: float = 3600.0,
+        metrics: MetricsRegistry | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.work_root = Path(work_root)
+        self.metrics = metrics
+        self.work_root.mkdir(parents=True, exist_ok=True)
+        self.max_pending = max_pending
+        self.retention_s = retention_s
+        # A pool passed in (serve's, shared with the folder watcher) belongs to the caller and is not shut down here.
+        self._owns_executor = executor is None
+        self.executor = executor or ProcessPoolExecutor(max_workers=max(1, workers))
+        self.jobs: dict[str, Job] = {}
+        self.by_cache_key: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, kind: str, source_name: str, data: bytes, settings: dict[str, Any]) -> Job:
+        if kind not in _JOB_FUNCS:
+            raise ValueError(f"Unknown job kind: {kind}")
+        self.prune()
+        name = _safe_filename(source_name, "upload.xlsx" if kind == "convert" else "upload.csv")
+        cache_key = job_cache_key(kind, name, data, settings)
+        with self._lock:
+            cached = self.jobs.get(self.by_cache_key.get(cache_key, ""))
+            if cached is not None and cached.status != "failed":
+                return cached
+            active = sum(1 for j in self.jobs.values() if j.status in {"queued", "running"})
+            if active >= self.max_pending:
+                raise QueueFullError(f"{active} jobs already pending")
+            job_id = uuid.uuid4().hex
+            work_dir = self.work_root / job_id
+            work_dir.mkdir(parents=True)
+            (work_dir / name).write_bytes(data)
+            job = Job(job_id, kind, name, work_dir, settings, cache_key)
+            self.jobs[job_id] = job
+            self.by_cache_key[cache_key] = job_id
+            job.future = self.executor.submit(_run_job, kind, str(work_dir), name, settings)
+        job.future.add_done_callback(lambda fut, job=job: self._complete(job, fut))
+        return job
+
+    def _complete(self, job: Job, future: Future) -> None:
+        try:
+            result = future.result()
+        except ConversionError as exc:
+            job.error = failure_record(job.source_name, exc.stage, exc.message)
+        except Exception as exc:
+            job.error = failure_record(job.source_name, job.kind, f"{type(exc).__name__}: {exc}")
+        else:
+            job.result = result
+        job.finished = time.time()
+        if self.metrics is not None:
+            if job.error is not None:
+                record_failure(self.metrics, job.error)
+            elif job.kind == "convert":
+                record_conversion(self.metrics, job.result)
+            else:
+                record_enrichment(self.metrics, job.result)
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def prune(self) -> None:
+        cutoff = time.time() - self.retention_s
+        with self._lock:
+            expired = [j for j in self.jobs.values() if j.finished is not None and j.finished < cutoff]
+            for job in expired:
+                del self.jobs[job.id]
+                if self.by_cache_key.get(job.cache_key) == job.id:
+                    del self.by_cache_key[job.cache_key]
+        for job in expired:
+            shutil.rmtree(job.work_dir, ignore_errors=True)
+
+    def shutdown(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+def _route(parts: list[str]) -> str:
+    # Collapse ids and file names so latency series stay bounded.
+    if parts in (["health"], ["metrics"]) or (len(parts) == 2 and parts[0] == "jobs" and parts[1] in _JOB_FUNCS):
+        return "/" + "/".join(parts)
+    if len(parts) == 2 and parts[0] == "jobs":
+        return "/jobs/{id}"
+    if len(parts) == 4 and parts[0] == "jobs" and parts[2] == "files":
+        return "/jobs/{id}/files/{name}"
+    return "other"
+
+
+def _float_or_none(value: str | None) -> float | None:
+    return float(value) if value not in (None, "") else None
+
+
+class _Handler(BaseHTTPRequestHandler):
+    queue: JobQueue
+    defaults: dict[str, Any]
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def send_response(self, code: int, message: str | None = None) -> None:
+        self._status = int(code)
+        super().send_response(code, message)
+
+    def _timed(self, method: str, handle: Any) -> None:
+        started = time.perf_counter()
+        self._status = 0
+        try:
+            handle()
+        finally:
+            if self.queue.metrics is not None:
+                route = _route([p for p in urlparse(self.path).path.split("/") if p])
+                self.queue.metrics.observe(
+                    "pb_ingestor_http_request_duration_seconds",
+                    time.perf_counter() - started,
+                    method=method,
+                    route=route,
+                    code=self._status,
+                )
+
+    def do_GET(self) -> None:
+        self._timed("GET", self._get)
+
+    def do_POST(self) -> None:
+        self._timed("POST", self._post)
+
+    def _send_json(self, status: HTTPStatus, payload: dict[str, Any]) -> None:
+        body = json.dumps(payload, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _get(self) -> None:
+        parts = [p for p in urlparse(self.path).path.split("/") if p]
+        if parts == ["health"]:
+            self._send_json(HTTPStatus.OK, {"status": "ok"})
+            return
+        if parts == ["metrics"] and self.queue.metrics is not None:
+            send_metrics(self, self.queue.metrics)
+            return
+        if len(parts) >= 2 and parts[0] == "jobs":
+            self.queue.prune()
+            job = self.queue.get(parts[1])
+            if job is None:
+                self._send_json(HTTPStatus.NOT_FOUND, {"error": "unknown job"})
+                return
+            if len(parts) == 2:
+                self._send_json(HTTPStatus.OK, job.to_dict())
+                return
+            if len(parts) == 4 and parts[2] == "files" and parts[3] in job.files():
+                self._send_file(job.work_dir / "out" / parts[3])
+                return
+        self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+
+    def _send_file(self, path: Path) -> None:
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(path.stat().st_size))
+        self.send_header("Content-Disposition", f'attachment; filename="{path.name}"')
+        self.end_headers()
+        with path.open("rb") as f:
+            shutil.copyfileobj(f, self.wfile)
+
+    def _post(self) -> None:
+        url = urlparse(self.path)
+        parts = [p for p in url.path.split("/") if p]
+        if len(parts) != 2 or parts[0] != "jobs" or parts[1] not in _JOB_FUNCS:
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length <= 0 or length > MAX_UPLOAD_BYTES:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": f"body must be 1..{MAX_UPLOAD_BYTES} bytes"})
+            return
+        query = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        try:
+            settings = self._settings(parts[1], query)
+        except ValueError as exc:
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(exc)})
+            return
+        data = self.rfile.read(length)
+        try:
+            job = self.queue.submit(parts[1], query.get("filename", ""), data, settings)
+        except QueueFullError as exc:
+            self._send_json(HTTPStatus.TOO_MANY_REQUESTS, {"error": str(exc)})
+            return
+        self._send_json(HTTPStatus.ACCEPTED, {"job_id": job.id, "status_url": f"/jobs/{job.id}"})
+
+    def _settings(self, kind: str, query: dict[str, str]) -> dict[str, Any]:
+        if kind == "convert":
+            template_type = query.get("template_type", self.defaults["template_type"])
+            if template_type not in SUPPORTED_OUTPUT_TYPES:
+                raise ValueError(f"Unknown template type: {template_type}")
+            return {
+                "template_type": template_type,
+                "markup_profile_path": self.defaults["markup_profile_path"],
+                "labor_cost_default": _float_or_none(query.get("labor_cost_default")),
+                "labor_rate_default": _float_or_none(query.get("labor_rate_default")),
+            }
+        return {
+            "domains_config": self.defaults["domains_config"],
+            "catalog_path": self.defaults.get("catalog_path"),
+            "offline": query.get("offline", "").lower() in {"1", "true", "yes"},
+            "sleep_ms": int(query.get("sleep_ms", 100)),
+        }
+
+
+def make_server(host: str, port: int, queue: JobQueue, defaults: dict[str, Any]) -> ThreadingHTTPServer:
+    handler = type("JobHandler", (_Handler,), {"queue": queue, "defaults": defaults})
+    return ThreadingHTTPServer((host, port), handler)
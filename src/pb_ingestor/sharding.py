@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import re
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from io import BytesIO
+from itertools import islice
+from pathlib import Path
+from typing import Any, Sequence
+
+from . import output
+from .crosswalk import CrosswalkRow
+from .fingerprint import file_digest
+from .mapper import MappedRow
+from .output import CompiledTemplate, compile_template, write_compiled_template
+
+SHARD_FIELDS = ("Category", "Manufacturer")
+INDEX_FORMAT = "pb-ingestor-workbook-shards/1"
+PROBE_ROWS = 500
+IN_FLIGHT_PER_WORKER = 2
+# Grouped shards are collected a few at a time so at most this many rows (or one larger shard) are buffered.
+PASS_ROWS = 50_000
+_MB = 1024 * 1024
+
+_worker_template: dict[str, CompiledTemplate] = {}
+
+
+@dataclass
+class ShardSpec:
+    rows: int | None = None
+    size_mb: float | None = None
+    by: str | None = None
+
+    def __post_init__(self) -> None:
+        if self.rows is not None and self.rows < 1:
+            raise ValueError("--shard-rows must be at least 1")
+        if self.size_mb is not None and self.size_mb <= 0:
+            raise ValueError("--shard-mb must be positive")
+        if self.by is not None and self.by not in SHARD_FIELDS:
+            raise ValueError(f"--shard-by must be one of {', '.join(SHARD_FIELDS)}")
+
+    @property
+    def requested(self) -> bool:
+        return self.rows is not None or self.size_mb is not None or self.by is not None
+
+
+@dataclass
+class Shard:
+    path: Path
+    key: str | None
+    positions: list[int] = field(default_factory=list)
+
+    def row_ranges(self) -> list[list[int]]:
+        # Runs of 1-based row positions in the normalized CSV (mapped order).
+        ranges: list[list[int]] = []
+        for pos in self.positions:
+            if ranges and ranges[-1][1] == pos:
+                ranges[-1][1] = pos + 1
+            else:
+                ranges.append([pos + 1, pos + 1])
+        return ranges
+
+
+def index_path_for(output_workbook: str | Path) -> Path:
+    return Path(output_workbook).with_suffix(".shards.json")
+
+
+def needs_sharding(row_count: int, spec: ShardSpec) -> bool:
+    # Only books near Excel's limit pay for compiling the template to learn its exact row capacity.
+    return spec.requested or row_count + output.HEADER_SCAN_ROWS > output.EXCEL_MAX_ROWS
+
+
+def _slug(key: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", key.lower()).strip("-") or "blank"
+
+
+def _workbook_size(compiled: CompiledTemplate, rows: list[dict[str, Any]]) -> int:
+    buffer = BytesIO()
+    write_compiled_template(compiled, rows, buffer)
+    return buffer.tell()
+
+
+def rows_for_size(compiled: CompiledTemplate, mapped: Sequence[MappedRow], size_mb: float) -> int:
+    # Estimated, not exact: bytes per row come from writing the first PROBE_ROWS rows, so books whose later
+    # rows are much wider than their first ones can overshoot the target somewhat. The probe rows go below
+    # the template's own preformatted rows, which every shard carries whether rows fill them or not.
+    sample = [m.row for m in islice(mapped, PROBE_ROWS)]
+    if not sample:
+        return compiled.row_capacity
+    filler: list[dict[str, Any]] = [{}] * max((len(s.rows) - s.header_row for s in compiled.sheets if s.writes), default=0)
+    base = _workbook_size(compiled, filler)
+    per_row = max(1.0, (_workbook_size(compiled, filler + sample) - base) / len(sample))
+    return max(1, int((size_mb * _MB - base) / per_row))
+
+
+def plan_shards(mapped: Sequence[MappedRow], spec: ShardSpec, max_rows: int, output_workbook: str | Path) -> list[Shard]:
+    out = Path(output_workbook)
+    groups: dict[str | None, list[int]] = {}
+    if spec.by is not None:
+        for pos, m in enumerate(mapped):
+            groups.setdefault(str(m.row.get(spec.by) or "").strip(), []).append(pos)
+    else:
+        groups[None] = list(range(len(mapped)))
+
+    shards: list[Shard] = []
+    names: set[str] = set()
+    for key, positions in groups.items():
+        stem = out.stem
+        if key is not None:
+            # Keys that only differ in punctuation or case would share a slug; number the later ones.
+            stem = base = f"{out.stem}.{_slug(key)}"
+            n = 1
+            while stem in names:
+                n += 1
+                stem = f"{base}-{n}"
+            names.add(stem)
+        chunks = [positions[i : i + max_rows] for i in range(0, len(positions), max_rows)] or [[]]
+        for n, chunk in enumerate(chunks, start=1):
+            name = f"{stem}.part{n:03d}" if key is None or len(chunks) > 1 else stem
+            shards.append(Shard(out.with_name(name + out.suffix), key, chunk))
+    return shards
+
+
+def plan_passes(shards: list[Shard], spec: ShardSpec) -> list[list[int]]:
+    # Row shards are contiguous and complete in order, so one pass frees each buffer as it goes. Grouped shards
+    # only complete near the end, so each pass collects the next few of them and rereads the mapped rows.
+    if spec.by is None:
+        return [list(range(len(shards)))]
+    passes: list[list[int]] = []
+    rows = 0
+    for i, shard in enumerate(shards):
+        if not passes or rows + len(shard.positions) > PASS_ROWS:
+            passes.append([])
+            rows = 0
+        passes[-1].append(i)
+        rows += len(shard.positions)
+    return passes
+
+
+def _write_shard(compiled: CompiledTemplate, path: str, values: list[tuple]) -> tuple[int, str]:
+    columns = compiled.columns
+    write_compiled_template(compiled, [dict(zip(columns, v)) for v in values], path)
+    return os.path.getsize(path), file_digest(path)
+
+
+def _init_worker(template_bytes: bytes, crosswalk: list[CrosswalkRow]) -> None:
+    _worker_template["compiled"] = compile_template(BytesIO(template_bytes), crosswalk)
+
+
+def _write_in_worker(path: str, values: list[tuple]) -> tuple[int, str]:
+    return _write_shard(_worker_template["compiled"], path, values)
+
+
+def _remove_previous_shards(index_path: Path, keep: set[Path]) -> None:
+    try:
+        previous = json.loads(index_path.read_text())
+    except (OSError, ValueError):
+        return
+    for entry in previous.get("shards", []):
+        path = index_path.parent / entry["path"]
+        if path not in keep and path.exists():
+            path.unlink()
+
+
+def remove_workbook_shards(output_workbook: str | Path) -> None:
+    # A run that writes the single workbook leaves no earlier run's index or shards beside it.
+    index_path = index_path_for(output_workbook)
+    _remove_previous_shards(index_path, set())
+    index_path.unlink(missing_ok=True)
+
+
+def write_workbook_shards(
+    mapped: Sequence[MappedRow],
+    template_bytes: bytes,
+    crosswalk: list[CrosswalkRow],
+    output_workbook: str | Path,
+    spec: ShardSpec,
+    workers: int | None = None,
+) -> dict[str, Any] | None:
+    # Returns None when the book fits one workbook and no sharding was asked for; the caller writes it as usual.
+    compiled = compile_template(BytesIO(template_bytes), crosswalk)
+    row_count = len(mapped)
+    if not spec.requested and row_count <= compiled.row_capacity:
+        return None
+    max_rows = compiled.row_capacity
+    if spec.rows is not None:
+        max_rows = min(max_rows, spec.rows)
+    if spec.size_mb is not None:
+        max_rows = min(max_rows, rows_for_size(compiled, mapped, spec.size_mb))
+    shards = plan_shards(mapped, spec, max_rows, output_workbook)
+
+    index_path = index_path_for(output_workbook)
+    index_path.parent.mkdir(parents=True, exist_ok=True)
+    _remove_previous_shards(index_path, {s.path for s in shards})
+    owner = [0] * row_count
+    for i, shard in enumerate(shards):
+        for pos in shard.positions:
+            owner[pos] = i
+
+    workers = min(workers or os.cpu_count() or 1, len(shards))
+    if multiprocessing.current_process().daemon:
+        # convert-all runs each book in a daemonic process, which may not start a pool; books are parallel already.
+        workers = 1
+    written: dict[int, tuple[int, str]] = {}
+    columns = compiled.columns
+    # Only the written columns' values cross to the workers, and a shard is handed over as soon as its last
+    # row has been read, so earlier shards are written while later ones are still being collected.
+    buffers: dict[int, list[tuple]] = {}
+    in_pass = [-1] * len(shards)
+    pending: dict[Future, int] = {}
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(template_bytes, crosswalk)) if workers > 1 else None
+
+    def submit(i: int) -> None:
+        values = buffers.pop(i, [])
+        if pool is None:
+            written[i] = _write_shard(compiled, str(shards[i].path), values)
+            return
+        while len(pending) >= workers * IN_FLIGHT_PER_WORKER:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                written[pending.pop(future)] = future.result()
+        pending[pool.submit(_write_in_worker, str(shards[i].path), values)] = i
+
+    try:
+        for n, members in enumerate(plan_passes(shards, spec)):
+            remaining = 0
+            for i in members:
+                in_pass[i] = n
+                if shards[i].positions:
+                    remaining += 1
+                else:
+                    submit(i)
+            for pos, m in enumerate(mapped):
+                if not remaining:
+                    break
+                i = owner[pos]
+                if in_pass[i] != n:
+                    continue
+                buffer = buffers.setdefault(i, [])
+                buffer.append(tuple(m.row.get(c) for c in columns))
+                if len(buffer) == len(shards[i].positions):
+                    submit(i)
+                    remaining -= 1
+        for future, i in pending.items():
+            written[i] = future.result()
+    finally:
+        if pool is not None:
+            pool.shutdown(cancel_futures=True)
+
+    index = {
+        "format": INDEX_FORMAT,
+        "output_workbook": str(output_workbook),
+        "rows": row_count,
+        "shard_by": spec.by,
+        "max_rows_per_shard": max_rows,
+        "shards": [
+            {
+                "path": shard.path.name,
+                "key": shard.key,
+                "rows": len(shard.positions),
+                "row_ranges": shard.row_ranges(),
+                "bytes": written[i][0],
+                "sha256": written[i][1],
+            }
+            for i, shard in enumerate(shards)
+        ],
+    }
+    index_path.write_text(json.dumps(index, indent=2))
+    # The shards replace an earlier run's single workbook.
+    Path(output_workbook).unlink(missing_ok=True)
+    return {**index, "index_path": str(index_path), "workers": workers}
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import os
+import pickle
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Any, Iterator
+
+_MB = 1024 * 1024
+SAMPLE_EVERY = 64
+CHECK_EVERY = 256
+CHUNK_ROWS = 1000
+
+
+class SpillList:
+    # Append-only row sequence. Rows stay in memory until the store's budget is reached, after which
+    # this list's rows move to SQLite in pickled chunks and later appends are flushed a chunk at a time.
+    def __init__(self, store: "SpillStore", name: str) -> None:
+        self.store = store
+        self.name = name
+        self._memory: list[Any] = []
+        self._spilled_rows = 0
+        self._chunks = 0
+        self._sampled_bytes = 0
+        self._samples = 0
+        self.spilled = False
+
+    def __len__(self) -> int:
+        return self._spilled_rows + len(self._memory)
+
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+    def append(self, item: Any) -> None:
+        self._memory.append(item)
+        count = len(self._memory)
+        if self.spilled:
+            if count >= CHUNK_ROWS:
+                self._flush()
+            return
+        if count % SAMPLE_EVERY == 1:
+            self._sampled_bytes += len(pickle.dumps(item, pickle.HIGHEST_PROTOCOL))
+            self._samples += 1
+        if count % CHECK_EVERY == 0 and self.store.over_budget():
+            self.spilled = True
+            self._flush()
+
+    def extend(self, items: Any) -> None:
+        for item in items:
+            self.append(item)
+
+    def estimated_bytes(self) -> int:
+        if not self._samples:
+            return 0
+        return len(self._memory) * self._sampled_bytes // self._samples
+
+    def _flush(self) -> None:
+        for start in range(0, len(self._memory), CHUNK_ROWS):
+            chunk = self._memory[start : start + CHUNK_ROWS]
+            self.store._write_chunk(self.name, self._chunks, chunk)
+            self._chunks += 1
+            self._spilled_rows += len(chunk)
+        self._memory = []
+
+    def __iter__(self) -> Iterator[Any]:
+        for chunk_no in range(self._chunks):
+            yield from self.store._read_chunk(self.name, chunk_no)
+        yield from self._memory
+
+    def clear(self) -> None:
+        self.store._drop(self.name)
+        self._memory = []
+        self._spilled_rows = 0
+        self._chunks = 0
+
+
+class SpillStore:
+    def __init__(self, budget_mb: float, spill_dir: str | Path | None = None) -> None:
+        if budget_mb <= 0:
+            raise ValueError("Memory budget must be positive")
+        self.budget_bytes = int(budget_mb * _MB)
+        if spill_dir is not None:
+            Path(spill_dir).mkdir(parents=True, exist_ok=True)
+        fd, path = tempfile.mkstemp(prefix="pb-ingestor-spill-", suffix=".sqlite", dir=spill_dir)
+        os.close(fd)
+        self.path = Path(path)
+        # Pipelined conversions fill lists from a stage thread; each list is only touched by one thread at a time.
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        # A scratch file: durability does not matter, only throughput.
+        self._db.execute("PRAGMA journal_mode=OFF")
+        self._db.execute("PRAGMA synchronous=OFF")
+        self._db.execute("CREATE TABLE chunks (name TEXT, chunk INTEGER, data BLOB, PRIMARY KEY (name, chunk))")
+        self.lists: dict[str, SpillList] = {}
+        self.bytes_spilled = 0
+        self.chunks_spilled = 0
+        self.rows_spilled = 0
+
+    def list(self, name: str) -> SpillList:
+        if name not in self.lists:
+            self.lists[name] = SpillList(self, name)
+        return self.lists[name]
+
+    def over_budget(self) -> bool:
+        return sum(lst.estimated_bytes() for lst in self.lists.values()) > self.budget_bytes
+
+    def _write_chunk(self, name: str, chunk_no: int, rows: list[Any]) -> None:
+        data = pickle.dumps(rows, pickle.HIGHEST_PROTOCOL)
+        self._db.execute("INSERT INTO chunks VALUES (?, ?, ?)", (name, chunk_no, data))
+        self.bytes_spilled += len(data)
+        self.chunks_spilled += 1
+        self.rows_spilled += len(rows)
+
+    def _read_chunk(self, name: str, chunk_no: int) -> list[Any]:
+        (data,) = self._db.execute("SELECT data FROM chunks WHERE name = ? AND chunk = ?", (name, chunk_no)).fetchone()
+        return pickle.loads(data)
+
+    def _drop(self, name: str) -> None:
+        self._db.execute("DELETE FROM chunks WHERE name = ?", (name,))
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "budget_mb": round(self.budget_bytes / _MB, 1),
+            "spilled_lists": sorted(name for name, lst in self.lists.items() if lst.spilled),
+            "rows_spilled": self.rows_spilled,
+            "chunks_spilled": self.chunks_spilled,
+            "bytes_spilled": self.bytes_spilled,
+        }
+
+    def close(self) -> None:
+        self._db.close()
+        self.path.unlink(missing_ok=True)
+
+    def __enter__(self) -> "SpillStore":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
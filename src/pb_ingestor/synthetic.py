@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+import io
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+from openpyxl import Workbook
+
+HEADERS = ["Part Number", "Description", "Manufacturer", "Cost", "Product Category", "Distributor PN"]
+MANUFACTURERS = ["Carrier", "Bryant", "Day & Night", "Trane", "Lennox"]
+CATEGORIES = ["GAS FURNACES", "FAN COILS & HEAT STRIPS", "EVAP COILS", "AIR CONDITIONERS", "HEAT PUMPS", "ACCESSORIES"]
+FAMILIES = [
+    "INFINITY 98% FURNACE",
+    "PERFORMANCE 80% FURNACE",
+    "ION V/S 21 SEER Communicating",
+    "Quiet Comfort Crossover Heat Pump",
+    "Multi-Zone Combination",
+    "Thermostats and Controls",
+]
+ITEMS = ["COIL", "CONDENSER", "AIR HANDLER", "SOLENOID", "DRIER", "THERMOSTAT", "BLOWER MOTOR", "CAPACITOR"]
+
+
+@dataclass
+class BookSpec:
+    rows: int = 1000
+    sheets: int = 4
+    family_every: int = 25
+    merged_every: int = 40
+    duplicate_rate: float = 0.02
+    messy_cost_rate: float = 0.15
+    seed: int = 0
+
+
+def _messy_cost(rng: random.Random, cost: float, messy_rate: float) -> object:
+    if rng.random() >= messy_rate:
+        return round(cost, 2)
+    return rng.choice(
+        [
+            f"${cost:,.2f}",
+            f" {cost:.2f} ",
+            f"{cost:,.2f}",
+            "#N/A",
+            "Call for price",
+            "",
+        ]
+    )
+
+
+def _part_number(rng: random.Random, idx: int) -> str:
+    prefix = rng.choice(["59MN7", "IC5A1", "ID5CU", "FX4D", "CNPV", "TSTAT"])
+    return f"{prefix}{idx:07d}{rng.choice('ABCK')}"
+
+
+def generate_book(path: str | Path, spec: BookSpec) -> dict[str, int]:
+    rng = random.Random(spec.seed)
+    wb = Workbook(write_only=True)
+    per_sheet = max(1, -(-spec.rows // max(1, spec.sheets)))
+    written = {"rows": 0, "family_rows": 0, "merged_ranges": 0, "duplicates": 0, "messy_costs": 0}
+    recent: list[list[object]] = []
+    idx = 0
+    for sheet_no in range(max(1, spec.sheets)):
+        if idx >= spec.rows:
+            break
+        category = CATEGORIES[sheet_no % len(CATEGORIES)]
+        ws = wb.create_sheet(f"{category[:24]} {sheet_no + 1}")
+        ws.append([None, category])
+        ws.append([None, None, None, None, None, "2026-01-26"])
+        ws.append([])
+        ws.append(HEADERS)
+        excel_row = 4
+        merge_start: int | None = None
+        merge_left = 0
+
+        def close_merge() -> None:
+            nonlocal merge_start
+            if merge_start is not None and excel_row > merge_start:
+                ws.merged_cells.add(f"B{merge_start}:B{excel_row}")
+                written["merged_ranges"] += 1
+            merge_start = None
+
+        for offset in range(per_sheet):
+            if idx >= spec.rows:
+                break
+            if spec.family_every and offset % spec.family_every == 0:
+                close_merge()
+                merge_left = 0
+                ws.append([rng.choice(FAMILIES)])
+                excel_row += 1
+                written["family_rows"] += 1
+            if recent and rng.random() < spec.duplicate_rate:
+                row = list(rng.choice(recent))
+                written["duplicates"] += 1
+            else:
+                cost_value = _messy_cost(rng, rng.uniform(0.5, 4000), spec.messy_cost_rate)
+                written["messy_costs"] += 0 if isinstance(cost_value, float) else 1
+                row = [
+                    _part_number(rng, idx),
+                    f"{rng.choice(ITEMS)} {rng.randint(1, 60)} {rng.choice(['TON', 'IN', 'V', 'MFD'])}",
+                    rng.choice(MANUFACTURERS),
+                    cost_value,
+                    category,
+                    f"F{idx:08d}",
+                ]
+                recent = (recent + [row])[-50:]
+            # Vertically merged descriptions, like the model blocks in the Carrier/Bryant books.
+            if merge_left > 0:
+                row = [*row[:1], None, *row[2:]]
+                merge_left -= 1
+                if merge_left == 0:
+                    ws.append(row)
+                    excel_row += 1
+                    close_merge()
+                    idx += 1
+                    written["rows"] += 1
+                    continue
+            elif spec.merged_every and offset % spec.merged_every == spec.merged_every - 1:
+                merge_start = excel_row + 1
+                merge_left = rng.randint(2, 5)
+            ws.append(row)
+            excel_row += 1
+            idx += 1
+            written["rows"] += 1
+        close_merge()
+    wb.save(path)
+    return written
+
+
+def generate_delimited_book(path: str | Path, spec: BookSpec, delimiter: str = "\t") -> dict[str, int]:
+    # Distributor exports that are really text files wearing an .xlsx extension.
+    rng = random.Random(spec.seed)
+    buf = io.StringIO()
+    buf.write(delimiter.join(["Item ID", "Item Desc", "Manufacturer", "Price"]) + "\n")
+    for idx in range(spec.rows):
+        cost = _messy_cost(rng, rng.uniform(0.5, 4000), spec.messy_cost_rate)
+        desc = f"{rng.choice(ITEMS)} {rng.randint(1, 60)}"
+        buf.write(delimiter.join([_part_number(rng, idx), desc, rng.choice(MANUFACTURERS), str(cost)]) + "\n")
+    Path(path).write_text(buf.getvalue(), encoding="latin-1", errors="replace")
+    return {"rows": spec.rows}
+
+
+def generate_truncated_book(path: str | Path, spec: BookSpec) -> dict[str, int]:
+    # A real workbook cut off mid-file, as seen with interrupted downloads.
+    generate_book(path, spec)
+    data = Path(path).read_bytes()
+    Path(path).write_bytes(data[: max(2, len(data) // 2)])
+    return {"rows": 0}
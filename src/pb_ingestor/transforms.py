@@ -0,0 +1,456 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+from typing import Any, Callable
+
+from .crosswalk import CrosswalkRow
+from .ingest import SourceRow
+from .markup import MarkupProfile
+
+# Source headers each logical field is looked up under, most specific first.
+PART_NUMBER_FIELDS = ["manufacturer part number", "part number", "mfr part", "model", "item id", "item", "sku"]
+DESCRIPTION_FIELDS = ["description", "item description", "item desc", "name"]
+COST_FIELDS = ["cost", "net cost", "price", "customer cost", "net", "nsp", "your cost", "dealer"]
+MANUFACTURER_FIELDS = ["manufacturer", "mfr", "brand"]
+CATEGORY_FIELDS = ["category"]
+WARRANTY_FIELDS = ["warranty"]
+FIELD_CANDIDATES = {
+    "part_number": PART_NUMBER_FIELDS,
+    "description": DESCRIPTION_FIELDS,
+    "cost": COST_FIELDS,
+    "manufacturer": MANUFACTURER_FIELDS,
+}
+CATEGORY_SHEET_TOKENS = {
+    "gas furnaces",
+    "fan coils & heat strips",
+    "fan coils",
+    "evap coils",
+    "air conditioners",
+    "heat pumps",
+    "accessories",
+    "mobile home approved",
+    "crossover systems",
+    "ductless single-zone",
+    "ductless multi-zone",
+    "unitary & crossover",
+    "single zone dls",
+    "ducted solutions",
+    "multi-zone dls",
+}
+BRAND_HINTS = {
+    "bryant": "Bryant",
+    "carrier": "Carrier",
+    "day & night": "Day & Night",
+    "day and night": "Day & Night",
+    "temp control": "Temp Control",
+    "kinzer": "Kinzer",
+    "gallatin": "Gallatin",
+    "hollowtop": "Hollowtop",
+}
+
+# Columns every mapped row carries, with the definition used when the crosswalk does not declare (or leaves
+# blank) their source. Declared crosswalk columns outside this list are appended after the system columns.
+STANDARD_COLUMNS = [
+    ("Manufacturer Part Number", "manufacturer_part_number", "store_original_and_normalized"),
+    ("Part Name", "merged_product_name|source_description|scraped_name", "prefer_source_then_scrape"),
+    ("Description", "source_description|scraped_description", "overwrite_when_blank_or_high_confidence"),
+    ("Manufacturer", "source_manufacturer|filename_context|sheet_name", "normalize_manufacturer_name"),
+    ("Category", "sheet_name|merged_header|source_category", "combine_context"),
+    ("Part Cost", "source_cost", "parse_decimal"),
+    ("Part Price", "derived_from_markup", "round_nearest_cent"),
+    ("Labor Cost", "user_form_or_profile_default", "parse_decimal"),
+    ("Labor Rate", "user_form_or_profile_default", "parse_decimal"),
+    ("Labor Hours", "user_manual_input", "leave_blank_default"),
+    ("Warranty", "scraped_warranty|source_warranty", "aggregate_all_warranties"),
+]
+SYSTEM_SOURCE = "system"
+SYSTEM_RULES = {"processed_or_manual_review", "error_or_warning_text"}
+# Derived sources read other output columns, so those are computed first.
+DERIVED_INPUTS = {
+    "derived_from_markup": ("Part Cost",),
+    "derived_labor_rate_x_hours": ("Labor Rate", "Labor Hours"),
+    "derived_part_price_plus_labor_price": ("Part Price", "Labor Price"),
+}
+# Sources whose value depends on the output column they feed, so they are never shared between columns.
+PER_COLUMN_SOURCES = {"user_form_or_profile_default", "user_manual_input", *DERIVED_INPUTS}
+_CENT = Decimal("0.01")
+
+Column = list[Any]
+
+
+def find_field_header(values: dict[str, Any], candidates: list[str]) -> str | None:
+    # Exact (case-insensitive) header match with a non-blank value first, then a header containing a candidate.
+    lower_map = {k.lower(): k for k in values}
+    for c in candidates:
+        key = lower_map.get(c.lower())
+        if key is not None and str(values[key]).strip():
+            return key
+    for header, key in lower_map.items():
+        if values[key] in (None, ""):
+            continue
+        for c in candidates:
+            if c.lower() in header:
+                return key
+    return None
+
+
+class FieldLookup:
+    # find_field_header for one candidate list, with the header scan done once per distinct set of headers (in
+    # practice once per sheet) instead of once per row.
+    def __init__(self, candidates: list[str]) -> None:
+        self.candidates = [c.lower() for c in candidates]
+        self._orders: dict[tuple[str, ...], tuple[tuple[str, ...], tuple[str, ...]]] = {}
+
+    def _order(self, headers: tuple[str, ...]) -> tuple[tuple[str, ...], tuple[str, ...]]:
+        lower_map = {k.lower(): k for k in headers}
+        exact = tuple(lower_map[c] for c in self.candidates if c in lower_map)
+        contains = tuple(key for header, key in lower_map.items() if any(c in header for c in self.candidates))
+        return exact, contains
+
+    def column(self, rows: list[SourceRow], shapes: list[tuple[str, ...]]) -> Column:
+        out: Column = []
+        orders = self._orders
+        for row, shape in zip(rows, shapes):
+            order = orders.get(shape)
+            if order is None:
+                order = orders[shape] = self._order(shape)
+            values = row.values
+            found = None
+            for key in order[0]:
+                if str(values[key]).strip():
+                    found = values[key]
+                    break
+            else:
+                for key in order[1]:
+                    value = values[key]
+                    if value is not None and value != "":
+                        found = value
+                        break
+            out.append(found)
+        return out
+
+
+def brand_from_filename(source_file: str) -> str | None:
+    sf = source_file.lower()
+    for token, brand in BRAND_HINTS.items():
+        if token in sf:
+            return brand
+    return None
+
+
+def parse_decimal(value: Any) -> Decimal | None:
+    if value is None or value == "":
+        return None
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(str(value))
+    text = str(value).strip().replace("$", "").replace(",", "")
+    try:
+        return Decimal(text)
+    except InvalidOperation:
+        return None
+
+
+def _blank(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def _as_float(value: Decimal | None) -> float | None:
+    return float(value) if value is not None else None
+
+
+@dataclass
+class Batch:
+    rows: list[SourceRow]
+    columns: dict[str, Column] = field(default_factory=dict)
+    errors: dict[int, str] = field(default_factory=dict)
+    # Per-batch cache, so a source read by several columns (e.g. sheet_name) is resolved once.
+    sources: dict[str, Column] = field(default_factory=dict)
+    _shapes: list[tuple[str, ...]] | None = None
+
+    @property
+    def shapes(self) -> list[tuple[str, ...]]:
+        if self._shapes is None:
+            self._shapes = [tuple(row.values) for row in self.rows]
+        return self._shapes
+
+
+@dataclass
+class _Settings:
+    markup_profile: MarkupProfile
+    defaults: dict[str, Any]
+
+
+Resolver = Callable[[Batch], Column]
+
+
+def _field_source(candidates: list[str]) -> Callable[[str, _Settings], Resolver]:
+    def bind(column: str, settings: _Settings) -> Resolver:
+        lookup = FieldLookup(candidates)
+        return lambda batch: lookup.column(batch.rows, batch.shapes)
+
+    return bind
+
+
+def _row_source(getter: Callable[[SourceRow], Any]) -> Callable[[str, _Settings], Resolver]:
+    def bind(column: str, settings: _Settings) -> Resolver:
+        return lambda batch: [getter(row) for row in batch.rows]
+
+    return bind
+
+
+def _blank_source(column: str, settings: _Settings) -> Resolver:
+    # Scraped values only exist after enrichment; at conversion time they are always blank.
+    return lambda batch: [None] * len(batch.rows)
+
+
+def _filename_source(column: str, settings: _Settings) -> Resolver:
+    brands: dict[str, str | None] = {}
+
+    def resolve(batch: Batch) -> Column:
+        out = []
+        for row in batch.rows:
+            if row.source_file not in brands:
+                brands[row.source_file] = brand_from_filename(row.source_file)
+            out.append(brands[row.source_file])
+        return out
+
+    return resolve
+
+
+def _default_source(column: str, settings: _Settings) -> Resolver:
+    # One constant per run, broadcast over the batch.
+    value = settings.defaults.get(column)
+    return lambda batch: [value] * len(batch.rows)
+
+
+def _manual_input_source(column: str, settings: _Settings) -> Resolver:
+    # Values a customer typed into a completed template come back under the template's own header.
+    lookup = FieldLookup([column])
+    return lambda batch: lookup.column(batch.rows, batch.shapes)
+
+
+def _markup_source(column: str, settings: _Settings) -> Resolver:
+    profile = settings.markup_profile
+
+    def resolve(batch: Batch) -> Column:
+        out: Column = []
+        for i, cost in enumerate(batch.columns["Part Cost"]):
+            if cost is None:
+                out.append(None)
+                continue
+            try:
+                out.append(profile.price_for_cost(Decimal(str(cost))))
+            except Exception as exc:
+                batch.errors[i] = f"markup_error:{exc}"
+                out.append(None)
+        return out
+
+    return resolve
+
+
+def _labor_price_source(column: str, settings: _Settings) -> Resolver:
+    def resolve(batch: Batch) -> Column:
+        out: Column = []
+        for rate, hours in zip(batch.columns["Labor Rate"], batch.columns["Labor Hours"]):
+            if rate is None or hours is None:
+                out.append(None)
+                continue
+            rate_d, hours_d = parse_decimal(rate), parse_decimal(hours)
+            out.append(rate_d * hours_d if rate_d is not None and hours_d is not None else None)
+        return out
+
+    return resolve
+
+
+def _total_price_source(column: str, settings: _Settings) -> Resolver:
+    def resolve(batch: Batch) -> Column:
+        out: Column = []
+        for part, labor in zip(batch.columns["Part Price"], batch.columns["Labor Price"]):
+            part_d = parse_decimal(part) if part is not None else None
+            if part_d is None:
+                out.append(None)
+                continue
+            labor_d = parse_decimal(labor) if labor is not None else None
+            out.append(part_d + labor_d if labor_d is not None else part_d)
+        return out
+
+    return resolve
+
+
+SOURCES: dict[str, Callable[[str, _Settings], Resolver]] = {
+    "manufacturer_part_number": _field_source(PART_NUMBER_FIELDS),
+    "merged_product_name": _row_source(lambda row: row.family_context),
+    "merged_header": _row_source(lambda row: row.family_context),
+    "source_description": _field_source(DESCRIPTION_FIELDS),
+    "source_manufacturer": _field_source(MANUFACTURER_FIELDS),
+    "source_category": _field_source(CATEGORY_FIELDS),
+    "source_cost": _field_source(COST_FIELDS),
+    "source_warranty": _field_source(WARRANTY_FIELDS),
+    "sheet_name": _row_source(lambda row: row.source_sheet),
+    "filename_context": _filename_source,
+    "scraped_name": _blank_source,
+    "scraped_description": _blank_source,
+    "scraped_warranty": _blank_source,
+    "user_form_or_profile_default": _default_source,
+    "user_manual_input": _manual_input_source,
+    "derived_from_markup": _markup_source,
+    "derived_labor_rate_x_hours": _labor_price_source,
+    "derived_part_price_plus_labor_price": _total_price_source,
+}
+
+
+def _coalesce(candidates: list[Column]) -> Column:
+    # First non-blank value per row, in source_priority order.
+    if len(candidates) == 1:
+        return [None if v is None or v == "" else v for v in candidates[0]]
+    return [next((v for v in values if not _blank(v)), None) for values in zip(*candidates)]
+
+
+def _identity(candidates: list[Column]) -> Column:
+    # The original value is kept as read; the mapper adds the normalized dedupe key alongside it.
+    return candidates[0]
+
+
+def _to_decimal_float(candidates: list[Column]) -> Column:
+    return [None if v is None else _as_float(parse_decimal(v)) for v in _coalesce(candidates)]
+
+
+def _round_cent(candidates: list[Column]) -> Column:
+    out: Column = []
+    for value in _coalesce(candidates):
+        d = parse_decimal(value) if value is not None else None
+        out.append(float(d.quantize(_CENT, rounding=ROUND_HALF_UP)) if d is not None else None)
+    return out
+
+
+def _manufacturer(candidates: list[Column]) -> Column:
+    # Category sheet names ("Gas Furnaces") are never a manufacturer; with nothing usable the column is blank.
+    out: Column = []
+    for values in zip(*candidates):
+        name = ""
+        for value in values:
+            text = str(value).strip() if value is not None else ""
+            if text and text.lower() not in CATEGORY_SHEET_TOKENS:
+                name = text
+                break
+        out.append(name)
+    return out
+
+
+def _warranties(candidates: list[Column]) -> Column:
+    out: Column = []
+    for values in zip(*candidates):
+        texts = [str(v).strip() for v in values if not _blank(v) and str(v).strip()]
+        out.append("; ".join(dict.fromkeys(texts)) or None)
+    return out
+
+
+TRANSFORMS: dict[str, Callable[[list[Column]], Column]] = {
+    "": _coalesce,
+    "store_original_and_normalized": _identity,
+    "prefer_source_then_scrape": _coalesce,
+    # Enrichment applies the high-confidence overwrite later; at conversion the source value wins when present.
+    "overwrite_when_blank_or_high_confidence": _coalesce,
+    "combine_context": _coalesce,
+    "leave_blank_default": _coalesce,
+    "parse_decimal": _to_decimal_float,
+    "round_nearest_cent": _round_cent,
+    "normalize_manufacturer_name": _manufacturer,
+    "aggregate_all_warranties": _warranties,
+}
+
+
+@dataclass(frozen=True)
+class ColumnPlan:
+    column: str
+    sources: tuple[str, ...]
+    rule: str
+    resolvers: tuple[Resolver, ...]
+    transform: Callable[[list[Column]], Column]
+
+
+class TransformPlan:
+    # A crosswalk compiled once per run: each output column becomes resolvers plus a transform over whole columns.
+    def __init__(self, steps: list[ColumnPlan], columns: list[str], extra_columns: list[str]) -> None:
+        self.steps = steps
+        self.columns = columns
+        self.extra_columns = extra_columns
+
+    def run(self, rows: list[SourceRow], part_numbers: Column | None = None, shapes: list[tuple[str, ...]] | None = None) -> Batch:
+        batch = Batch(rows, _shapes=shapes)
+        if part_numbers is not None:
+            batch.sources["manufacturer_part_number"] = part_numbers
+        for step in self.steps:
+            candidates = []
+            for name, resolver in zip(step.sources, step.resolvers):
+                if name in PER_COLUMN_SOURCES:
+                    candidates.append(resolver(batch))
+                    continue
+                if name not in batch.sources:
+                    batch.sources[name] = resolver(batch)
+                candidates.append(batch.sources[name])
+            batch.columns[step.column] = step.transform(candidates) if candidates else [None] * len(rows)
+        return batch
+
+
+def _order_steps(steps: dict[str, ColumnPlan]) -> list[ColumnPlan]:
+    ordered: list[ColumnPlan] = []
+    state: dict[str, str] = {}
+
+    def visit(column: str) -> None:
+        if state.get(column) == "done":
+            return
+        if state.get(column) == "visiting":
+            raise ValueError(f"Crosswalk derived columns form a cycle at {column!r}")
+        state[column] = "visiting"
+        for source in steps[column].sources:
+            for dependency in DERIVED_INPUTS.get(source, ()):
+                if dependency in steps:
+                    visit(dependency)
+        state[column] = "done"
+        ordered.append(steps[column])
+
+    for column in steps:
+        visit(column)
+    return ordered
+
+
+def compile_plan(
+    crosswalk: list[CrosswalkRow],
+    markup_profile: MarkupProfile,
+    labor_cost_default: float | None = None,
+    labor_rate_default: float | None = None,
+) -> TransformPlan:
+    settings = _Settings(markup_profile, {"Labor Cost": labor_cost_default, "Labor Rate": labor_rate_default})
+    definitions = {column: (sources, rule) for column, sources, rule in STANDARD_COLUMNS}
+    extra_columns: list[str] = []
+    for cw in crosswalk:
+        column = cw.output_column
+        if cw.source_priority == SYSTEM_SOURCE or cw.transform_rule in SYSTEM_RULES:
+            continue
+        if column not in definitions and column not in extra_columns:
+            extra_columns.append(column)
+        if cw.source_priority or column not in definitions:
+            definitions[column] = (cw.source_priority, cw.transform_rule)
+
+    steps: dict[str, ColumnPlan] = {}
+    for column, (priority, rule) in definitions.items():
+        sources = tuple(s.strip() for s in priority.split("|") if s.strip())
+        unknown = [s for s in sources if s not in SOURCES]
+        if unknown:
+            raise ValueError(f"Crosswalk column {column!r} has unknown source(s): {', '.join(unknown)}")
+        if rule not in TRANSFORMS:
+            raise ValueError(f"Crosswalk column {column!r} has unknown transform_rule: {rule}")
+        resolvers = tuple(SOURCES[s](column, settings) for s in sources)
+        steps[column] = ColumnPlan(column, sources, rule, resolvers, TRANSFORMS[rule])
+
+    # Derived inputs the crosswalk does not produce (e.g. Labor Price without hours) read as blank.
+    for source in {s for step in steps.values() for s in step.sources}:
+        for dependency in DERIVED_INPUTS.get(source, ()):
+            if dependency not in steps:
+                steps[dependency] = ColumnPlan(dependency, (), "", (), _coalesce)
+    columns = [column for column, _, _ in STANDARD_COLUMNS]
+    return TransformPlan(_order_steps(steps), columns, extra_columns)
@@ -0,0 +1,151 @@
+from __future__ import annotations
+
+import glob
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Iterable
+
+from jsonschema import Draft202012Validator
+
+SCHEMA_DIR = Path("schemas")
+QA_SCHEMA_PATH = SCHEMA_DIR / "qa_run_report.schema.json"
+SUMMARY_FORMAT = "pb-ingestor-validation/1"
+MAX_ERRORS = 10
+CHUNK_FILES = 16
+
+_worker_validators: dict[str, Draft202012Validator] = {}
+
+
+@lru_cache(maxsize=32)
+def _compiled(path: str, mtime_ns: int) -> Draft202012Validator:
+    schema = json.loads(Path(path).read_text())
+    Draft202012Validator.check_schema(schema)
+    return Draft202012Validator(schema)
+
+
+def compiled_validator(path: str | Path) -> Draft202012Validator:
+    # Keyed on mtime so an edited schema is picked up without restarting long-running callers.
+    resolved = Path(path).resolve()
+    return _compiled(str(resolved), resolved.stat().st_mtime_ns)
+
+
+def schema_name(path: str | Path) -> str:
+    return Path(path).name.removesuffix(".json").removesuffix(".schema")
+
+
+def error_messages(validator: Draft202012Validator, payload: Any, limit: int = MAX_ERRORS) -> list[str]:
+    errors = sorted(validator.iter_errors(payload), key=lambda e: list(map(str, e.path)))
+    return [f"{'.'.join(map(str, e.path)) or '<root>'}:{e.message}" for e in errors[:limit]]
+
+
+def validate_qa_report(report: dict[str, Any], schema_path: str | Path = QA_SCHEMA_PATH) -> None:
+    errors = error_messages(compiled_validator(schema_path), report)
+    if errors:
+        raise ValueError(f"QA report does not match {Path(schema_path).name}: {'; '.join(errors)}")
+
+
+def match_schema(payload: Any, validators: dict[str, Draft202012Validator]) -> str | None:
+    # Pick the schema whose required keys the payload carries; the most specific match wins.
+    if not isinstance(payload, dict):
+        return None
+    best, best_required = None, -1
+    for name, validator in validators.items():
+        required = validator.schema.get("required", [])
+        if required and all(key in payload for key in required) and len(required) > best_required:
+            best, best_required = name, len(required)
+    return best
+
+
+def expand_inputs(inputs: Iterable[str]) -> list[Path]:
+    files: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files += sorted(p for p in path.rglob("*") if p.suffix in {".json", ".jsonl"} and p.is_file())
+        elif path.is_file():
+            files.append(path)
+        else:
+            files += sorted(Path(p) for p in glob.glob(item, recursive=True) if Path(p).is_file())
+    return list(dict.fromkeys(files))
+
+
+def _payloads(path: Path) -> Iterable[tuple[int | None, Any]]:
+    if path.suffix != ".jsonl":
+        yield None, json.loads(path.read_text())
+        return
+    with path.open() as fh:
+        for line_no, line in enumerate(fh, start=1):
+            if line.strip():
+                yield line_no, json.loads(line)
+
+
+def validate_file(path: str | Path, validators: dict[str, Draft202012Validator], schema: str | None = None) -> dict[str, Any]:
+    path = Path(path)
+    result: dict[str, Any] = {"path": str(path), "status": "valid", "records": 0, "schemas": [], "errors": []}
+    try:
+        for line_no, payload in _payloads(path):
+            result["records"] += 1
+            name = schema or match_schema(payload, validators)
+            if name is None:
+                result["errors"].append(f"{'line ' + str(line_no) + ': ' if line_no else ''}no matching schema")
+                continue
+            if name not in result["schemas"]:
+                result["schemas"].append(name)
+            for message in error_messages(validators[name], payload):
+                result["errors"].append(f"line {line_no}: {message}" if line_no else message)
+    except (OSError, ValueError) as exc:
+        result["status"] = "unreadable"
+        result["errors"].append(f"{type(exc).__name__}: {exc}")
+        return result
+    if result["errors"]:
+        result["status"] = "unmatched" if not result["schemas"] else "invalid"
+    result["errors"] = result["errors"][:MAX_ERRORS]
+    return result
+
+
+def _init_worker(schema_paths: dict[str, str]) -> None:
+    _worker_validators.update({name: compiled_validator(p) for name, p in schema_paths.items()})
+
+
+def _validate_chunk(paths: list[str], schema: str | None) -> list[dict[str, Any]]:
+    return [validate_file(p, _worker_validators, schema) for p in paths]
+
+
+def validate_many(
+    inputs: Iterable[str],
+    schema_dir: str | Path = SCHEMA_DIR,
+    schema: str | None = None,
+    workers: int = 1,
+) -> dict[str, Any]:
+    schema_paths = {schema_name(p): str(p) for p in sorted(Path(schema_dir).glob("*.schema.json"))}
+    if schema is not None and schema not in schema_paths:
+        if not Path(schema).is_file():
+            raise ValueError(f"Unknown schema: {schema} (available: {', '.join(schema_paths)})")
+        schema_paths[schema_name(schema)] = schema
+        schema = schema_name(schema)
+    files = [str(p) for p in expand_inputs(inputs)]
+
+    if workers <= 1 or len(files) <= CHUNK_FILES:
+        validators = {name: compiled_validator(p) for name, p in schema_paths.items()}
+        results = [validate_file(p, validators, schema) for p in files]
+    else:
+        # Each worker compiles the schemas once and then takes files in chunks.
+        chunks = [files[i : i + CHUNK_FILES] for i in range(0, len(files), CHUNK_FILES)]
+        workers = min(workers, len(chunks), os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(schema_paths,)) as pool:
+            results = [r for chunk in pool.map(_validate_chunk, chunks, [schema] * len(chunks)) for r in chunk]
+
+    counts = {status: 0 for status in ("valid", "invalid", "unmatched", "unreadable")}
+    for result in results:
+        counts[result["status"]] += 1
+    return {
+        "format": SUMMARY_FORMAT,
+        "schemas": sorted(schema_paths),
+        "files": len(results),
+        "records": sum(r["records"] for r in results),
+        **counts,
+        "results": results,
+    }
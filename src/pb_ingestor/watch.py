@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import json
+import time
+from concurrent.futures import Executor, Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+from .batch import SUPPORTED_OUTPUT_TYPES, failure_record
+from .configs import CONFIGS
+from .crosswalk import infer_base_template_path, infer_crosswalk_path
+from .metrics import MetricsRegistry, record_conversion, record_failure
+from .pipeline import ConversionError, run_conversion
+
+SOURCE_SUFFIXES = {".xlsx", ".xlsm", ".xls", ".csv", ".txt"}
+PARTIAL_SUFFIXES = {".part", ".tmp", ".crdownload", ".partial"}
+
+
+@dataclass(frozen=True)
+class WatchSettings:
+    watch_dir: str
+    results_dir: str
+    template_type: str = "bundle"
+    markup_profile_path: str = "config/markup/default_global_tiered_markup.json"
+    labor_cost_default: float | None = None
+    labor_rate_default: float | None = None
+    workers: int = 2
+    debounce_s: float = 2.0
+    poll_interval_s: float = 1.0
+
+
+def _warm_up(markup_profile_path: str) -> None:
+    # Load every config into the worker's registry up front so the first dropped file is not slower.
+    CONFIGS.markup(markup_profile_path)
+    for template_type in sorted(SUPPORTED_OUTPUT_TYPES):
+        CONFIGS.crosswalk(infer_crosswalk_path(template_type))
+        CONFIGS.template_bytes(infer_base_template_path(template_type))
+
+
+def warm_pool(workers: int, markup_profile_path: str) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(max_workers=max(1, workers), initializer=_warm_up, initargs=(markup_profile_path,))
+
+
+def template_type_for(path: Path, default: str) -> str:
+    # Files dropped into a sub-folder named after a template type use that template.
+    return path.parent.name if path.parent.name in SUPPORTED_OUTPUT_TYPES else default
+
+
+def results_dir_for(path: Path, watch_dir: str | Path, results_dir: str | Path) -> Path:
+    # Mirrors the drop folder, file name included, so bundle/acme.xlsx, supplier_loader/acme.xlsx and
+    # bundle/acme.csv keep separate results.
+    try:
+        relative = path.relative_to(watch_dir)
+    except ValueError:
+        relative = Path(path.name)
+    return Path(results_dir) / relative
+
+
+def convert_dropped_file(source: str, settings: dict[str, Any]) -> dict[str, Any]:
+    path = Path(source)
+    template_type = template_type_for(path, settings["template_type"])
+    out = results_dir_for(path, settings["watch_dir"], settings["results_dir"])
+    return run_conversion(
+        source=source,
+        template_type=template_type,
+        markup_profile_path=settings["markup_profile_path"],
+        output_csv=str(out / "converted.csv"),
+        output_workbook=str(out / "converted.xlsx"),
+        qa_json=str(out / "qa.json"),
+        manual_review_csv=str(out / "manual_review.csv"),
+        labor_cost_default=settings["labor_cost_default"],
+        labor_rate_default=settings["labor_rate_default"],
+        skip_unchanged=True,
+    )
+
+
+def _is_candidate(path: Path) -> bool:
+    name = path.name
+    if name.startswith(("~$", ".")) or path.suffix.lower() in PARTIAL_SUFFIXES:
+        return False
+    return path.is_file() and path.suffix.lower() in SOURCE_SUFFIXES
+
+
+class FolderWatcher:
+    def __init__(
+        self,
+        watch_dir: str | Path,
+        debounce_s: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+        exclude: str | Path | None = None,
+    ) -> None:
+        self.watch_dir = Path(watch_dir)
+        self.exclude = Path(exclude).resolve() if exclude is not None else None
+        self.debounce_s = debounce_s
+        self.clock = clock
+        self._observed: dict[Path, tuple[int, int, float]] = {}
+        # Latest converted signature per path; entries go when the file does.
+        self._handled: dict[Path, tuple[int, int]] = {}
+
+    def poll(self) -> list[Path]:
+        now = self.clock()
+        ready: list[Path] = []
+        current: set[Path] = set()
+        for path in sorted(self.watch_dir.rglob("*")):
+            if not _is_candidate(path):
+                continue
+            if self.exclude is not None and path.resolve().is_relative_to(self.exclude):
+                continue
+            try:
+                st = path.stat()
+            except FileNotFoundError:
+                continue
+            current.add(path)
+            signature = (st.st_size, st.st_mtime_ns)
+            if self._handled.get(path) == signature:
+                continue
+            previous = self._observed.get(path)
+            if previous is None or previous[:2] != signature:
+                # New or still being written: restart the debounce window.
+                self._observed[path] = (*signature, now)
+                if self.debounce_s > 0:
+                    continue
+                previous = self._observed[path]
+            if now - previous[2] >= self.debounce_s:
+                self._handled[path] = signature
+                del self._observed[path]
+                ready.append(path)
+        for gone in set(self._observed) - current:
+            del self._observed[gone]
+        for gone in set(self._handled) - current:
+            del self._handled[gone]
+        return ready
+
+
+class WatchService:
+    def __init__(
+        self,
+        settings: WatchSettings,
+        log: Callable[[str], None] = print,
+        metrics: MetricsRegistry | None = None,
+        executor: Executor | None = None,
+    ) -> None:
+        self.settings = settings
+        self.log = log
+        self.metrics = metrics
+        self.watcher = FolderWatcher(settings.watch_dir, settings.debounce_s, exclude=settings.results_dir)
+        # A pool passed in (serve's, shared with the HTTP service) belongs to the caller and is not shut down here.
+        self._owns_executor = executor is None
+        self.executor = executor or warm_pool(settings.workers, settings.markup_profile_path)
+        self.in_flight: dict[Future, Path] = {}
+
+    def run_once(self) -> None:
+        for path in self.watcher.poll():
+            self.log(f"queued={path}")
+            self.in_flight[self.executor.submit(convert_dropped_file, str(path), asdict(self.settings))] = path
+        for future in [f for f in self.in_flight if f.done()]:
+            self._finish(self.in_flight.pop(future), future)
+
+    def _finish(self, path: Path, future: Future) -> None:
+        out = results_dir_for(path, self.settings.watch_dir, self.settings.results_dir)
+        out.mkdir(parents=True, exist_ok=True)
+        try:
+            result = future.result()
+        except ConversionError as exc:
+            record = {"source": str(path), "failure": failure_record(str(path), exc.stage, exc.message)}
+            self.log(f"failed={path} stage={exc.stage} error={exc.message}")
+        except Exception as exc:
+            record = {"source": str(path), "failure": failure_record(str(path), "worker", f"{type(exc).__name__}: {exc}")}
+            self.log(f"failed={path} stage=worker error={exc}")
+        else:
+            record = {"source": str(path), "result": result}
+            summary = result["summary"]
+            self.log(f"converted={path} summary={summary['rows_processed']} processed / {summary['rows_incomplete']} incomplete")
+        (out / "result.json").write_text(json.dumps(record, indent=2, default=str))
+        if self.metrics is not None:
+            if "failure" in record:
+                record_failure(self.metrics, record["failure"])
+            else:
+                record_conversion(self.metrics, record["result"])
+
+    def run_forever(self) -> None:
+        self.log(f"watching={self.settings.watch_dir} results={self.settings.results_dir}")
+        try:
+            while True:
+                self.run_once()
+                time.sleep(self.settings.poll_interval_s)
+        finally:
+            self.close()
+
+    def drain(self) -> None:
+        while self.in_flight:
+            self.run_once()
+            time.sleep(0.05)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(wait=True, cancel_futures=True)
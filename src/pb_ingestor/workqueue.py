@@ -0,0 +1,411 @@
+from __future__ import annotations
+
+import json
+import multiprocessing
+import os
+import socket
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from multiprocessing.connection import wait
+from pathlib import Path
+from typing import Any, Callable, Iterator
+
+from .batch import ConversionJob, JobOutcome, consolidate, failure_record, poll_job_process, start_job_process
+from .crosswalk import ManifestRow
+
+LEASE_S = 300.0
+HEARTBEATS_PER_LEASE = 3
+MAX_ATTEMPTS = 3
+RETRY_DELAY_S = 30.0
+POLL_S = 2.0
+# Failures that another attempt (possibly on another node) can fix. Conversion-stage failures such as a
+# corrupt source are deterministic and are recorded on the first attempt.
+RETRYABLE_STAGES = {"worker", "worker_crash", "timeout", "lease_expired"}
+OPEN_STATUSES = ("pending", "leased")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    batch TEXT PRIMARY KEY,
+    manifest TEXT NOT NULL,
+    consolidated_qa TEXT NOT NULL,
+    skipped TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    consolidation_claimed_at REAL,
+    consolidated_at REAL
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY,
+    batch TEXT NOT NULL,
+    key TEXT NOT NULL,
+    kwargs TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL,
+    available_at REAL NOT NULL DEFAULT 0,
+    priority REAL NOT NULL DEFAULT 0,
+    lease_owner TEXT,
+    lease_expires REAL,
+    result TEXT,
+    failure TEXT,
+    wall_s REAL,
+    UNIQUE (batch, key)
+)
+"""
+# Columns added after queue files may already exist; CREATE TABLE IF NOT EXISTS leaves an older table as it was.
+_ADDED_COLUMNS = {
+    "batches": [("consolidation_claimed_at", "REAL")],
+    "jobs": [("priority", "REAL NOT NULL DEFAULT 0")],
+}
+# Created after the migration, since they may cover added columns.
+_INDEXES = "CREATE INDEX IF NOT EXISTS jobs_open ON jobs (status, available_at, priority)"
+_OPEN_JOBS = "SELECT 1 FROM jobs WHERE jobs.batch = batches.batch AND status IN ('pending', 'leased')"
+
+
+@dataclass
+class QueuedJob:
+    id: int
+    batch: str
+    job: ConversionJob
+    attempt: int
+    max_attempts: int
+
+
+@dataclass
+class _Leased:
+    claimed: QueuedJob
+    process: Any
+    conn: Any
+    started: float
+    last_beat: float
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def _new_batch_id() -> str:
+    return f"{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:6]}"
+
+
+class WorkQueue:
+    # Jobs live in one SQLite file on storage every node can reach. A claim is a lease: the worker must
+    # heartbeat before lease_expires, otherwise any other worker may take the job over.
+    def __init__(
+        self,
+        path: str | Path,
+        lease_s: float = LEASE_S,
+        retry_delay_s: float = RETRY_DELAY_S,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lease_s = lease_s
+        self.retry_delay_s = retry_delay_s
+        # Wall-clock time, not monotonic: leases are compared across processes and hosts.
+        self.clock = clock
+        self._db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        with self._write() as db:
+            for statement in filter(str.strip, _SCHEMA.split(";")):
+                db.execute(statement)
+            for table, columns in _ADDED_COLUMNS.items():
+                existing = {row[1] for row in db.execute(f"PRAGMA table_info({table})")}
+                for name, definition in columns:
+                    if name not in existing:
+                        db.execute(f"ALTER TABLE {table} ADD COLUMN {name} {definition}")
+                        if table == "jobs":
+                            # The older index predates the column; rebuild it below with the column included.
+                            db.execute("DROP INDEX IF EXISTS jobs_open")
+            db.execute(_INDEXES)
+
+    @contextmanager
+    def _write(self) -> Iterator[sqlite3.Connection]:
+        # BEGIN IMMEDIATE takes the write lock before reading, so two workers cannot claim the same row.
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            yield self._db
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute("COMMIT")
+
+    def close(self) -> None:
+        self._db.close()
+
+    def enqueue(
+        self,
+        jobs: list[ConversionJob],
+        manifest_path: str,
+        consolidated_qa: str,
+        skipped: list[ManifestRow] | None = None,
+        batch: str | None = None,
+        max_attempts: int = MAX_ATTEMPTS,
+        priorities: list[float] | None = None,
+    ) -> tuple[str, int]:
+        batch = batch or _new_batch_id()
+        with self._write() as db:
+            db.execute(
+                "INSERT OR IGNORE INTO batches (batch, manifest, consolidated_qa, skipped, created_at) VALUES (?, ?, ?, ?, ?)",
+                (batch, manifest_path, consolidated_qa, json.dumps([asdict(row) for row in skipped or []]), self.clock()),
+            )
+            # Re-enqueueing a batch only adds keys it does not have yet.
+            added = 0
+            for index, job in enumerate(jobs):
+                cur = db.execute(
+                    "INSERT OR IGNORE INTO jobs (batch, key, kwargs, max_attempts, priority) VALUES (?, ?, ?, ?, ?)",
+                    (batch, job.key, json.dumps(job.kwargs), max(1, max_attempts), priorities[index] if priorities else 0),
+                )
+                added += cur.rowcount
+            if added:
+                db.execute("UPDATE batches SET consolidation_claimed_at = NULL, consolidated_at = NULL WHERE batch = ?", (batch,))
+        return batch, added
+
+    def claim(self, owner: str) -> QueuedJob | None:
+        with self._write() as db:
+            while True:
+                now = self.clock()
+                row = db.execute(
+                    "SELECT id, batch, key, kwargs, status, attempts, max_attempts FROM jobs"
+                    " WHERE (status = 'pending' AND available_at <= ?) OR (status = 'leased' AND lease_expires < ?)"
+                    " ORDER BY priority DESC, id LIMIT 1",
+                    (now, now),
+                ).fetchone()
+                if row is None:
+                    return None
+                job_id, batch, key, kwargs, status, attempts, max_attempts = row
+                kwargs = json.loads(kwargs)
+                if status == "leased" and attempts >= max_attempts:
+                    # The worker holding the last allowed attempt stopped heartbeating (node lost or killed).
+                    failure = failure_record(kwargs["source"], "lease_expired", f"lease expired on attempt {attempts}")
+                    db.execute(
+                        "UPDATE jobs SET status = 'dead', failure = ?, lease_owner = NULL, lease_expires = NULL WHERE id = ?",
+                        (json.dumps(failure), job_id),
+                    )
+                    continue
+                db.execute(
+                    "UPDATE jobs SET status = 'leased', attempts = attempts + 1, lease_owner = ?, lease_expires = ? WHERE id = ?",
+                    (owner, now + self.lease_s, job_id),
+                )
+                return QueuedJob(job_id, batch, ConversionJob(key, kwargs), attempts + 1, max_attempts)
+
+    def heartbeat(self, job_id: int, owner: str) -> bool:
+        cur = self._db.execute(
+            "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+            (self.clock() + self.lease_s, job_id, owner),
+        )
+        return cur.rowcount == 1
+
+    def finish(
+        self, claimed: QueuedJob, owner: str, result: dict[str, Any] | None, failure: dict[str, Any] | None, wall_s: float
+    ) -> str:
+        # Returns the job's new status, or "lost" if the lease had already passed to another worker.
+        retryable = failure is not None and failure["error_stage"] in RETRYABLE_STAGES
+        with self._write() as db:
+            if retryable and claimed.attempt < claimed.max_attempts:
+                status = "pending"
+                available_at = self.clock() + self.retry_delay_s * 2 ** (claimed.attempt - 1)
+            else:
+                status = "dead" if retryable else ("failed" if failure is not None else "done")
+                available_at = 0
+            cur = db.execute(
+                "UPDATE jobs SET status = ?, available_at = ?, result = ?, failure = ?, wall_s = ?,"
+                " lease_owner = NULL, lease_expires = NULL WHERE id = ? AND status = 'leased' AND lease_owner = ?",
+                (
+                    status,
+                    available_at,
+                    json.dumps(result) if result is not None else None,
+                    json.dumps(failure) if failure is not None else None,
+                    wall_s,
+                    claimed.id,
+                    owner,
+                ),
+            )
+        return status if cur.rowcount == 1 else "lost"
+
+    def counts(self, batch: str | None = None) -> dict[str, int]:
+        counts = {status: 0 for status in ("pending", "leased", "done", "failed", "dead")}
+        query = "SELECT status, COUNT(*) FROM jobs" + (" WHERE batch = ?" if batch else "") + " GROUP BY status"
+        for status, count in self._db.execute(query, (batch,) if batch else ()):
+            counts[status] = count
+        return counts
+
+    def batches(self) -> list[str]:
+        return [row[0] for row in self._db.execute("SELECT batch FROM batches ORDER BY created_at, batch")]
+
+    def dead_letters(self, batch: str | None = None) -> list[dict[str, Any]]:
+        query = "SELECT batch, key, attempts, failure FROM jobs WHERE status = 'dead'" + (" AND batch = ?" if batch else "")
+        return [
+            {"batch": b, "key": key, "attempts": attempts, **json.loads(failure)}
+            for b, key, attempts, failure in self._db.execute(query + " ORDER BY id", (batch,) if batch else ())
+        ]
+
+    def requeue_dead(self, batch: str | None = None) -> int:
+        with self._write() as db:
+            where = "status = 'dead'" + (" AND batch = ?" if batch else "")
+            params = (batch,) if batch else ()
+            db.execute(
+                "UPDATE batches SET consolidation_claimed_at = NULL, consolidated_at = NULL"
+                f" WHERE batch IN (SELECT batch FROM jobs WHERE {where})",
+                params,
+            )
+            cur = db.execute(f"UPDATE jobs SET status = 'pending', attempts = 0, available_at = 0, failure = NULL WHERE {where}", params)
+        return cur.rowcount
+
+    def claim_consolidation(self, batch: str) -> bool:
+        # One worker at a time assembles the consolidated QA once the batch's last job has finished. The claim
+        # is leased like a job: if its holder dies before writing, another worker may claim it after lease_s.
+        now = self.clock()
+        cur = self._db.execute(
+            "UPDATE batches SET consolidation_claimed_at = ? WHERE batch = ? AND consolidated_at IS NULL"
+            f" AND (consolidation_claimed_at IS NULL OR consolidation_claimed_at < ?) AND NOT EXISTS ({_OPEN_JOBS})",
+            (now, batch, now - self.lease_s),
+        )
+        return cur.rowcount == 1
+
+    def release_consolidation(self, batch: str) -> None:
+        self._db.execute("UPDATE batches SET consolidation_claimed_at = NULL WHERE batch = ?", (batch,))
+
+    def mark_consolidated(self, batch: str) -> None:
+        self._db.execute(
+            "UPDATE batches SET consolidated_at = ?, consolidation_claimed_at = NULL WHERE batch = ?", (self.clock(), batch)
+        )
+
+    def unconsolidated(self) -> list[str]:
+        # Finished batches whose consolidated QA has not been written, e.g. because the writer failed or died.
+        query = f"SELECT batch FROM batches WHERE consolidated_at IS NULL AND NOT EXISTS ({_OPEN_JOBS}) ORDER BY created_at, batch"
+        return [row[0] for row in self._db.execute(query)]
+
+    def consolidated_at(self, batch: str) -> float | None:
+        # Set only once the consolidated QA file is in place.
+        row = self._db.execute("SELECT consolidated_at FROM batches WHERE batch = ?", (batch,)).fetchone()
+        return row[0] if row else None
+
+    def consolidate(self, batch: str) -> tuple[str, dict[str, Any]]:
+        manifest, consolidated_qa, skipped = self._db.execute(
+            "SELECT manifest, consolidated_qa, skipped FROM batches WHERE batch = ?", (batch,)
+        ).fetchone()
+        outcomes = []
+        attempts = retried = 0
+        for key, kwargs, job_attempts, result, failure, wall_s in self._db.execute(
+            "SELECT key, kwargs, attempts, result, failure, wall_s FROM jobs WHERE batch = ? AND status IN ('done', 'failed', 'dead') ORDER BY id",
+            (batch,),
+        ):
+            outcomes.append(
+                JobOutcome(
+                    ConversionJob(key, json.loads(kwargs)),
+                    json.loads(result) if result else None,
+                    json.loads(failure) if failure else None,
+                    wall_s or 0.0,
+                )
+            )
+            attempts += job_attempts
+            retried += job_attempts > 1
+        consolidated = consolidate(manifest, outcomes, [ManifestRow(**row) for row in json.loads(skipped)])
+        consolidated["queue"] = {
+            "path": str(self.path),
+            "batch": batch,
+            "attempts": attempts,
+            "jobs_retried": retried,
+            "dead_letter": [{"key": d["key"], "attempts": d["attempts"], "file_name": d["file_name"]} for d in self.dead_letters(batch)],
+        }
+        return consolidated_qa, consolidated
+
+
+def write_consolidated(queue: WorkQueue, batch: str) -> str:
+    # Call after claim_consolidation succeeds. A failed write gives the claim back so it can be retried.
+    path, consolidated = queue.consolidate(batch)
+    output = Path(path)
+    tmp = output.with_name(f".{output.name}.{os.getpid()}.tmp")
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        tmp.write_text(json.dumps(consolidated, indent=2))
+        os.replace(tmp, output)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        queue.release_consolidation(batch)
+        raise
+    queue.mark_consolidated(batch)
+    return path
+
+
+def run_worker(
+    queue_path: str | Path,
+    owner: str | None = None,
+    slots: int = 1,
+    timeout_s: float | None = None,
+    memory_limit_mb: int | None = None,
+    lease_s: float = LEASE_S,
+    retry_delay_s: float = RETRY_DELAY_S,
+    poll_s: float = POLL_S,
+    until_empty: bool = False,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, int]:
+    # Each claimed job runs in its own child process, as in run_batch; this process only heartbeats and records.
+    owner = owner or default_worker_id()
+    queue = WorkQueue(queue_path, lease_s=lease_s, retry_delay_s=retry_delay_s)
+    ctx = multiprocessing.get_context()
+    heartbeat_s = lease_s / HEARTBEATS_PER_LEASE
+    running: dict[int, _Leased] = {}
+    stats = {"claimed": 0, "done": 0, "failed": 0, "pending": 0, "dead": 0, "lost": 0, "consolidated": 0}
+    log = log or (lambda line: None)
+
+    def consolidate(batch: str) -> None:
+        if not queue.claim_consolidation(batch):
+            return
+        try:
+            path = write_consolidated(queue, batch)
+        except OSError as exc:
+            log(f"consolidation_failed batch={batch} error={exc}")
+            return
+        stats["consolidated"] += 1
+        log(f"wrote_consolidated_qa={path} batch={batch}")
+
+    try:
+        while True:
+            while len(running) < max(1, slots) and (claimed := queue.claim(owner)) is not None:
+                process, conn = start_job_process(ctx, claimed.job, memory_limit_mb)
+                now = time.monotonic()
+                running[claimed.id] = _Leased(claimed, process, conn, now, now)
+                stats["claimed"] += 1
+                log(f"claimed={claimed.job.key} batch={claimed.batch} attempt={claimed.attempt}/{claimed.max_attempts}")
+
+            if not running:
+                # Pick up consolidations whose writer failed or whose claim lapsed.
+                for batch in queue.unconsolidated():
+                    consolidate(batch)
+                if until_empty and not any(queue.counts()[s] for s in OPEN_STATUSES):
+                    break
+                time.sleep(poll_s)
+                continue
+
+            wait([r.conn for r in running.values()] + [r.process.sentinel for r in running.values()], timeout=min(poll_s, heartbeat_s))
+
+            for lease in list(running.values()):
+                claimed = lease.claimed
+                done = poll_job_process(lease.process, lease.conn, claimed.job.source, lease.started, timeout_s)
+                if done is None:
+                    if time.monotonic() - lease.last_beat < heartbeat_s:
+                        continue
+                    if queue.heartbeat(claimed.id, owner):
+                        lease.last_beat = time.monotonic()
+                        continue
+                    # Another worker took the job over after our lease lapsed; its attempt is the one that counts.
+                    lease.process.kill()
+                    done = None, failure_record(claimed.job.source, "lease_expired", "lease lost to another worker")
+                lease.conn.close()
+                lease.process.join()
+                del running[claimed.id]
+                status = queue.finish(claimed, owner, *done, round(time.monotonic() - lease.started, 3))
+                stats[status] += 1
+                failure = done[1]
+                detail = f" stage={failure['error_stage']} error={failure['error_message']}" if failure else ""
+                log(f"{status}={claimed.job.key} batch={claimed.batch}{detail}")
+                consolidate(claimed.batch)
+    finally:
+        for lease in running.values():
+            lease.process.kill()
+            lease.process.join()
+        queue.close()
+    return stats
@@ -0,0 +1,38 @@
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor.pipeline import run_conversion
+from pb_ingestor.synthetic import BookSpec, generate_book
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def convert(monkeypatch):
+    # run_conversion from the repo root with the default markup profile, writing book.* outputs into `out`.
+    monkeypatch.chdir(ROOT)
+
+    def run(book: Path, out: Path, template_type: str, **kwargs) -> dict:
+        return run_conversion(
+            source=str(book),
+            template_type=template_type,
+            markup_profile_path="config/markup/default_global_tiered_markup.json",
+            output_csv=str(out / "book.csv"),
+            output_workbook=str(out / "book.xlsx"),
+            qa_json=str(out / "book.json"),
+            manual_review_csv=str(out / "book_manual_review.csv"),
+            **kwargs,
+        )
+
+    return run
+
+
+@pytest.fixture
+def synthetic_book(tmp_path: Path):
+    def build(rows: int, **spec) -> Path:
+        book = tmp_path / "book.xlsx"
+        generate_book(book, BookSpec(rows=rows, **spec))
+        return book
+
+    return build
@@ -0,0 +1,67 @@
+from datetime import datetime
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from pb_ingestor.analyze import analyze_workbook
+from pb_ingestor.ingest import ingest_xlsx
+from pb_ingestor.synthetic import BookSpec, generate_book
+
+
+def test_sample_matches_full_ingest_headers_and_estimates_rows(tmp_path: Path):
+    book = tmp_path / "book.xlsx"
+    generate_book(book, BookSpec(rows=6000, sheets=2))
+    report = analyze_workbook(book, sample_rows=100)
+    full = ingest_xlsx(book)
+
+    assert report["mode"] == "xlsx" and report["errors"] == []
+    assert abs(report["estimated_rows"] - len(full.rows)) / len(full.rows) < 0.05
+    for sheet in report["sheets"]:
+        rows = [r for r in full.rows if r.source_sheet == sheet["sheet"]]
+        assert sheet["sampled_rows"] == 100
+        assert sheet["headers"] == list(rows[0].values)
+        assert sheet["fields"]["part_number"]["header"] == "Part Number"
+        assert sheet["fields"]["cost"]["header"] == "Cost"
+        assert sheet["fields"]["manufacturer"]["header"] == "Manufacturer"
+        cost = next(c for c in sheet["columns"] if c["header"] == "Cost")
+        assert set(cost["types"]) <= {"number", "numeric_text", "text", "blank"}
+
+
+def test_sample_reports_metadata_merges_and_types(tmp_path: Path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Prices"
+    ws.append(["Spring Price Book"])
+    ws.merge_cells("A1:B1")
+    ws.append(["Item", "Item Desc", "Net Cost", "Updated"])
+    ws.append(["Furnaces"])
+    ws.append(["F-100", "Furnace 100", "$1,200.00", datetime(2025, 9, 15)])
+    ws.append(["F-200", None, 950.5, datetime(2025, 9, 16)])
+    hidden = wb.create_sheet("Lookup")
+    hidden.sheet_state = "hidden"
+    hidden.append(["a", "b", "c"])
+    book = tmp_path / "book.xlsx"
+    wb.save(book)
+
+    report = analyze_workbook(book)
+    prices, lookup = report["sheets"]
+    assert lookup["state"] == "hidden" and lookup["sampled_rows"] == 0
+    assert prices["dimension"] == "A1:D5" and prices["merged_ranges"] == 1
+    assert prices["header_row"] == 2
+    assert prices["estimated_rows"] == report["estimated_rows"] == 2
+    assert prices["fields"]["part_number"]["header"] == "Item"
+    assert prices["fields"]["description"] == {"header": "Item Desc", "resolved_rows": 2, "alternates": []}
+    columns = {c["header"]: c for c in prices["columns"]}
+    assert columns["Net Cost"]["types"] == {"numeric_text": 1, "number": 1}
+    assert columns["Updated"]["dominant_type"] == "date"
+    assert columns["Item Desc"]["blank_rate"] == 0.5
+    assert columns["Item"]["unique"]
+
+
+def test_sample_of_non_xlsx_uses_fallback_rows(tmp_path: Path):
+    book = tmp_path / "book.xlsx"
+    book.write_text("part number,description,cost\nA-1,Widget,10\nA-2,Gadget,3\n")
+    report = analyze_workbook(book)
+    assert report["mode"] == "fallback"
+    assert report["estimated_rows"] == 2
+    assert report["sheets"][0]["fields"]["cost"]["header"] == "cost"
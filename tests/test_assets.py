@@ -0,0 +1,78 @@
+import csv
+import hashlib
+import json
+from pathlib import Path
+
+from openpyxl import Workbook
+
+from pb_ingestor import assets
+from pb_ingestor.assets import extract_assets, row_asset_index
+from pb_ingestor.pipeline import run_conversion
+
+ROOT = Path(__file__).resolve().parents[1]
+CARRIER = ROOT / "samples/distributor-books/Carrier R454B_2025_TSM 1 7 2026.xlsx"
+
+
+def test_media_is_streamed_content_addressed_and_linked_to_anchor_rows(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(assets, "CHUNK_BYTES", 4096)
+    first = extract_assets(CARRIER, tmp_path / "assets")
+    assert first.errors == [] and first.files_written > 0
+    stored = sorted((tmp_path / "assets").iterdir())
+    assert len(stored) == first.files_written and not any(p.suffix == ".part" for p in stored)
+    for ref in first.refs:
+        if ref.path is not None:
+            assert hashlib.sha256(Path(ref.path).read_bytes()).hexdigest() == ref.sha256 == Path(ref.path).stem
+
+    # A picture spanning H25:K34 is linked to every row it covers.
+    (anchored,) = [r for r in first.refs if r.sheet == "DUCTLESS Multi-Zone" and r.anchor == "H25:K34"]
+    assert anchored.associated_row == 25 and anchored.source_offset_or_context.startswith("drawing:xl/drawings/")
+    index = row_asset_index(first.refs)
+    assert all(anchored.path in index[("DUCTLESS Multi-Zone", row)] for row in (25, 30, 34))
+    assert anchored.path not in index.get(("DUCTLESS Multi-Zone", 35), [])
+
+    # A second book (here the same one) only adds payloads the directory does not already hold.
+    again = extract_assets(CARRIER, tmp_path / "assets")
+    assert again.files_written == 0 and again.duplicates == first.files_written + first.duplicates
+    assert sorted((tmp_path / "assets").iterdir()) == stored
+
+
+def test_conversion_carries_hyperlinked_spec_sheets_on_rows(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Furnaces"
+    ws.append(["Part Number", "Description", "Cost"])
+    ws.append(["F-100", "Furnace 100", 1200])
+    ws.append(["F-200", "Furnace 200", 950])
+    ws["B3"].hyperlink = "https://example.com/specs/F-200.pdf"
+    ws["A2"].hyperlink = "https://example.com/products/F-100"
+    book = tmp_path / "book.xlsx"
+    wb.save(book)
+
+    out = tmp_path / "out"
+    result = run_conversion(
+        str(book),
+        "single_part",
+        "config/markup/default_global_tiered_markup.json",
+        str(out / "book.csv"),
+        str(out / "book.xlsx"),
+        str(out / "qa.json"),
+        str(out / "review.csv"),
+        validate_qa=True,
+        assets_dir=str(out / "assets"),
+    )
+    by_part = {row["Manufacturer Part Number"]: row for row in csv.DictReader((out / "book.csv").open())}
+    assert by_part["F-200"]["Asset Refs"] == "https://example.com/specs/F-200.pdf"
+    assert by_part["F-100"]["Asset Refs"] == "https://example.com/products/F-100"
+    refs = {r["asset_name_or_ref"]: r for r in json.loads((out / "qa.json").read_text())["asset_refs"]}
+    assert refs["https://example.com/specs/F-200.pdf"]["asset_type"] == "pdf"
+    assert refs["https://example.com/products/F-100"]["asset_type"] == "link"
+    assert refs["https://example.com/specs/F-200.pdf"]["anchor"] == "B3"
+    assert result["performance"]["assets"] == {"refs": 2, "files_written": 0, "bytes_written": 0, "duplicates": 0}
+
+
+def test_non_zip_sources_have_nothing_to_extract(tmp_path: Path):
+    book = tmp_path / "book.xlsx"
+    book.write_text("part number,description,cost\nA-1,Widget,10\n")
+    result = extract_assets(book, tmp_path / "assets")
+    assert result.refs == [] and result.errors == []
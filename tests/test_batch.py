@@ -0,0 +1,49 @@
+import time
+from pathlib import Path
+
+from pb_ingestor import pipeline
+from pb_ingestor.batch import consolidate, jobs_from_manifest, run_batch
+from pb_ingestor.crosswalk import ManifestRow
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _manifest(tmp_path: Path) -> list[ManifestRow]:
+    good = tmp_path / "good.xlsx"
+    good.write_text("part number,description,cost\nABC-1,Widget,10\nABC-2,Gadget,2\n")
+    slow = tmp_path / "slow.xlsx"
+    slow.write_text("part number,cost\nSLOW-1,10\n")
+    template = str(ROOT / "samples/base-templates/Single part template.xlsx")
+    return [
+        ManifestRow("Good Co", str(good), "", template, "single_part", ""),
+        ManifestRow("Missing Co", str(tmp_path / "missing.xlsx"), "", template, "single_part", ""),
+        ManifestRow("Slow Co", str(slow), "", template, "single_part", ""),
+        ManifestRow("Unset Co", str(good), "", "", "user_selected", ""),
+    ]
+
+
+def test_run_batch_isolates_failures_and_timeouts(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    real_ingest = pipeline.ingest_xlsx
+
+    def maybe_slow(path):
+        if "slow" in str(path):
+            time.sleep(30)
+        return real_ingest(path)
+
+    monkeypatch.setattr(pipeline, "ingest_xlsx", maybe_slow)
+
+    manifest = _manifest(tmp_path)
+    jobs, skipped = jobs_from_manifest(manifest, str(tmp_path / "out"), "config/markup/default_global_tiered_markup.json")
+    outcomes = run_batch(jobs, workers=3, timeout_s=2)
+    consolidated = consolidate("manifest.csv", outcomes, skipped)
+
+    assert [o.job.key for o in outcomes] == ["good_co", "missing_co", "slow_co"]
+    assert consolidated["aggregate"]["rows_processed"] == 2
+    assert consolidated["aggregate"]["files_failed"] == 2
+    failures = {f["file_name"]: f for f in consolidated["failures"]}
+    assert failures["missing.xlsx"]["error_stage"] == "ingest"
+    assert failures["slow.xlsx"]["error_stage"] == "timeout"
+    assert set(failures["slow.xlsx"]) == {"file_name", "error_stage", "error_message", "rows_recovered"}
+    assert consolidated["skipped"] == [{"customer_name": "Unset Co", "reason": "output_type_not_set"}]
+    assert (tmp_path / "out/converted/good_co.xlsx").exists()
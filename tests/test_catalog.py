@@ -0,0 +1,83 @@
+import json
+from pathlib import Path
+
+from pb_ingestor import enrichment
+from pb_ingestor.catalog import CatalogIndex, CatalogRecord, build_catalog, iter_catalog_file
+from pb_ingestor.enrichment import enrich_csv, enrich_part
+
+
+def test_catalog_ingests_csv_json_xml_and_looks_up(tmp_path: Path):
+    (tmp_path / "carrier.csv").write_text(
+        "Model Number,Product Name,Description,Warranty\n"
+        "24ACC636A003,Comfort AC 3 Ton,Air conditioner 3 ton,10-year parts warranty.\n"
+    )
+    (tmp_path / "bryant.json").write_text(
+        json.dumps({"products": [{"sku": "FE4ANF002", "name": "Fan coil", "brand": "Bryant"}]})
+    )
+    (tmp_path / "trane.xml").write_text(
+        "<catalog><product><mpn>4TTR3024</mpn><title>XR13</title><description>Heat pump</description></product></catalog>"
+    )
+    index_path = tmp_path / "index.json"
+    counts = build_catalog(
+        [tmp_path / "carrier.csv", tmp_path / "bryant.json", tmp_path / "trane.xml"], index_path, manufacturer="Carrier"
+    )
+    assert counts == {"carrier.csv": 1, "bryant.json": 1, "trane.xml": 1}
+
+    assert set(json.loads(index_path.read_text())) == {"format", "records", "by_exact", "by_normalized", "tokens"}
+    index = CatalogIndex.load(index_path)
+    assert index.lookup("24acc636a003", "Carrier").confidence == "high"
+    assert index.lookup("24-ACC636-A003", "carrier").confidence == "high"
+    assert index.lookup("FE4ANF002", "Carrier") is None
+    assert index.lookup("FE4ANF002", "Bryant").record.name == "Fan coil"
+    family = index.lookup("24ACC636", "Carrier")
+    assert family.confidence == "medium" and not family.ambiguous
+    assert index.search("heat pump")[0][1] == 1.0
+
+
+def test_catalog_family_disambiguated_by_description():
+    index = CatalogIndex()
+    index.add(CatalogRecord("ABCD-100", "Acme", description="small blower motor"))
+    index.add(CatalogRecord("ABCD-200", "Acme", description="large condenser fan"))
+    assert index.lookup("ABCD", "Acme").ambiguous
+    hit = index.lookup("ABCD", "Acme", description="condenser fan large")
+    assert hit.record.part_number == "ABCD-200" and not hit.ambiguous
+
+
+    # Unrelated records that share more of the description's words do not push the family out.
+    index = CatalogIndex()
+    index.add(CatalogRecord("ABCD-100", "Acme", description="small blower motor"))
+    index.add(CatalogRecord("ABCD-200", "Acme", description="large condenser fan with motor"))
+    for n in range(10):
+        index.add(CatalogRecord(f"ZZ-{n}", "Acme", description="large condenser fan motor unit"))
+    hit = index.lookup("ABCD", "Acme", description="large condenser fan motor unit")
+    assert hit.record.part_number == "ABCD-200" and not hit.ambiguous
+
+
+def test_enrich_part_offline_uses_catalog_only():
+    index = CatalogIndex([CatalogRecord("X-1", "Acme", name="Widget", url=None, source="acme.csv")])
+    hit = enrich_part("X-1", "Acme", {}, catalog=index, offline=True)
+    assert (hit.status, hit.confidence, hit.source_url) == ("enriched", "high", "catalog:acme.csv")
+    miss = enrich_part("Y-2", "Acme", {}, catalog=index, offline=True)
+    assert miss.status == "not_found"
+
+
+def test_xml_records_read_only_their_direct_children(tmp_path: Path):
+    (tmp_path / "nested.xml").write_text(
+        "<catalog><products>"
+        "<product><specs><description>5 ton coil</description></specs><mpn>C-5</mpn><description>Coil</description></product>"
+        "<product><mpn>C-6</mpn><accessory><mpn>ACC-1</mpn><name>Bracket</name></accessory><name>Coil 6</name></product>"
+        "</products></catalog>"
+    )
+    records = list(iter_catalog_file(tmp_path / "nested.xml", manufacturer="Acme"))
+    assert [(r.part_number, r.name, r.description) for r in records] == [("C-5", None, "Coil"), ("C-6", "Coil 6", None)]
+
+
+def test_catalog_hits_with_urls_are_not_throttled(tmp_path: Path, monkeypatch):
+    index_path = tmp_path / "index.json"
+    (tmp_path / "acme.csv").write_text("Model Number,Product Name,URL\nX-1,Widget,https://acme.example/x-1\n")
+    build_catalog([tmp_path / "acme.csv"], index_path, manufacturer="Acme")
+    (tmp_path / "in.csv").write_text("Manufacturer Part Number,Manufacturer\nX-1,Acme\nX-1,Acme\n")
+    sleeps = []
+    monkeypatch.setattr(enrichment.time, "sleep", sleeps.append)
+    qa = enrich_csv(tmp_path / "in.csv", tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=500, catalog_path=index_path)
+    assert qa["summary"]["enriched"] == 2 and sleeps == []
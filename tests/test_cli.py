@@ -0,0 +1,39 @@
+from __future__ import annotations
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+HEAVY = ["openpyxl", "requests", "bs4", "jsonschema", "pb_ingestor.pipeline", "pb_ingestor.enrichment"]
+
+
+def test_cli_import_does_not_load_subcommand_dependencies() -> None:
+    code = "import sys, json, pb_ingestor.cli; print(json.dumps([m for m in %r if m in sys.modules]))" % HEAVY
+    out = subprocess.run([sys.executable, "-c", code], check=True, capture_output=True, text=True, cwd=ROOT)
+    assert json.loads(out.stdout) == []
+
+
+def test_validate_command(tmp_path: Path) -> None:
+    schema = tmp_path / "schema.json"
+    schema.write_text(json.dumps({"type": "object", "required": ["run_id"]}))
+    good = tmp_path / "good.json"
+    good.write_text(json.dumps({"run_id": "r1"}))
+    bad = tmp_path / "bad.json"
+    bad.write_text(json.dumps({}))
+
+    cmd = [sys.executable, "-m", "pb_ingestor.cli", "validate"]
+    ok = subprocess.run([*cmd, str(good), "--schema", str(schema)], capture_output=True, text=True, cwd=ROOT)
+    assert ok.returncode == 0 and "validation=ok" in ok.stdout
+    failed = subprocess.run([*cmd, str(bad), "--schema", str(schema)], capture_output=True, text=True, cwd=ROOT)
+    assert failed.returncode != 0 and "run_id" in failed.stderr
+
+
+def test_analyze_sample_flag_does_not_swallow_the_source() -> None:
+    from pb_ingestor.cli import build_parser
+
+    args = build_parser().parse_args(["analyze", "--sample", "book.xlsx"])
+    assert (args.source, args.sample, args.sample_rows) == ("book.xlsx", True, 200)
+    args = build_parser().parse_args(["analyze", "book.xlsx", "--sample", "--sample-rows", "50"])
+    assert (args.source, args.sample, args.sample_rows) == ("book.xlsx", True, 50)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor.configs import ConfigRegistry
+from pb_ingestor.crosswalk import CROSSWALK_PATHS, load_crosswalk
+
+ROOT = Path(__file__).resolve().parents[1]
+PROFILE = '{"profile_name": "t", "currency": "USD", "rounding": "nearest_cent", "tiers": [{"min_cost": 0, "max_cost": null, "markup_percent": %s}]}'
+
+
+def test_registry_reuses_parsed_configs_until_content_changes(tmp_path: Path):
+    registry = ConfigRegistry()
+    profile = tmp_path / "markup.json"
+    profile.write_text(PROFILE % 50)
+
+    first = registry.markup(profile)
+    assert registry.markup(profile) is first
+    assert registry.stats == {"hits": 1, "loads": 1, "unchanged_touches": 0}
+
+    os.utime(profile, ns=(profile.stat().st_atime_ns, profile.stat().st_mtime_ns + 10**9))
+    assert registry.markup(profile) is first
+    assert registry.stats["unchanged_touches"] == 1
+
+    profile.write_text(PROFILE % 75)
+    os.utime(profile, ns=(profile.stat().st_atime_ns, profile.stat().st_mtime_ns + 2 * 10**9))
+    reloaded = registry.markup(profile)
+    assert reloaded is not first
+    assert reloaded.tiers[0].markup_percent == 75
+    assert registry.stats["loads"] == 2
+
+
+def test_registry_parses_crosswalks_like_load_crosswalk(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    registry = ConfigRegistry()
+    for path in CROSSWALK_PATHS.values():
+        assert registry.crosswalk(path) == load_crosswalk(path)
+
+
+def test_registry_rejects_invalid_configs(tmp_path: Path):
+    registry = ConfigRegistry()
+    crosswalk = tmp_path / "crosswalk.csv"
+    crosswalk.write_text("output_template,output_column\nbundle,Part Number\n")
+    with pytest.raises(ValueError, match="missing columns"):
+        registry.crosswalk(crosswalk)
+    allowlist = tmp_path / "domains.json"
+    allowlist.write_text('{"Carrier": "carrier.com"}')
+    with pytest.raises(ValueError, match="lists of domains"):
+        registry.domain_allowlist(allowlist)
+    assert registry.domain_allowlist(tmp_path / "missing.json") == {}
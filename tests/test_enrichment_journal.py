@@ -0,0 +1,87 @@
+import csv
+import json
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor import enrichment
+from pb_ingestor.enrichment import EnrichmentResult, enrich_csv
+
+
+def _write_input(path: Path, parts: list[str]) -> None:
+    with path.open("w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["Manufacturer Part Number", "Manufacturer"])
+        writer.writeheader()
+        for part in parts:
+            writer.writerow({"Manufacturer Part Number": part, "Manufacturer": "Carrier"})
+
+
+def test_journal_resume_skips_completed_rows(tmp_path: Path, monkeypatch):
+    source = tmp_path / "in.csv"
+    _write_input(source, ["A-1", "A-2", "A-3", "A-4"])
+    journal = tmp_path / "enrich.journal.jsonl"
+    calls: list[str] = []
+
+    def crashing(part_number, manufacturer, allowlist, **kwargs):
+        if len(calls) == 2:
+            raise KeyboardInterrupt
+        calls.append(part_number)
+        return EnrichmentResult(f"name {part_number}", None, None, "https://x", "high", "enriched")
+
+    monkeypatch.setattr(enrichment, "enrich_part", crashing)
+    with pytest.raises(KeyboardInterrupt):
+        enrich_csv(source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal)
+
+    # Simulate a crash halfway through writing the next record.
+    with journal.open("a") as f:
+        f.write('{"row": 2, "part_na')
+
+    def resumed(part_number, manufacturer, allowlist, **kwargs):
+        calls.append(part_number)
+        return EnrichmentResult(None, None, None, None, "low", "not_found")
+
+    monkeypatch.setattr(enrichment, "enrich_part", resumed)
+    qa = enrich_csv(
+        source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal, resume=True
+    )
+
+    assert calls == ["A-1", "A-2", "A-3", "A-4"]
+    assert qa["rows_resumed"] == 2
+    assert qa["summary"]["rows_total"] == 4
+    assert qa["summary"]["enriched"] == 2
+    assert qa["summary"]["not_found"] == 2
+    rows = list(csv.DictReader((tmp_path / "out.csv").open(newline="")))
+    assert [r["Enrichment Status"] for r in rows] == ["enriched", "enriched", "not_found", "not_found"]
+    assert json.loads((tmp_path / "qa.json").read_text())["journal"] == str(journal)
+
+
+def test_journal_rejects_different_input(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        enrichment, "enrich_part", lambda *a, **k: EnrichmentResult(None, None, None, None, "low", "not_found")
+    )
+    source = tmp_path / "in.csv"
+    journal = tmp_path / "j.jsonl"
+    _write_input(source, ["A-1"])
+    enrich_csv(source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal)
+    _write_input(source, ["A-1", "B-2"])
+    with pytest.raises(ValueError):
+        enrich_csv(
+            source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal, resume=True
+        )
+
+
+def test_journal_rejects_an_edited_input_of_the_same_size(tmp_path: Path, monkeypatch):
+    monkeypatch.setattr(
+        enrichment, "enrich_part", lambda *a, **k: EnrichmentResult(None, None, None, None, "low", "not_found")
+    )
+    source = tmp_path / "in.csv"
+    journal = tmp_path / "j.jsonl"
+    _write_input(source, ["A-1", "B-2"])
+    enrich_csv(source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal)
+    size = source.stat().st_size
+    _write_input(source, ["A-1", "C-3"])
+    assert source.stat().st_size == size
+    with pytest.raises(ValueError, match="different input"):
+        enrich_csv(
+            source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0, journal_path=journal, resume=True
+        )
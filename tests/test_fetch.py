@@ -0,0 +1,106 @@
+import requests
+
+from pb_ingestor.enrichment import enrich_part
+from pb_ingestor.fetch import DomainCircuitBreaker, Fetcher, RetryPolicy, parse_retry_after
+
+
+class _Resp:
+    def __init__(self, status_code: int, text: str = "", headers: dict | None = None):
+        self.status_code = status_code
+        self.text = text
+        self.headers = headers or {}
+
+
+class _Session:
+    def __init__(self, handler):
+        self.handler = handler
+        self.calls: list[str] = []
+
+    def get(self, url, timeout=None):
+        self.calls.append(url)
+        return self.handler(url)
+
+
+def _fetcher(handler, threshold=3, max_retries=1):
+    now = [0.0]
+    sleeps: list[float] = []
+    fetcher = Fetcher(
+        retry=RetryPolicy(max_retries=max_retries, backoff_base_s=0.1),
+        breaker=DomainCircuitBreaker(failure_threshold=threshold, cooldown_s=60.0, clock=lambda: now[0]),
+        session=_Session(handler),
+        sleep=sleeps.append,
+    )
+    return fetcher, now, sleeps
+
+
+def test_dead_domain_trips_breaker_and_is_skipped():
+    def down(url):
+        raise requests.ConnectionError("refused")
+
+    fetcher, now, sleeps = _fetcher(down, threshold=2)
+    result = enrich_part("AB-1", "Acme", {"acme": ["acme.com"]}, fetcher=fetcher)
+    assert result.status == "blocked"
+    assert len(fetcher.session.calls) == 2
+    assert len(sleeps) == 1
+    report = fetcher.breaker.report()["acme.com"]
+    assert report["state"] == "open" and report["trips"] == 1 and report["skipped"] == 2
+
+    now[0] = 61.0
+    assert fetcher.breaker.allow("acme.com")
+
+
+def test_retry_after_beyond_backoff_trips_for_that_long():
+    fetcher, now, sleeps = _fetcher(lambda url: _Resp(429, headers={"Retry-After": "600"}))
+    outcome = fetcher.get("https://acme.com/x")
+    assert outcome.status == "blocked" and sleeps == []
+    now[0] = 300.0
+    assert fetcher.get("https://acme.com/y").status == "skipped"
+
+
+def test_short_retry_after_is_honored_then_succeeds():
+    responses = [_Resp(503, headers={"Retry-After": "2"}), _Resp(200, "ok")]
+    fetcher, _, sleeps = _fetcher(lambda url: responses.pop(0))
+    outcome = fetcher.get("https://acme.com/x")
+    assert outcome.status == "ok" and outcome.attempts == 2
+    assert sleeps == [2.0]
+
+
+def test_not_found_does_not_count_against_domain():
+    fetcher, _, _ = _fetcher(lambda url: _Resp(404), threshold=1)
+    assert fetcher.get("https://acme.com/a").status == "http_error"
+    assert fetcher.get("https://acme.com/b").status == "http_error"
+    assert fetcher.breaker.report()["acme.com"]["trips"] == 0
+
+
+def test_retry_exhausted_server_errors_are_unavailable_not_missing():
+    fetcher, _, sleeps = _fetcher(lambda url: _Resp(503), threshold=100)
+    assert fetcher.get("https://acme.com/x").status == "unavailable" and len(sleeps) == 1
+    # The breaker is still closed, yet every candidate URL failed on the server side.
+    result = enrich_part("AB-1", "Acme", {"acme": ["acme.com"]}, fetcher=fetcher)
+    assert result.status == "blocked"
+    assert fetcher.breaker.report()["acme.com"]["state"] == "closed"
+
+def test_parse_retry_after_formats():
+    assert parse_retry_after("120") == 120.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_enrich_part_without_a_fetcher_reuses_one_session(monkeypatch):
+    from pb_ingestor import enrichment, fetch
+
+    sessions: list[_Session] = []
+
+    def session():
+        sessions.append(_Session(lambda url: _Resp(404)))
+        sessions[-1].headers = {}
+        return sessions[-1]
+
+    monkeypatch.setattr(fetch.requests, "Session", session)
+    enrichment._default_fetcher.cache_clear()
+    try:
+        for part in ("AB-1", "AB-2", "AB-3"):
+            assert enrich_part(part, "Acme", {"acme": ["acme.com"]}, timeout_s=2.0).status == "not_found"
+    finally:
+        enrichment._default_fetcher.cache_clear()
+    assert len(sessions) == 1 and len(sessions[0].calls) == 9
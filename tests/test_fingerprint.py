@@ -0,0 +1,47 @@
+import shutil
+from pathlib import Path
+
+from pb_ingestor.pipeline import run_conversion
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _convert(tmp_path: Path, markup: Path, skip_unchanged: bool = True) -> dict:
+    out = tmp_path / "out"
+    return run_conversion(
+        source=str(tmp_path / "book.xlsx"),
+        template_type="single_part",
+        markup_profile_path=str(markup),
+        output_csv=str(out / "book.csv"),
+        output_workbook=str(out / "book.xlsx"),
+        qa_json=str(out / "book.json"),
+        manual_review_csv=str(out / "book_manual_review.csv"),
+        crosswalk_path=str(ROOT / "config/mappings/crosswalk_single_part.csv"),
+        template_path=str(ROOT / "samples/base-templates/Single part template.xlsx"),
+        skip_unchanged=skip_unchanged,
+    )
+
+
+def test_unchanged_inputs_reuse_prior_outputs(tmp_path: Path):
+    (tmp_path / "book.xlsx").write_text("part number,cost\nABC-1,10\nABC-2,20\n")
+    markup = tmp_path / "markup.json"
+    shutil.copy(ROOT / "config/markup/default_global_tiered_markup.json", markup)
+
+    first = _convert(tmp_path, markup)
+    assert first["skipped_unchanged"] is False
+    assert (tmp_path / "out/book.fingerprint.json").exists()
+
+    second = _convert(tmp_path, markup)
+    assert second["skipped_unchanged"] is True
+    assert second["summary"] == first["summary"]
+    assert second["fingerprint"] == first["fingerprint"]
+
+    assert _convert(tmp_path, markup, skip_unchanged=False)["skipped_unchanged"] is False
+
+    markup.write_text(markup.read_text().replace('"markup_percent": 250', '"markup_percent": 300'))
+    changed = _convert(tmp_path, markup)
+    assert changed["skipped_unchanged"] is False
+    assert changed["fingerprint"] != first["fingerprint"]
+
+    (tmp_path / "out/book.csv").unlink()
+    assert _convert(tmp_path, markup)["skipped_unchanged"] is False
@@ -0,0 +1,44 @@
+from pathlib import Path
+
+from pb_ingestor.metrics import MetricsRegistry, record_conversion, record_enrichment, record_failure
+
+
+def test_registry_renders_prometheus_text(tmp_path: Path):
+    registry = MetricsRegistry()
+    record_conversion(
+        registry,
+        {
+            "ingest_mode": "fallback",
+            "summary": {"rows_processed": 8, "rows_incomplete": 2, "rows_manual_review": 2, "rows_duplicates_ignored": 1},
+            "performance": {"stages": [{"stage": "map", "wall_s": 0.3}, {"stage": "ingest", "wall_s": 12.0}]},
+            "skipped_unchanged": False,
+        },
+    )
+    record_conversion(registry, {"skipped_unchanged": True})
+    record_failure(registry, {"file_name": "bad.xlsx", "error_stage": "timeout"})
+    record_enrichment(
+        registry,
+        {
+            "summary": {"enriched": 3, "not_found": 1, "ambiguous": 0, "blocked": 2},
+            "http_latency": {
+                "buckets": [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.0],
+                "counts": [0, 0, 1, 0, 0, 0, 0, 0, 0, 0, 0, 0],
+                "sum": 40.02,
+                "count": 2,
+            },
+        },
+    )
+
+    path = tmp_path / "pb_ingestor.prom"
+    registry.write_textfile(path)
+    lines = path.read_text().splitlines()
+    assert 'pb_ingestor_files_total{ingest_mode="fallback"} 1' in lines
+    assert 'pb_ingestor_rows_total{status="processed"} 8' in lines
+    assert "pb_ingestor_files_skipped_unchanged_total 1" in lines
+    assert 'pb_ingestor_file_failures_total{stage="timeout"} 1' in lines
+    assert 'pb_ingestor_enrichment_parts_total{outcome="blocked"} 2' in lines
+    assert 'pb_ingestor_stage_duration_seconds_bucket{pipeline="convert",stage="map",le="0.5"} 1' in lines
+    assert 'pb_ingestor_stage_duration_seconds_bucket{pipeline="convert",stage="ingest",le="10"} 0' in lines
+    assert 'pb_ingestor_stage_duration_seconds_bucket{pipeline="convert",stage="ingest",le="+Inf"} 1' in lines
+    assert 'pb_ingestor_enrichment_http_request_duration_seconds_bucket{le="+Inf"} 2' in lines
+    assert "# TYPE pb_ingestor_stage_duration_seconds histogram" in lines
@@ -0,0 +1,56 @@
+import csv
+from pathlib import Path
+
+import requests
+
+from pb_ingestor.enrichment import enrich_csv
+from pb_ingestor.pagematch import AhoCorasick, PageMatcher
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick(["he", "she", "his", "hers"])
+    found = sorted(automaton.finditer("ushers"))
+    assert found == [(1, "she"), (2, "he"), (2, "hers")]
+
+
+def test_page_matcher_respects_boundaries_and_done_parts():
+    matcher = PageMatcher()
+    for part in ["AB-1", "AB-10", "CD-2"]:
+        matcher.register(part, "Acme")
+    matcher.take("CD-2", "Acme")
+    assert matcher.scan("acme", "https://acme.com/list", "Models: AB-10, CD-2 and AB-100", "AB-10 family") == 1
+    assert matcher.take("AB-10", "Acme")["confidence"] == "high"
+    assert matcher.take("AB-1", "Acme") is None
+
+
+class _Resp:
+    status_code = 200
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+def test_enrich_csv_reuses_listing_page_for_other_rows(tmp_path: Path, monkeypatch):
+    source = tmp_path / "in.csv"
+    with source.open("w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Manufacturer Part Number", "Manufacturer"])
+        for part in ["AB-100", "AB-200", "AB-300", "ZZ-9"]:
+            writer.writerow([part, "Acme"])
+
+    page = "<html><title>Acme listing</title><body>AB-100 blower. AB-200 coil with 5 year warranty. AB-300 pump.</body></html>"
+    fetched: list[str] = []
+
+    def fake_get(session, url, **kwargs):
+        fetched.append(url)
+        return _Resp(page if "AB-100" in url else "")
+
+    monkeypatch.setattr(requests.Session, "get", fake_get)
+    qa = enrich_csv(source, tmp_path / "out.csv", tmp_path / "qa.json", tmp_path / "none.json", sleep_ms=0)
+
+    rows = list(csv.DictReader((tmp_path / "out.csv").open(newline="")))
+    assert [r["Enrichment Status"] for r in rows] == ["enriched", "enriched", "enriched", "not_found"]
+    assert rows[1]["Enrichment Confidence"] == "medium"
+    assert "warranty" in rows[1]["Enriched Warranty"]
+    assert not any("AB-200" in url or "AB-300" in url for url in fetched)
+    assert qa["page_matching"]["rows_resolved_from_shared_pages"] == 2
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from jsonschema import Draft202012Validator
+from openpyxl import Workbook
+
+from pb_ingestor.perf import aggregate_performance
+from pb_ingestor.pipeline import run_conversion
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_qa_report_includes_stage_and_sheet_performance(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Fittings"
+    ws.append(["Part Number", "Description", "Cost"])
+    ws.append(["F-1", "Elbow", 3.5])
+    ws.append(["F-2", "Tee", 4.25])
+    wb.create_sheet("Notes").append(["nothing here"])
+    wb.save(tmp_path / "book.xlsx")
+
+    out = tmp_path / "out"
+    result = run_conversion(
+        source=str(tmp_path / "book.xlsx"),
+        template_type="single_part",
+        markup_profile_path="config/markup/default_global_tiered_markup.json",
+        output_csv=str(out / "book.csv"),
+        output_workbook=str(out / "book.xlsx"),
+        qa_json=str(out / "book.json"),
+        manual_review_csv=str(out / "book_manual_review.csv"),
+        trace_memory=True,
+    )
+
+    qa = json.loads((out / "book.json").read_text())
+    schema = json.loads((ROOT / "schemas/qa_run_report.schema.json").read_text())
+    assert list(Draft202012Validator(schema).iter_errors(qa)) == []
+
+    performance = qa["performance"]
+    stages = {s["stage"]: s for s in performance["stages"]}
+    assert list(stages) == ["config", "ingest", "map", "write_csv", "write_workbook", "write_manual_review"]
+    assert stages["ingest"]["rows"] == 2 and stages["map"]["rows_per_s"] > 0
+    assert "tracemalloc_peak_mb" in stages["write_workbook"]
+    assert performance["sheets"][0]["sheet"] == "Fittings" and performance["sheets"][0]["rows"] == 2
+    assert result["performance"] == performance
+
+    totals = aggregate_performance([performance, performance])
+    map_total = next(s for s in totals["stages"] if s["stage"] == "map")
+    assert totals["files"] == 2 and map_total["runs"] == 2 and map_total["rows"] == 4
@@ -0,0 +1,48 @@
+import json
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from pb_ingestor import pipelined
+from pb_ingestor.pipeline import ConversionError
+from pb_ingestor.validation import validate_qa_report
+
+
+def test_pipelined_conversion_matches_sequential_outputs(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(3000, duplicate_rate=0.05)
+
+    for template_type in ("single_part", "supplier_loader"):
+        plain = convert(book, tmp_path / template_type / "plain", template_type)
+        piped = convert(book, tmp_path / template_type / "piped", template_type, pipelined=True)
+
+        assert piped["summary"] == plain["summary"]
+        for name in ("book.csv", "book_manual_review.csv"):
+            assert (tmp_path / template_type / "piped" / name).read_bytes() == (tmp_path / template_type / "plain" / name).read_bytes()
+        expected = load_workbook(tmp_path / template_type / "plain" / "book.xlsx")
+        actual = load_workbook(tmp_path / template_type / "piped" / "book.xlsx")
+        assert actual.sheetnames == expected.sheetnames
+        for ws in expected.worksheets:
+            assert list(actual[ws.title].values) == list(ws.values)
+
+        qa = json.loads((tmp_path / template_type / "piped" / "book.json").read_text())
+        validate_qa_report(qa)
+        assert [q["queue"] for q in qa["performance"]["pipeline"]["queues"]] == ["ingest->map", "map->write"]
+        assert qa["performance"]["pipeline"]["queues"][0]["batches"] == 3000 // pipelined.BATCH_ROWS
+        assert {s["stage"] for s in qa["performance"]["stages"]} == {"config", "ingest", "map", "write"}
+
+
+def test_pipelined_stage_failure_cancels_the_other_stages(tmp_path: Path, monkeypatch, convert, synthetic_book):
+    book = synthetic_book(3000)
+
+    def failing_writer(mapped, template, out, crosswalk):
+        for i, _ in enumerate(mapped):
+            if i == 1200:
+                raise OSError("disk full")
+
+    monkeypatch.setattr(pipelined, "write_template_workbook_streaming", failing_writer)
+    with pytest.raises(ConversionError) as excinfo:
+        convert(book, tmp_path / "out", "single_part", pipelined=True)
+    assert excinfo.value.stage == "write"
+    assert "disk full" in excinfo.value.message
+    assert not (tmp_path / "out" / "book.json").exists()
@@ -0,0 +1,30 @@
+from pathlib import Path
+
+from pb_ingestor.preview import CsvPreview, PreviewFilter
+
+
+def test_preview_filters_and_pages_by_offset(tmp_path: Path):
+    path = tmp_path / "converted.csv"
+    lines = ["Part Number,Manufacturer,Category,Part Price,Status,Status Reason"]
+    for i in range(25):
+        status = "manual_review" if i % 5 == 0 else "processed"
+        manufacturer = "Acme" if i % 2 else "Zenith"
+        lines.append(f'P-{i},{manufacturer},Sheet1,{i * 10},{status},')
+    lines.append('P-Q,Acme,"Multi\nLine, Sheet",,manual_review,"missing_cost"')
+    path.write_text("\n".join(lines) + "\n")
+
+    preview = CsvPreview(path)
+    assert preview.total == 26
+    assert preview.facet_values("Status") == ["manual_review", "processed"]
+    assert preview.price_range() == (0.0, 240.0)
+
+    review = preview.select(PreviewFilter(statuses={"manual_review"}))
+    assert [r["Part Number"] for r in preview.page(review, 0, page_size=10)] == ["P-0", "P-5", "P-10", "P-15", "P-20", "P-Q"]
+    assert preview.read_rows([25])[0]["Category"] == "Multi\nLine, Sheet"
+
+    priced = preview.select(PreviewFilter(manufacturers={"Acme"}, min_price=50, max_price=100))
+    assert [r["Part Number"] for r in preview.read_rows(priced)] == ["P-5", "P-7", "P-9"]
+
+    everything = preview.select(PreviewFilter())
+    assert len(everything) == 26
+    assert [r["Part Number"] for r in preview.page(everything, 2, page_size=10)] == ["P-20", "P-21", "P-22", "P-23", "P-24", "P-Q"]
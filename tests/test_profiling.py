@@ -0,0 +1,54 @@
+import pstats
+import time
+from collections import Counter
+from pathlib import Path
+
+from pb_ingestor.perf import PerfRecorder
+from pb_ingestor.pipeline import run_conversion
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _busy_loop(seconds: float) -> int:
+    total = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        total += sum(range(200))
+    return total
+
+
+def test_stage_profiles_are_viewer_readable(tmp_path: Path):
+    perf = PerfRecorder(trace_memory=True, profile_dir=tmp_path / "run.profile")
+    with perf.stage("hot", rows=1):
+        _busy_loop(0.2)
+    report = perf.report()
+
+    base = tmp_path / "run.profile" / "hot"
+    assert report["profile_files"] == [f"{base}.pstats", f"{base}.collapsed", f"{base}.allocations.txt"]
+    stats = pstats.Stats(f"{base}.pstats")
+    assert any(func[2] == "_busy_loop" for func in stats.stats)
+
+    stacks = Counter()
+    for line in Path(f"{base}.collapsed").read_text().splitlines():
+        stack, count = line.rsplit(" ", 1)
+        stacks[stack] += int(count)
+    assert sum(count for stack, count in stacks.items() if "_busy_loop (test_profiling.py" in stack) > 5
+
+
+def test_profile_conversion_bypasses_fingerprint_skip(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    (tmp_path / "book.csv").write_text("part number,cost\nA-1,10\n")
+    kwargs = dict(
+        source=str(tmp_path / "book.csv"),
+        template_type="single_part",
+        markup_profile_path="config/markup/default_global_tiered_markup.json",
+        output_csv=str(tmp_path / "out.csv"),
+        output_workbook=str(tmp_path / "out.xlsx"),
+        qa_json=str(tmp_path / "qa.json"),
+        manual_review_csv=str(tmp_path / "review.csv"),
+        skip_unchanged=True,
+    )
+    run_conversion(**kwargs)
+    result = run_conversion(**kwargs, profile=True)
+    assert result["skipped_unchanged"] is False
+    assert (tmp_path / "qa.profile" / "write_workbook.pstats").exists()
@@ -0,0 +1,87 @@
+import json
+from pathlib import Path
+
+from pb_ingestor.batch import ConversionJob, jobs_from_manifest, run_batch
+from pb_ingestor.crosswalk import ManifestRow
+from pb_ingestor.peek import peek_workbook
+from pb_ingestor.scheduler import estimate_costs, largest_first, schedule_report
+from pb_ingestor.synthetic import BookSpec, generate_book
+
+ROOT = Path(__file__).resolve().parents[1]
+BOOKS = ROOT / "samples/distributor-books"
+
+
+def test_peek_estimates_rows_without_parsing(tmp_path: Path):
+    book = tmp_path / "book.xlsx"
+    generate_book(book, BookSpec(rows=2000, sheets=2))
+    size, sheets, rows = peek_workbook(book)
+    assert size == book.stat().st_size and sheets == 2
+    assert 1000 < rows < 4000
+
+    # Declared <dimension> ranges are used when present.
+    assert peek_workbook(BOOKS / "Carrier R454B_2025_TSM 1 7 2026.xlsx")[1:] == (11, 1059)
+    assert peek_workbook(BOOKS / "Kinzer Air Glacier Supply Price Book 6-19-2025.xlsx") == (2, 0, 0)
+    assert peek_workbook(tmp_path / "missing.xlsx") == (0, 0, 0)
+
+
+def test_history_calibrates_books_without_history(tmp_path: Path):
+    jobs = []
+    for name, rows in (("small", 200), ("big", 2000), ("seen", 1000)):
+        generate_book(tmp_path / f"{name}.xlsx", BookSpec(rows=rows, sheets=1))
+        jobs.append(ConversionJob(name, {"source": str(tmp_path / f"{name}.xlsx"), "qa_json": str(tmp_path / f"{name}.json")}))
+    baseline = estimate_costs(jobs)
+    seen = baseline[2]
+    # The seen book took 10x the default model last time: the others are scaled up with it.
+    performance = {
+        "total_wall_s": seen.predicted_wall_s * 10,
+        "peak_rss_mb": 300.0,
+        "source": {"bytes": seen.source_bytes, "estimated_rows": seen.estimated_rows},
+    }
+    (tmp_path / "seen.json").write_text(json.dumps({"rows_total": 1, "performance": performance}))
+    costs = estimate_costs(jobs)
+    assert [c.basis for c in costs] == ["peek", "peek", "history"]
+    assert costs[2].predicted_peak_mb == 300.0
+    for before, after in zip(baseline[:2], costs[:2]):
+        assert abs(after.predicted_wall_s - before.predicted_wall_s * 10) < 0.01
+    assert largest_first(costs) == [1, 2, 0]
+
+
+def test_history_from_a_real_conversion_is_scaled_by_the_peek(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(1000, sheets=1)
+    out = tmp_path / "out"
+    result = convert(book, out, "supplier_loader", validate_qa=True)
+    performance = result["performance"]
+    assert performance["source"] == {"bytes": book.stat().st_size, "estimated_rows": peek_workbook(book)[2]}
+    # The QA's rows_total counts mapped rows, not what the peek sees; an unchanged book predicts its last run.
+    assert result["summary"]["rows_total"] != performance["source"]["estimated_rows"]
+    job = ConversionJob("book", {"source": str(book), "qa_json": str(out / "book.json")})
+    assert estimate_costs([job])[0].predicted_wall_s == round(performance["total_wall_s"], 3)
+
+    synthetic_book(2000, sheets=1)
+    ratio = peek_workbook(book)[2] / performance["source"]["estimated_rows"]
+    assert 1.5 < ratio < 2.5
+    assert estimate_costs([job])[0].predicted_wall_s == round(performance["total_wall_s"] * ratio, 3)
+
+
+def test_memory_budget_keeps_predicted_peaks_under_the_total(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    template = str(ROOT / "samples/base-templates/Single part template.xlsx")
+    manifest = []
+    for i in range(3):
+        source = tmp_path / f"book{i}.xlsx"
+        source.write_text(f"part number,description,cost\nABC-{i},Widget,10\n")
+        manifest.append(ManifestRow(f"Book {i}", str(source), "", template, "single_part", ""))
+    jobs, _ = jobs_from_manifest(manifest, str(tmp_path / "out"), "config/markup/default_global_tiered_markup.json")
+    costs = estimate_costs(jobs)
+    order = [2, 0, 1]
+
+    outcomes = run_batch(jobs, workers=3, order=order, memory_mb=[100.0] * 3, memory_budget_mb=150.0)
+    assert [o.job.key for o in outcomes] == ["book_0", "book_1", "book_2"]
+    spans = sorted((o.started_s, o.started_s + o.wall_s, o.job.key) for o in outcomes)
+    assert [key for _, _, key in spans] == ["book_2", "book_0", "book_1"]
+    assert all(later[0] >= earlier[1] - 0.01 for earlier, later in zip(spans, spans[1:]))
+
+    report = schedule_report("cost", costs, order, outcomes, 150.0)
+    assert [j["planned_order"] for j in report["jobs"]] == [1, 2, 0]
+    assert all(j["actual_rows"] == 1 and j["actual_wall_s"] > 0 for j in report["jobs"])
+    assert report["makespan_s"] >= max(o.wall_s for o in outcomes)
@@ -0,0 +1,119 @@
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor.metrics import MetricsRegistry
+from pb_ingestor.service import JobQueue, make_server
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture
+def server(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    queue = JobQueue(tmp_path / "jobs", workers=1, max_pending=1, retention_s=3600, metrics=MetricsRegistry())
+    srv = make_server(
+        "127.0.0.1",
+        0,
+        queue,
+        {
+            "template_type": "single_part",
+            "markup_profile_path": "config/markup/default_global_tiered_markup.json",
+            "domains_config": "config/enrichment/manufacturer_domains.json",
+        },
+    )
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{srv.server_address[1]}"
+    srv.shutdown()
+    queue.shutdown()
+
+
+def _request(url: str, data: bytes | None = None):
+    req = urllib.request.Request(url, data=data, method="POST" if data is not None else "GET")
+    with urllib.request.urlopen(req, timeout=30) as resp:
+        return resp.status, resp.read()
+
+
+def test_submit_poll_download(server: str):
+    status, body = _request(f"{server}/jobs/convert?filename=book.csv", b"part number,cost\nA-1,10\nA-2,20\n")
+    assert status == 202
+    job_id = json.loads(body)["job_id"]
+
+    with pytest.raises(urllib.error.HTTPError) as busy:
+        _request(f"{server}/jobs/convert?filename=other.csv", b"part number,cost\nB-1,1\n")
+    assert busy.value.code == 429
+
+    deadline = time.monotonic() + 60
+    while True:
+        job = json.loads(_request(f"{server}/jobs/{job_id}")[1])
+        if job["status"] in {"succeeded", "failed"} or time.monotonic() > deadline:
+            break
+        time.sleep(0.1)
+    assert job["status"] == "succeeded", job
+    assert job["result"]["summary"]["rows_processed"] == 2
+    assert "converted.xlsx" in job["files"]
+
+    status, csv_bytes = _request(f"{server}/jobs/{job_id}/files/converted.csv")
+    assert status == 200 and b"A-2" in csv_bytes
+
+    with pytest.raises(urllib.error.HTTPError) as missing:
+        _request(f"{server}/jobs/{job_id}/files/..%2Fbook.csv")
+    assert missing.value.code == 404
+
+    metrics = _request(f"{server}/metrics")[1].decode().splitlines()
+    assert 'pb_ingestor_files_total{ingest_mode="fallback"} 1' in metrics
+    assert 'pb_ingestor_http_request_duration_seconds_count{method="POST",route="/jobs/convert",code="429"} 1' in metrics
+
+
+def test_identical_uploads_reuse_cached_job(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    queue = JobQueue(tmp_path / "jobs", workers=1)
+    settings = {"template_type": "single_part", "markup_profile_path": "config/markup/default_global_tiered_markup.json"}
+    try:
+        first = queue.submit("convert", "book.csv", b"part number,cost\nA-1,10\n", settings)
+        first.future.result(timeout=60)
+        deadline = time.monotonic() + 10
+        while first.finished is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert first.status == "succeeded"
+        assert first.to_dict()["progress"]["rows_written"] == 1
+
+        assert queue.submit("convert", "book.csv", b"part number,cost\nA-1,10\n", settings) is first
+        # The name can decide Manufacturer and is reported as source_file, so a renamed upload is its own job.
+        renamed = queue.submit("convert", "Carrier renamed.csv", b"part number,cost\nA-1,10\n", settings)
+        assert renamed is not first
+        renamed.future.result(timeout=60)
+        assert renamed.result["summary"]["rows_processed"] == 1
+        assert "Carrier renamed.csv" in (renamed.work_dir / "out/converted.csv").read_text()
+        assert "Carrier" not in (first.work_dir / "out/converted.csv").read_text()
+        other = queue.submit("convert", "book.csv", b"part number,cost\nA-1,10\n", {**settings, "labor_rate_default": 90.0})
+        assert other is not first
+    finally:
+        queue.shutdown()
+
+
+def test_queue_and_watcher_share_a_callers_pool(tmp_path: Path, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    from pb_ingestor.watch import WatchService, WatchSettings
+
+    monkeypatch.chdir(ROOT)
+    (tmp_path / "drop").mkdir()
+    pool = ThreadPoolExecutor(max_workers=1)
+    queue = JobQueue(tmp_path / "jobs", executor=pool)
+    watch = WatchService(WatchSettings(str(tmp_path / "drop"), str(tmp_path / "results")), log=lambda line: None, executor=pool)
+    settings = {"template_type": "single_part", "markup_profile_path": "config/markup/default_global_tiered_markup.json"}
+    try:
+        assert watch.executor is queue.executor is pool
+        queue.submit("convert", "book.csv", b"part number,cost\nA-1,10\n", settings).future.result(timeout=60)
+        queue.shutdown()
+        watch.close()
+        # The owner, not the queue or the watcher, shuts the shared pool down.
+        assert pool.submit(sum, [1, 2]).result() == 3
+    finally:
+        pool.shutdown()
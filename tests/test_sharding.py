@@ -0,0 +1,120 @@
+import csv
+import hashlib
+import json
+from pathlib import Path
+
+import pytest
+from openpyxl import load_workbook
+
+from pb_ingestor import output, sharding
+from pb_ingestor.pipeline import ConversionError
+
+
+def _shard_part_names(path: Path, rows: int) -> list:
+    # supplier_loader's header is row 2 and Part Name is column B.
+    ws = load_workbook(path)["Sheet1"]
+    return [ws.cell(row=3 + i, column=2).value for i in range(rows)]
+
+
+def _csv_rows(out: Path) -> list[dict]:
+    return list(csv.DictReader((out / "book.csv").open()))
+
+
+def _positions(shard: dict) -> list[int]:
+    return [pos for first, last in shard["row_ranges"] for pos in range(first - 1, last)]
+
+
+def test_row_shards_are_written_in_parallel_with_a_checksummed_index(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(30, sheets=1, duplicate_rate=0)
+    out = tmp_path / "out"
+    result = convert(book, out, "supplier_loader", shard_rows=10, shard_workers=2, skip_unchanged=True, validate_qa=True)
+    assert result["workbook_shards"] == str(out / "book.shards.json") and not (out / "book.xlsx").exists()
+    assert result["performance"]["shards"]["workers"] == 2
+
+    index = json.loads((out / "book.shards.json").read_text())
+    rows = _csv_rows(out)
+    assert index["rows"] == len(rows) > 20 and result["performance"]["shards"]["shards"] == 3
+    assert [s["path"] for s in index["shards"]] == ["book.part001.xlsx", "book.part002.xlsx", "book.part003.xlsx"]
+    assert [s["row_ranges"] for s in index["shards"]] == [[[1, 10]], [[11, 20]], [[21, len(rows)]]]
+    for shard in index["shards"]:
+        path = out / shard["path"]
+        assert hashlib.sha256(path.read_bytes()).hexdigest() == shard["sha256"] and path.stat().st_size == shard["bytes"]
+        assert _shard_part_names(path, shard["rows"]) == [rows[pos]["Part Name"] for pos in _positions(shard)]
+
+    # The index and shards satisfy the unchanged-run check in place of the single workbook.
+    again = convert(book, out, "supplier_loader", shard_rows=10, shard_workers=2, skip_unchanged=True)
+    assert again["skipped_unchanged"] is True
+
+
+def test_shards_by_manufacturer_record_their_scattered_rows(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(60, sheets=1, duplicate_rate=0)
+    out = tmp_path / "out"
+    convert(book, out, "supplier_loader", shard_by="Manufacturer", shard_workers=1)
+    index = json.loads((out / "book.shards.json").read_text())
+    rows = _csv_rows(out)
+    expected: dict[str, list[int]] = {}
+    for pos, row in enumerate(rows):
+        expected.setdefault(row["Manufacturer"], []).append(pos)
+    assert {s["key"]: _positions(s) for s in index["shards"]} == expected
+    assert any(len(s["row_ranges"]) > 1 for s in index["shards"])
+    carrier = next(s for s in index["shards"] if s["key"] == "Carrier")
+    assert carrier["path"] == "book.carrier.xlsx"
+    assert _shard_part_names(out / carrier["path"], carrier["rows"]) == [rows[pos]["Part Name"] for pos in expected["Carrier"]]
+
+    # Re-sharding by rows removes the previous run's shards.
+    convert(book, out, "supplier_loader", shard_rows=40, shard_workers=1)
+    assert sorted(p.name for p in out.glob("book.*.xlsx")) == ["book.part001.xlsx", "book.part002.xlsx"]
+
+
+def test_grouped_shards_under_a_memory_budget_are_collected_a_few_per_pass(tmp_path: Path, monkeypatch, convert, synthetic_book):
+    monkeypatch.setattr(sharding, "PASS_ROWS", 100)
+    passes = []
+
+    def record(shards, spec):
+        planned = plan_passes(shards, spec)
+        passes.extend([len(shards[i].positions) for i in members] for members in planned)
+        return planned
+
+    plan_passes = sharding.plan_passes
+    monkeypatch.setattr(sharding, "plan_passes", record)
+    book = synthetic_book(600, sheets=1, duplicate_rate=0)
+    out = tmp_path / "out"
+    result = convert(book, out, "supplier_loader", shard_by="Manufacturer", shard_workers=1, memory_budget_mb=0.05, spill_dir=str(tmp_path / "spill"))
+    assert result["performance"]["spill"]["rows_spilled"] > 0
+    # Each pass buffers at most PASS_ROWS rows unless a single shard is larger.
+    assert len(passes) > 1 and all(sum(rows) <= 100 or len(rows) == 1 for rows in passes)
+
+    index = json.loads((out / "book.shards.json").read_text())
+    rows = _csv_rows(out)
+    assert sum(s["rows"] for s in index["shards"]) == len(rows)
+    for shard in index["shards"]:
+        assert _shard_part_names(out / shard["path"], shard["rows"]) == [rows[pos]["Part Name"] for pos in _positions(shard)]
+
+
+def test_switching_between_sharded_and_single_workbooks_removes_the_other(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(30, sheets=1, duplicate_rate=0)
+    out = tmp_path / "out"
+    convert(book, out, "supplier_loader")
+    assert (out / "book.xlsx").exists()
+
+    convert(book, out, "supplier_loader", shard_rows=10, shard_workers=1)
+    assert not (out / "book.xlsx").exists()
+    assert sorted(p.name for p in out.glob("book.*.xlsx")) == ["book.part001.xlsx", "book.part002.xlsx", "book.part003.xlsx"]
+
+    convert(book, out, "supplier_loader")
+    assert (out / "book.xlsx").exists() and not (out / "book.shards.json").exists()
+    assert list(out.glob("book.*.xlsx")) == []
+
+
+def test_books_past_the_sheet_row_limit_are_sharded_automatically(tmp_path: Path, monkeypatch, convert, synthetic_book):
+    # supplier_loader's template has 220 rows and a header on row 2, so 228 mapped rows fit a sheet.
+    monkeypatch.setattr(output, "EXCEL_MAX_ROWS", 230)
+    book = synthetic_book(300, sheets=1, duplicate_rate=0)
+    out = tmp_path / "out"
+    result = convert(book, out, "supplier_loader", shard_workers=1)
+    index = json.loads(Path(result["workbook_shards"]).read_text())
+    assert index["max_rows_per_shard"] == 228 and [s["rows"] for s in index["shards"]] == [228, len(_csv_rows(out)) - 228]
+
+    # Pipelined runs cannot know the row count up front; without a shard option they stop at the limit.
+    with pytest.raises(ConversionError, match="--shard-rows"):
+        convert(book, tmp_path / "pipelined", "supplier_loader", pipelined=True)
@@ -0,0 +1,43 @@
+import json
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from pb_ingestor.spill import SpillStore
+from pb_ingestor.validation import validate_qa_report
+
+
+def test_spill_list_keeps_order_once_over_budget():
+    with SpillStore(budget_mb=0.01) as store:
+        rows = store.list("rows")
+        for i in range(5000):
+            rows.append({"i": i, "text": "x" * 20})
+        assert rows.spilled and len(rows) == 5000
+        assert [r["i"] for r in rows] == list(range(5000))
+        assert store.stats()["rows_spilled"] > 0
+        path = store.path
+    assert not path.exists()
+
+
+def test_memory_budget_conversion_matches_in_memory_outputs(tmp_path: Path, convert, synthetic_book):
+    book = synthetic_book(3000, duplicate_rate=0.05)
+
+    for template_type in ("single_part", "supplier_loader"):
+        plain = convert(book, tmp_path / template_type / "plain", template_type)
+        spilled = convert(book, tmp_path / template_type / "spilled", template_type, memory_budget_mb=0.05, spill_dir=str(tmp_path / "spill"))
+
+        assert spilled["summary"] == plain["summary"]
+        assert spilled["summary"]["rows_duplicates_ignored"] > 0
+        for name in ("book.csv", "book_manual_review.csv"):
+            assert (tmp_path / template_type / "spilled" / name).read_bytes() == (tmp_path / template_type / "plain" / name).read_bytes()
+        expected = load_workbook(tmp_path / template_type / "plain" / "book.xlsx")
+        actual = load_workbook(tmp_path / template_type / "spilled" / "book.xlsx")
+        assert actual.sheetnames == expected.sheetnames
+        for ws in expected.worksheets:
+            assert list(actual[ws.title].values) == list(ws.values)
+
+        qa = json.loads((tmp_path / template_type / "spilled" / "book.json").read_text())
+        validate_qa_report(qa)
+        assert set(qa["performance"]["spill"]["spilled_lists"]) == {"source_rows", "mapped_rows"}
+        assert qa["performance"]["spill"]["rows_spilled"] > 0
+    assert list((tmp_path / "spill").iterdir()) == []
@@ -0,0 +1,36 @@
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from pb_ingestor.ingest import ingest_xlsx
+from pb_ingestor.synthetic import BookSpec, generate_book, generate_delimited_book, generate_truncated_book
+
+
+def test_generated_book_exercises_ingest_edge_cases(tmp_path: Path):
+    book = tmp_path / "book.xlsx"
+    stats = generate_book(book, BookSpec(rows=300, sheets=3, seed=7))
+    assert stats["rows"] == 300
+    assert stats["family_rows"] > 0 and stats["merged_ranges"] > 0 and stats["messy_costs"] > 0
+
+    wb = load_workbook(book)
+    assert len(wb.worksheets) == 3
+    assert any(ws.merged_cells.ranges for ws in wb.worksheets)
+
+    result = ingest_xlsx(book)
+    assert result.mode == "xlsx" and len(result.rows) == 300
+    assert all(row.family_context for row in result.rows)
+    # Merged description cells are filled down by ingest.
+    assert all(row.values["Description"] for row in result.rows)
+    # The streaming read scans merges from the package XML and yields the same rows.
+    streamed = ingest_xlsx(book, rows=[])
+    assert not streamed.errors and [r.values for r in streamed.rows] == [r.values for r in result.rows]
+    assert generate_book(tmp_path / "again.xlsx", BookSpec(rows=300, sheets=3, seed=7)) == stats
+
+
+def test_malformed_books_fall_back(tmp_path: Path):
+    generate_delimited_book(tmp_path / "text.xlsx", BookSpec(rows=50))
+    text = ingest_xlsx(tmp_path / "text.xlsx")
+    assert text.mode == "fallback" and len(text.rows) == 50
+
+    generate_truncated_book(tmp_path / "cut.xlsx", BookSpec(rows=50))
+    assert ingest_xlsx(tmp_path / "cut.xlsx").mode != "xlsx"
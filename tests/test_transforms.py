@@ -0,0 +1,69 @@
+from decimal import Decimal
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor.crosswalk import CrosswalkRow, infer_crosswalk_path, load_crosswalk
+from pb_ingestor.ingest import SourceRow
+from pb_ingestor.mapper import RowMapper, map_rows
+from pb_ingestor.markup import MarkupProfile, MarkupTier
+from pb_ingestor.transforms import compile_plan
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _profile():
+    return MarkupProfile([MarkupTier(min_cost=Decimal("0.01"), max_cost=None, markup_percent=Decimal("100"), order=1)])
+
+
+def test_bundle_crosswalk_computes_labor_and_total_price(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    crosswalk = load_crosswalk(infer_crosswalk_path("bundle"))
+    assert {c.output_sheet for c in crosswalk} == {"Bundle (1 part, 1 labor)"}
+    rows = [
+        SourceRow("Carrier book.xlsx", "Gas Furnaces", 2, {"part number": "F-1", "cost": "$10.005", "Labor Hours": "1.5", "warranty": "5 yr"}),
+        SourceRow("Carrier book.xlsx", "Gas Furnaces", 3, {"part number": "F-2", "cost": "20", "Labor Hours": ""}),
+        SourceRow("Carrier book.xlsx", "Gas Furnaces", 4, {"part number": "F-3", "cost": ""}),
+    ]
+    mapped, counters = map_rows(rows, crosswalk, _profile(), labor_cost_default=40, labor_rate_default=125.0)
+    first, second, third = (m.row for m in mapped)
+    assert first["Part Price"] == 20.01 and first["Labor Rate"] == 125.0 and first["Labor Cost"] == 40.0
+    assert first["Labor Price"] == 187.5 and first["Total Price"] == 207.51
+    assert first["Warranty"] == "5 yr" and first["Manufacturer"] == "Carrier" and first["Category"] == "Gas Furnaces"
+    assert second["Labor Price"] is None and second["Total Price"] == 40.0
+    assert third["Total Price"] is None and third["Status Reason"] == "warning_missing_cost"
+    assert counters["rows_processed"] == 3
+
+
+def test_batch_mapping_matches_row_at_a_time(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    crosswalk = load_crosswalk(infer_crosswalk_path("single_part"))
+    rows = [
+        SourceRow("book.xlsx", "Accessories", n, {"Item": f"A-{n % 7}", "Net Cost": str(n), "Brand": "Acme" if n % 2 else ""})
+        for n in range(2, 40)
+    ]
+    by_row = RowMapper(crosswalk, _profile())
+    one_at_a_time = [m for m in map(by_row.map, rows) if m is not None]
+    batched, counters = map_rows(rows, crosswalk, _profile())
+    assert [m.row for m in batched] == [m.row for m in one_at_a_time]
+    assert counters == by_row.counters and counters["rows_duplicates_ignored"] == len(rows) - 7
+    assert {m.row["Manufacturer"] for m in batched} == {"Acme", ""}
+
+
+def test_compile_rejects_unknown_sources_and_rules():
+    def row(column, sources, rule):
+        return CrosswalkRow("T", "S", column, False, sources, rule, "")
+
+    with pytest.raises(ValueError, match="unknown source"):
+        compile_plan([row("Part Name", "source_description|magic", "prefer_source_then_scrape")], _profile())
+    with pytest.raises(ValueError, match="unknown transform_rule"):
+        compile_plan([row("Part Cost", "source_cost", "to_roman")], _profile())
+
+    plan = compile_plan(
+        [row("Total Price", "derived_part_price_plus_labor_price", "round_nearest_cent"), row("Status", "system", "processed_or_manual_review")],
+        _profile(),
+    )
+    order = [step.column for step in plan.steps]
+    assert order.index("Part Cost") < order.index("Part Price") < order.index("Total Price")
+    assert order.index("Labor Price") < order.index("Total Price") and "Status" not in order
+    assert plan.extra_columns == ["Total Price"]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor.output import write_qa_json
+from pb_ingestor.validation import compiled_validator, match_schema, validate_many
+
+ROOT = Path(__file__).resolve().parents[1]
+COUNTERS = {"rows_total": 3, "rows_processed": 2, "rows_incomplete": 1, "rows_manual_review": 1, "rows_duplicates_ignored": 0}
+
+
+def test_validate_many_matches_schemas_and_reports_errors(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    qa_dir = tmp_path / "qa"
+    for idx in range(20):
+        write_qa_json(qa_dir / f"customer_{idx}.json", COUNTERS, "xlsx", [], "book.xlsx", [], validate=True)
+    bad = json.loads((qa_dir / "customer_0.json").read_text())
+    bad["rows_total"] = "three"
+    (qa_dir / "broken.json").write_text(json.dumps(bad))
+    (qa_dir / "consolidated.json").write_text(json.dumps({"aggregate": {}}))
+    (qa_dir / "truncated.json").write_text("{")
+    (qa_dir / "runs.jsonl").write_text("\n".join(json.dumps(bad if i == 2 else {**bad, "rows_total": 3}) for i in range(4)) + "\n")
+
+    serial = validate_many([str(qa_dir)], schema_dir="schemas")
+    parallel = validate_many([str(qa_dir / "*.json*")], schema_dir="schemas", workers=2)
+
+    for summary in (serial, parallel):
+        assert summary["files"] == 24
+        assert (summary["valid"], summary["invalid"], summary["unmatched"], summary["unreadable"]) == (20, 2, 1, 1)
+        by_name = {Path(r["path"]).name: r for r in summary["results"]}
+        assert by_name["broken.json"]["errors"] == ["rows_total:'three' is not of type 'integer'"]
+        assert by_name["runs.jsonl"]["records"] == 4
+        assert by_name["runs.jsonl"]["errors"][0].startswith("line 3: rows_total:")
+        assert by_name["customer_1.json"]["schemas"] == ["qa_run_report"]
+
+
+def test_match_schema_prefers_most_specific(monkeypatch):
+    monkeypatch.chdir(ROOT)
+    markup = json.loads(Path("config/markup/default_global_tiered_markup.json").read_text())
+    validators = {
+        "markup_profile": compiled_validator("schemas/markup_profile.schema.json"),
+        "qa_run_report": compiled_validator("schemas/qa_run_report.schema.json"),
+    }
+    assert match_schema(markup, validators) == "markup_profile"
+    assert match_schema([markup], validators) is None
+
+
+def test_write_qa_json_validates_when_asked(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    counters = {**COUNTERS, "rows_total": -1}
+    write_qa_json(tmp_path / "unchecked.json", counters, "xlsx", [], "book.xlsx", [])
+    with pytest.raises(ValueError, match="rows_total"):
+        write_qa_json(tmp_path / "checked.json", counters, "xlsx", [], "book.xlsx", [], validate=True)
+    assert not (tmp_path / "checked.json").exists()
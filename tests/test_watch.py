@@ -0,0 +1,60 @@
+import json
+from pathlib import Path
+
+from pb_ingestor.watch import FolderWatcher, WatchService, WatchSettings
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def test_watcher_debounces_partial_writes(tmp_path: Path):
+    now = [0.0]
+    watcher = FolderWatcher(tmp_path, debounce_s=2.0, clock=lambda: now[0])
+    book = tmp_path / "book.csv"
+    book.write_text("part number,cost\n")
+    (tmp_path / "~$lock.xlsx").write_text("x")
+    (tmp_path / "upload.xlsx.part").write_text("x")
+    assert watcher.poll() == []
+
+    now[0] = 1.5
+    book.write_text("part number,cost\nA-1,10\n")
+    assert watcher.poll() == []
+    now[0] = 3.0
+    assert watcher.poll() == []
+    now[0] = 3.6
+    assert watcher.poll() == [book]
+    now[0] = 10.0
+    assert watcher.poll() == []
+
+    # Only the latest signature per file is remembered, and only while the file exists.
+    book.unlink()
+    assert watcher.poll() == [] and watcher._handled == {}
+
+
+def test_service_converts_dropped_file_into_results(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    drop = tmp_path / "drop"
+    (drop / "single_part").mkdir(parents=True)
+    (drop / "bundle").mkdir()
+    (drop / "single_part" / "acme.csv").write_text("part number,description,cost\nA-1,Widget,10\n")
+    (drop / "bundle" / "acme.csv").write_text("part number,description,cost\nB-1,Blower,20\nB-2,Coil,30\n")
+    (drop / "bundle" / "acme.txt").write_text("part number,description,cost\nC-1,Damper,40\n")
+    (drop / "broken.csv").write_text("")
+    settings = WatchSettings(watch_dir=str(drop), results_dir=str(drop / "results"), workers=1, debounce_s=0)
+    logs: list[str] = []
+    service = WatchService(settings, log=logs.append)
+    try:
+        service.run_once()
+        service.drain()
+    finally:
+        service.close()
+
+    # Same-named books in different template folders, or with different suffixes, keep separate results.
+    ok = json.loads((drop / "results/single_part/acme.csv/result.json").read_text())
+    assert ok["result"]["summary"]["rows_processed"] == 1
+    assert (drop / "results/single_part/acme.csv/converted.xlsx").exists()
+    assert json.loads((drop / "results/bundle/acme.csv/result.json").read_text())["result"]["summary"]["rows_processed"] == 2
+    assert json.loads((drop / "results/bundle/acme.txt/result.json").read_text())["result"]["summary"]["rows_processed"] == 1
+    broken = json.loads((drop / "results/broken.csv/result.json").read_text())
+    assert broken["result"]["ingest_mode"] == "fallback_failed"
+    # Outputs written under the watched folder are never re-queued.
+    assert not any("results" in line for line in logs if line.startswith("queued="))
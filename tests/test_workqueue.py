@@ -0,0 +1,172 @@
+import json
+import multiprocessing
+import os
+import sqlite3
+from pathlib import Path
+
+import pytest
+
+from pb_ingestor import pipeline
+from pb_ingestor.batch import ConversionJob, jobs_from_manifest
+from pb_ingestor.crosswalk import ManifestRow
+from pb_ingestor import workqueue
+from pb_ingestor.workqueue import WorkQueue, run_worker, write_consolidated
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _jobs(*keys: str) -> list[ConversionJob]:
+    return [ConversionJob(key, {"source": f"{key}.xlsx"}) for key in keys]
+
+
+def test_leases_expire_and_retries_end_in_dead_letter(tmp_path: Path):
+    clock = _Clock()
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_s=60, retry_delay_s=10, clock=clock)
+    batch, added = queue.enqueue(_jobs("a", "b"), "manifest.csv", str(tmp_path / "consolidated.json"), max_attempts=2)
+    assert added == 2
+    assert queue.enqueue(_jobs("a", "b", "c"), "manifest.csv", "unused", batch=batch, max_attempts=2) == (batch, 1)
+
+    first = queue.claim("node-1")
+    assert (first.job.key, first.attempt) == ("a", 1)
+    second = queue.claim("node-2")
+    assert second.job.key == "b"
+
+    # node-1 goes quiet; once its lease lapses node-2 takes the job and node-1 can no longer record it.
+    clock.now += 50
+    assert queue.heartbeat(first.id, "node-1") and queue.heartbeat(second.id, "node-2")
+    clock.now += 61
+    assert queue.heartbeat(second.id, "node-2")
+    taken = queue.claim("node-2")
+    assert (taken.job.key, taken.attempt) == ("a", 2)
+    assert not queue.heartbeat(first.id, "node-1")
+    assert queue.finish(first, "node-1", {"summary": {}}, None, 1.0) == "lost"
+
+    crash = {"file_name": "a.xlsx", "error_stage": "worker_crash", "error_message": "exit 1", "rows_recovered": 0}
+    assert queue.finish(taken, "node-2", None, crash, 1.0) == "dead"
+    bad = {"file_name": "c.xlsx", "error_stage": "ingest", "error_message": "corrupt", "rows_recovered": 0}
+    third = queue.claim("node-2")
+    assert third.job.key == "c"
+    assert queue.finish(third, "node-2", None, bad, 1.0) == "failed"
+    assert queue.counts(batch) == {"pending": 0, "leased": 1, "done": 0, "failed": 1, "dead": 1}
+    assert not queue.claim_consolidation(batch)
+
+    assert [d["key"] for d in queue.dead_letters(batch)] == ["a"]
+    assert queue.requeue_dead(batch) == 1
+    assert queue.claim("node-3").attempt == 1
+
+
+
+def test_consolidation_is_stamped_only_once_written(tmp_path: Path, monkeypatch):
+    clock = _Clock()
+    queue = WorkQueue(tmp_path / "queue.sqlite", lease_s=60, clock=clock)
+    consolidated_path = tmp_path / "qa/consolidated.json"
+    batch, _ = queue.enqueue([], "manifest.csv", str(consolidated_path))
+    assert queue.claim_consolidation(batch) and not queue.claim_consolidation(batch)
+    assert queue.consolidated_at(batch) is None
+
+    # The claim holder died without writing; once the claim lapses another worker takes it over.
+    clock.now += 61
+    assert queue.claim_consolidation(batch)
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(workqueue.os, "replace", fail)
+    with pytest.raises(OSError, match="disk full"):
+        write_consolidated(queue, batch)
+    assert queue.consolidated_at(batch) is None and queue.unconsolidated() == [batch]
+    assert list(consolidated_path.parent.iterdir()) == []
+
+    monkeypatch.undo()
+    assert queue.claim_consolidation(batch)
+    assert write_consolidated(queue, batch) == str(consolidated_path)
+    assert queue.consolidated_at(batch) == clock.now and queue.unconsolidated() == []
+    assert json.loads(consolidated_path.read_text())["queue"]["batch"] == batch
+    assert not queue.claim_consolidation(batch)
+
+
+def test_queues_created_by_earlier_versions_are_migrated(tmp_path: Path):
+    path = tmp_path / "queue.sqlite"
+    db = sqlite3.connect(path)
+    db.execute(
+        "CREATE TABLE batches (batch TEXT PRIMARY KEY, manifest TEXT NOT NULL, consolidated_qa TEXT NOT NULL,"
+        " skipped TEXT NOT NULL, created_at REAL NOT NULL, consolidated_at REAL)"
+    )
+    db.execute(
+        "CREATE TABLE jobs (id INTEGER PRIMARY KEY, batch TEXT NOT NULL, key TEXT NOT NULL, kwargs TEXT NOT NULL,"
+        " status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, max_attempts INTEGER NOT NULL,"
+        " available_at REAL NOT NULL DEFAULT 0, lease_owner TEXT, lease_expires REAL, result TEXT, failure TEXT,"
+        " wall_s REAL, UNIQUE (batch, key))"
+    )
+    db.execute("CREATE INDEX jobs_open ON jobs (status, available_at)")
+    db.execute("INSERT INTO batches VALUES ('old', 'manifest.csv', 'qa.json', '[]', 1.0, NULL)")
+    db.execute("INSERT INTO jobs (batch, key, kwargs, max_attempts) VALUES ('old', 'a', '{\"source\": \"a.xlsx\"}', 3)")
+    db.commit()
+    db.close()
+
+    queue = WorkQueue(path)
+    assert not queue.claim_consolidation("old")
+    queue.enqueue(_jobs("b"), "manifest.csv", "unused", batch="old", priorities=[5.0])
+    assert [queue.claim("node").job.key for _ in range(2)] == ["b", "a"]
+    index = queue._db.execute("SELECT sql FROM sqlite_master WHERE name = 'jobs_open'").fetchone()[0]
+    assert "priority" in index
+
+def _convert_or_crash(path):
+    if "crash" in str(path):
+        os._exit(3)
+    return _real_ingest(path)
+
+
+_real_ingest = pipeline.ingest_xlsx
+
+
+def _worker(queue_path: str, owner: str) -> None:
+    pipeline.ingest_xlsx = _convert_or_crash
+    run_worker(queue_path, owner=owner, lease_s=30, retry_delay_s=0, poll_s=0.05, until_empty=True)
+
+
+def test_workers_in_separate_processes_drain_a_batch(tmp_path: Path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    template = str(ROOT / "samples/base-templates/Single part template.xlsx")
+    manifest = []
+    for i in range(4):
+        good = tmp_path / f"good{i}.xlsx"
+        good.write_text(f"part number,description,cost\nABC-{i},Widget,10\nABD-{i},Gadget,2\n")
+        manifest.append(ManifestRow(f"Good {i}", str(good), "", template, "single_part", ""))
+    crash = tmp_path / "crash.xlsx"
+    crash.write_text("part number,cost\nX-1,10\n")
+    manifest += [
+        ManifestRow("Crash Co", str(crash), "", template, "single_part", ""),
+        ManifestRow("Missing Co", str(tmp_path / "missing.xlsx"), "", template, "single_part", ""),
+        ManifestRow("Unset Co", str(crash), "", "", "user_selected", ""),
+    ]
+    jobs, skipped = jobs_from_manifest(manifest, str(tmp_path / "out"), "config/markup/default_global_tiered_markup.json")
+    queue_path = str(tmp_path / "queue.sqlite")
+    consolidated_path = tmp_path / "out/qa/consolidated.json"
+    batch, _ = WorkQueue(queue_path).enqueue(jobs, "manifest.csv", str(consolidated_path), skipped, max_attempts=2)
+
+    ctx = multiprocessing.get_context("fork")
+    workers = [ctx.Process(target=_worker, args=(queue_path, f"node-{i}")) for i in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join(60)
+        assert worker.exitcode == 0
+
+    consolidated = json.loads(consolidated_path.read_text())
+    assert consolidated["aggregate"]["rows_processed"] == 8
+    assert consolidated["aggregate"]["files_failed"] == 2
+    assert {f["file_name"]: f["error_stage"] for f in consolidated["failures"]} == {"crash.xlsx": "worker_crash", "missing.xlsx": "ingest"}
+    assert consolidated["skipped"] == [{"customer_name": "Unset Co", "reason": "output_type_not_set"}]
+    assert consolidated["queue"]["batch"] == batch
+    assert consolidated["queue"]["dead_letter"] == [{"key": "crash_co", "attempts": 2, "file_name": "crash.xlsx"}]
+    assert WorkQueue(queue_path).counts(batch) == {"pending": 0, "leased": 0, "done": 4, "failed": 1, "dead": 1}
+    assert all((tmp_path / f"out/converted/good_{i}.xlsx").exists() for i in range(4))